@@ -0,0 +1,8 @@
+"""
+Benchmarks for the SuperMarket problem.
+
+Each module of this package can be run as a script, for example:
+
+    python -m benchmarks.memory_regression
+    python -m benchmarks.scaling --output baseline.json
+"""
@@ -0,0 +1,45 @@
+"""
+Benchmark of the batch solve.
+
+It solves the same batch of instances with pools of different sizes and reports
+the throughput, to check that it grows with the number of cores.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+import os
+# Local imports
+from supermarket_implementation.batch import solve_batch
+from supermarket_implementation.models import SolverParameters
+from benchmarks.instances import generate_instance
+
+
+def main() -> None:
+    """Run the batch benchmark"""
+    parser = ArgumentParser(description="Measure the throughput of the batch solve.")
+    parser.add_argument("--instances", type=int, default=16)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--cashiers", type=int, default=6)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--time-limit", type=float, default=5.0)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    pool_sizes = args.pool_sizes or sorted({1, max(1, cores // 2), cores})
+    instances = [
+        generate_instance(args.clients, args.cashiers, seed) for seed in range(args.instances)
+    ]
+    # Each solve uses one core, so the pools don't compete for them
+    parameters = SolverParameters(max_time_in_seconds=args.time_limit, num_workers=1)
+    print(f"{'processes':>10} {'time (s)':>9} {'instances/s':>12} {'failed':>7}")
+    for pool_size in pool_sizes:
+        start = perf_counter()
+        failed = sum(
+            result.error is not None
+            for result in solve_batch(instances, parameters=parameters, max_workers=pool_size)
+        )
+        elapsed = perf_counter() - start
+        print(f"{pool_size:>10} {elapsed:>9.2f} {len(instances) / elapsed:>12.2f} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
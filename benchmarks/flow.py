@@ -0,0 +1,46 @@
+"""
+Benchmark of the min cost flow mode.
+
+It solves days of growing size with the heuristic, the min cost flow and (for the
+smallest ones) the CP-SAT solver, and compares the objective and the time.
+"""
+from argparse import ArgumentParser
+# Local imports
+from supermarket_implementation import CashierScheduling
+from supermarket_implementation.models import SolverParameters
+from benchmarks.instances import generate_instance
+
+
+def main() -> None:
+    """Run the min cost flow benchmark"""
+    parser = ArgumentParser(description="Compare the min cost flow with the other modes.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[500, 5000, 20000])
+    parser.add_argument("--clients-per-cashier", type=int, default=125)
+    parser.add_argument("--max-cp-sat-clients", type=int, default=1000)
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    parameters = SolverParameters(
+        max_time_in_seconds=args.time_limit, num_workers=args.workers)
+    print(f"{'clients':>8} {'cashiers':>9} {'mode':>10} {'status':>9}" +
+          f" {'objective':>12} {'time (s)':>9}")
+    for n_clients in args.clients:
+        n_cashiers = max(1, n_clients // args.clients_per_cashier)
+        cashiers, clients = generate_instance(n_clients, n_cashiers, args.seed)
+        modes = ["heuristic", "flow"]
+        if n_clients <= args.max_cp_sat_clients:
+            modes.append("cp_sat")
+        for mode in modes:
+            scheduler = CashierScheduling(parameters=parameters)
+            scheduler.set_cashiers(cashiers)
+            scheduler.set_clients(clients)
+            scheduler.solve(mode)
+            stats = scheduler.stats()
+            print(f"{n_clients:>8} {n_cashiers:>9} {mode:>10} {stats.status:>9}" +
+                  f" {stats.objective_value:>12.0f} {stats.wall_time:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark of the formulations of the model.
+
+It compares the per-pair intervals formulation against the cumulative one (where
+each group of interchangeable cashiers is a single resource), measuring the time
+to build the model, the time of the search and the objective.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+# Local imports
+from supermarket_implementation import CashierScheduling
+from supermarket_implementation.models import SolverParameters
+from benchmarks.instances import generate_instance
+from benchmarks.symmetry import tiered_cashiers
+
+
+def main() -> None:
+    """Run the formulations benchmark"""
+    parser = ArgumentParser(description="Compare the intervals and cumulative formulations.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 200, 400])
+    parser.add_argument("--cashiers", type=int, default=12)
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    parameters = SolverParameters(
+        max_time_in_seconds=args.time_limit, num_workers=args.workers)
+    print(f"{'clients':>8} {'formulation':>11} {'variables':>10} {'build (s)':>10}" +
+          f" {'solve (s)':>10} {'status':>9} {'objective':>10} {'bound':>10}")
+    for n_clients in args.clients:
+        cashiers, clients = generate_instance(n_clients, args.cashiers, args.seed)
+        cashiers = tiered_cashiers(cashiers)
+        for formulation in ("intervals", "cumulative"):
+            scheduler = CashierScheduling(formulation=formulation, parameters=parameters)
+            scheduler.set_cashiers(cashiers)
+            scheduler.set_clients(clients)
+            start = perf_counter()
+            model, _ = scheduler.build_model()
+            build_time = perf_counter() - start
+            scheduler.solve()
+            stats = scheduler.stats()
+            print(f"{n_clients:>8} {formulation:>11} {len(model.Proto().variables):>10}" +
+                  f" {build_time:>10.2f} {stats.wall_time - build_time:>10.2f}" +
+                  f" {stats.status:>9} {stats.objective_value:>10.0f} {stats.best_bound:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
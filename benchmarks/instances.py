@@ -0,0 +1,37 @@
+"""
+Seeded synthetic instances for the benchmarks.
+"""
+# External imports
+import numpy as np
+# Local imports
+from supermarket_implementation.models import Cashier, Client
+
+
+def generate_instance(
+    n_clients: int,
+    n_cashiers: int,
+    seed: int = 0
+) -> tuple[list[Cashier], list[Client]]:
+    """Generate the cashiers and clients of a synthetic instance.
+
+    The clients arrive uniformly during the day. One third of the cashiers
+    only work in the morning, one third only in the afternoon and the rest
+    work the whole day.
+    """
+    rng = np.random.default_rng(seed)
+    cashiers = [
+        Cashier(
+            name=f"C{i}",
+            available_in_the_morning=i % 3 != 1,
+            available_in_the_afternoon=i % 3 != 2,
+            effectiveness_average=float(rng.uniform(0.8, 1.2)),
+        )
+        for i in range(n_cashiers)
+    ]
+    arrivals = np.sort(rng.integers(0, 720, n_clients))
+    products = rng.integers(1, 50, n_clients)
+    clients = [
+        Client(id=i, arrival_time=arrival, products=product)
+        for i, (arrival, product) in enumerate(zip(arrivals.tolist(), products.tolist()))
+    ]
+    return cashiers, clients
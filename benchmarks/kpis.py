@@ -0,0 +1,75 @@
+"""
+Benchmark of the KPIs and the data of the charts.
+
+It compares the `SolutionTable` against the functions in `kpis` and `extra_data`
+(that scan the solution once per KPI), checking that both give the same output.
+The script exits with an error code if they don't.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+import sys
+# Local imports
+from supermarket_implementation.utils import kpis as KPI
+from supermarket_implementation.utils.extra_data import (
+    get_clients_per_product, get_scatter_data, get_shift_efficiency
+)
+from supermarket_implementation.utils.heuristic import solve_heuristic
+from supermarket_implementation.utils.table import SolutionTable
+from benchmarks.instances import generate_instance
+
+
+def with_lists(results) -> list:
+    """KPIs and charts using the list functions"""
+    return [
+        KPI.calculate_service_time_kpi(results),
+        KPI.calculate_waiting_time_kpi(results),
+        KPI.calculate_cashier_free_time_kpi(results),
+        KPI.calculate_service_level_kpi(results),
+        get_clients_per_product(results),
+        get_scatter_data(results),
+        get_shift_efficiency(results),
+    ]
+
+
+def with_table(results) -> list:
+    """KPIs and charts using the solution table"""
+    table = SolutionTable.from_solution(results)
+    return [
+        table.service_time_kpi(),
+        table.waiting_time_kpi(),
+        table.cashier_free_time_kpi(),
+        table.service_level_kpi(),
+        table.clients_per_product(),
+        table.scatter_data(),
+        table.shift_efficiency(),
+    ]
+
+
+def main() -> int:
+    """Run the KPIs benchmark"""
+    parser = ArgumentParser(description="Compare the KPIs of the lists and the table.")
+    parser.add_argument(
+        "--clients", type=int, nargs="+", default=[10, 1_000, 10_000, 100_000])
+    parser.add_argument("--cashiers", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'clients':>8} {'lists (s)':>10} {'table (s)':>10} {'same':>6}")
+    for n_clients in args.clients:
+        cashiers, clients = generate_instance(n_clients, args.cashiers, args.seed)
+        results = solve_heuristic(clients, cashiers)
+        start = perf_counter()
+        expected = with_lists(results)
+        lists_time = perf_counter() - start
+        start = perf_counter()
+        obtained = with_table(results)
+        table_time = perf_counter() - start
+        same = expected == obtained
+        failed |= not same
+        print(f"{n_clients:>8} {lists_time:>10.3f} {table_time:>10.3f} {str(same):>6}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Load test of the server.
+
+It sends `/generate_clients` and `/solve_problem` requests at fixed rates (an
+open loop: a request is sent on time even if the previous ones haven't finished)
+and reports the latency percentiles, the throughput and the errors of each endpoint.
+
+While the load runs, a probe requests `/` a few times per second. The root
+endpoint does no work, so if its latency grows, the event loop of the server is
+being blocked. Running the app in this process, the delay of the event loop is
+also measured directly.
+
+The app runs in this process through an ASGI transport by default, or in a local
+uvicorn server (the one of `server.run_server`) with `--uvicorn`. The script exits
+with an error code if any of the thresholds is exceeded.
+
+    python -m benchmarks.load_test --solve-rate 2 --max-p95 5
+"""
+from argparse import ArgumentParser, Namespace
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Any, AsyncIterator, Optional
+import asyncio
+import json
+import subprocess
+import sys
+# External imports
+import httpx
+import numpy as np
+# Local imports
+from supermarket_implementation.app import App
+from supermarket_implementation.utils.problem import CLOSING_TIME
+from benchmarks.instances import generate_instance
+
+# Time (in seconds) between each request of the probe
+PROBE_INTERVAL = 0.1
+# Time (in seconds) between each check of the delay of the event loop
+LAG_INTERVAL = 0.01
+# Percentiles reported for the latency
+PERCENTILES = (50, 95, 99)
+
+# Outcome of a request: (endpoint, latency in seconds, error or None)
+Outcome = tuple[str, float, Optional[str]]
+
+
+def solve_payloads(args: Namespace) -> list[dict[str, Any]]:
+    """Get the bodies of the solve requests. Each one has other clients, so
+    the cache of the server doesn't answer them (unless `--same-instance`)
+    """
+    payloads = []
+    for seed in range(1 if args.same_instance else args.instances):
+        cashiers, clients = generate_instance(args.clients, args.cashiers, seed)
+        payloads.append({
+            "cashiers": [
+                {
+                    "workerId": cashier.name,
+                    "available_in_the_morning": cashier.available_in_the_morning,
+                    "available_in_the_afternoon": cashier.available_in_the_afternoon,
+                    "effectiveness_average": cashier.effectiveness_average,
+                }
+                for cashier in cashiers
+            ],
+            "clients": [
+                {"id": client.id, "arrivalTime": client.arrival_time, "products": client.products}
+                for client in clients
+            ],
+            "mode": args.mode,
+            "maxTimeInSeconds": args.time_limit,
+        })
+    return payloads
+
+
+async def send(
+    client: httpx.AsyncClient,
+    method: str,
+    endpoint: str,
+    body: Optional[dict[str, Any]] = None
+) -> Outcome:
+    """Send one request and measure its latency"""
+    start = perf_counter()
+    try:
+        response = await client.request(method, endpoint, json=body)
+        error = None if response.status_code < 400 else f"HTTP {response.status_code}"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    return endpoint, perf_counter() - start, error
+
+
+async def fire(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    rate: float,
+    duration: float,
+    payloads: list[dict[str, Any]]
+) -> list[Outcome]:
+    """Send `rate` requests per second to the endpoint during `duration` seconds"""
+    if rate <= 0:
+        return []
+    tasks = []
+    start = perf_counter()
+    for index in range(int(rate * duration)):
+        # Keep the schedule, even if the event loop was late for the last request
+        await asyncio.sleep(max(0.0, start + index / rate - perf_counter()))
+        tasks.append(asyncio.create_task(
+            send(client, "POST", endpoint, payloads[index % len(payloads)])))
+    return list(await asyncio.gather(*tasks))
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list[Outcome]:
+    """Request the root endpoint until the load finishes"""
+    outcomes = []
+    while not stop.is_set():
+        outcomes.append(await send(client, "GET", "/"))
+        await asyncio.sleep(PROBE_INTERVAL)
+    return outcomes
+
+
+async def loop_lag(stop: asyncio.Event) -> list[float]:
+    """Measure how late the event loop wakes up from each sleep"""
+    lags = []
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(0.0, perf_counter() - start - LAG_INTERVAL))
+    return lags
+
+
+@asynccontextmanager
+async def in_process(args: Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    """Run the app in this process, through an ASGI transport"""
+    app = App(max_workers=args.workers, cache_size=args.cache_size).client
+    # * NOTE: The transport doesn't send the lifespan events, so the pool
+    # * of processes is stopped using the lifespan of the router
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://load-test",
+            timeout=args.timeout
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def with_uvicorn(args: Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    """Run the app in a local uvicorn server, started with `run_server`"""
+    command = [
+        sys.executable, "-m", "supermarket_implementation", "--port", str(args.port)
+    ]
+    if args.workers is not None:
+        command += ["--workers", str(args.workers)]
+    if args.cache_size is not None:
+        command += ["--cache-size", str(args.cache_size)]
+    server = subprocess.Popen(  # pylint: disable=R1732
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://localhost:{args.port}", timeout=args.timeout
+        ) as client:
+            # Wait until the server answers
+            for _ in range(100):
+                try:
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.2)
+            else:
+                raise RuntimeError("The server didn't start")
+            yield client
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run_load(args: Namespace) -> tuple[list[Outcome], list[float], float]:
+    """Run the load test. Returns the outcomes, the delays of the event loop
+    (only when the app runs in this process) and the elapsed time
+    """
+    generate_payloads = [{"arrival_rates": [args.clients], "rate_period": CLOSING_TIME}]
+    solve = solve_payloads(args)
+    connect = with_uvicorn if args.uvicorn else in_process
+    async with connect(args) as client:
+        stop = asyncio.Event()
+        monitors = [asyncio.create_task(probe(client, stop))]
+        if not args.uvicorn:
+            monitors.append(asyncio.create_task(loop_lag(stop)))
+        start = perf_counter()
+        loads = await asyncio.gather(
+            fire(client, "/generate_clients", args.generate_rate, args.duration,
+                 generate_payloads),
+            fire(client, "/solve_problem", args.solve_rate, args.duration, solve),
+        )
+        elapsed = perf_counter() - start
+        stop.set()
+        probes, *lags = await asyncio.gather(*monitors)
+    outcomes = [outcome for load in loads for outcome in load] + \
+        [("/ (probe)", latency, error) for _, latency, error in probes]
+    return outcomes, lags[0] if lags else [], elapsed
+
+
+def summarize(outcomes: list[Outcome], elapsed: float) -> dict[str, dict[str, float]]:
+    """Get the latency percentiles, throughput and error rate of each endpoint"""
+    summary = {}
+    for endpoint in dict.fromkeys(endpoint for endpoint, _, _ in outcomes):
+        latencies = np.array([
+            latency for name, latency, error in outcomes if name == endpoint and error is None])
+        errors = sum(name == endpoint and error is not None for name, _, error in outcomes)
+        total = len(latencies) + errors
+        stats = {
+            "requests": total,
+            "errors": errors,
+            "error_rate": errors / total,
+            "throughput": len(latencies) / elapsed,
+        }
+        if len(latencies):
+            stats.update({
+                f"p{percentile}": float(value)
+                for percentile, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))
+            })
+            stats["max"] = float(latencies.max())
+        summary[endpoint] = stats
+    return summary
+
+
+def check_thresholds(summary: dict[str, dict[str, float]], args: Namespace) -> list[str]:
+    """Get the thresholds exceeded by the endpoints"""
+    failures = []
+    for endpoint, stats in summary.items():
+        is_probe = endpoint.endswith("(probe)")
+        limits = (
+            ("p95", args.max_probe_p95 if is_probe else args.max_p95),
+            ("p99", None if is_probe else args.max_p99),
+            ("error_rate", args.max_error_rate),
+        )
+        for key, limit in limits:
+            if limit is not None and stats.get(key, 0.0) > limit:
+                failures.append(f"{endpoint}: {key} {stats[key]:.3f} > {limit}")
+    return failures
+
+
+def main() -> int:
+    """Run the load test"""
+    parser = ArgumentParser(description="Load test the server.")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--generate-rate", type=float, default=5.0,
+                        help="Requests per second to /generate_clients.")
+    parser.add_argument("--solve-rate", type=float, default=1.0,
+                        help="Requests per second to /solve_problem.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--cashiers", type=int, default=6)
+    parser.add_argument("--instances", type=int, default=20,
+                        help="Different instances sent to /solve_problem.")
+    parser.add_argument("--same-instance", action="store_true",
+                        help="Send always the same instance, to measure the cache.")
+    parser.add_argument("--mode", choices=["cp_sat", "heuristic", "rolling", "flow"],
+                        default="cp_sat")
+    parser.add_argument("--time-limit", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes of the server used to run the solver.")
+    parser.add_argument("--cache-size", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--uvicorn", action="store_true",
+                        help="Run the app in a local uvicorn server instead of in-process.")
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--max-p95", type=float, default=None)
+    parser.add_argument("--max-p99", type=float, default=None)
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    parser.add_argument("--max-probe-p95", type=float, default=None,
+                        help="Maximum p95 latency of `/`, to catch a blocked event loop.")
+    parser.add_argument("--output", default=None, help="Write the summary to this JSON file.")
+    args = parser.parse_args()
+
+    outcomes, lags, elapsed = asyncio.run(run_load(args))
+    summary = summarize(outcomes, elapsed)
+    print(f"{'endpoint':>18} {'requests':>9} {'errors':>7} {'req/s':>7}" +
+          "".join(f" {f'p{percentile} (s)':>9}" for percentile in PERCENTILES) +
+          f" {'max (s)':>9}")
+    for endpoint, stats in summary.items():
+        print(f"{endpoint:>18} {stats['requests']:>9} {stats['errors']:>7}" +
+              f" {stats['throughput']:>7.2f}" +
+              "".join(f" {stats.get(f'p{percentile}', 0.0):>9.3f}" for percentile in PERCENTILES) +
+              f" {stats.get('max', 0.0):>9.3f}")
+    if lags:
+        print(f"Event loop delay: p99 {np.percentile(lags, 99) * 1000:.1f} ms," +
+              f" max {max(lags) * 1000:.1f} ms")
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({"elapsed": elapsed, "endpoints": summary}, output, indent=2)
+
+    failures = check_thresholds(summary, args)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
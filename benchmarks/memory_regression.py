@@ -0,0 +1,87 @@
+"""
+Memory regression check for consecutive solves.
+
+It runs the same `CashierScheduling` many times and verifies that the memory
+of the process (RSS) and the size of the model stay flat between solves.
+The script exits with an error code if any of them keeps growing.
+"""
+from argparse import ArgumentParser
+import gc
+import os
+import resource
+import sys
+# Local imports
+from supermarket_implementation import CashierScheduling
+from benchmarks.instances import generate_instance
+
+
+def current_rss() -> int:
+    """Return the current resident memory of the process (in bytes)"""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # On other platforms, we can only use the peak memory
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def model_size(scheduler: CashierScheduling) -> int:
+    """Return the number of variables and constraints of the last model"""
+    proto = scheduler._model.Proto()  # pylint: disable=W0212
+    return len(proto.variables) + len(proto.constraints)
+
+
+def build_instance(n_clients: int, n_cashiers: int, seed: int) -> CashierScheduling:
+    """Build a small scheduling instance with fixed clients and cashiers"""
+    cashiers, clients = generate_instance(n_clients, n_cashiers, seed)
+    scheduler = CashierScheduling()
+    scheduler.set_cashiers(cashiers)
+    scheduler.set_clients(clients)
+    return scheduler
+
+
+def main() -> int:
+    """Run the memory regression check"""
+    parser = ArgumentParser(description="Check that consecutive solves don't leak memory.")
+    parser.add_argument("--solves", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--cashiers", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-rss-growth", type=float, default=20.0,
+        help="Maximum growth of the RSS (in MB) allowed after the warm up.",
+    )
+    args = parser.parse_args()
+
+    scheduler = build_instance(args.clients, args.cashiers, args.seed)
+    # Warm up. The first solves allocate the memory used by OR Tools
+    warm_up = max(1, args.solves // 10)
+    for _ in range(warm_up):
+        scheduler.solve()
+    gc.collect()
+    base_rss = current_rss()
+    base_size = model_size(scheduler)
+
+    sizes = set()
+    for i in range(args.solves - warm_up):
+        scheduler.solve()
+        sizes.add(model_size(scheduler))
+        if (i + 1) % 100 == 0:
+            print(f"Solve {warm_up + i + 1}: RSS={current_rss() / 2**20:.1f} MB")
+    gc.collect()
+    rss_growth = (current_rss() - base_rss) / 2**20
+
+    print(f"Model size: {base_size} (sizes seen: {sorted(sizes)})")
+    print(f"RSS growth after warm up: {rss_growth:.1f} MB")
+    if sizes != {base_size}:
+        print("FAIL: The model keeps growing between solves")
+        return 1
+    if rss_growth > args.max_rss_growth:
+        print("FAIL: The memory of the process keeps growing between solves")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
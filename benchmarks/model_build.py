@@ -0,0 +1,43 @@
+"""
+Benchmark of the model construction.
+
+It measures how long it takes to build the CP-SAT model (variables,
+constraints and objectives) for instances of increasing size.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+# Local imports
+from supermarket_implementation import CashierScheduling
+from benchmarks.instances import generate_instance
+
+
+def main() -> None:
+    """Run the model construction benchmark"""
+    parser = ArgumentParser(description="Measure the time to build the model.")
+    parser.add_argument(
+        "--clients", type=int, nargs="+", default=[1_000, 5_000, 10_000, 20_000])
+    parser.add_argument("--cashiers", type=int, default=20)
+    parser.add_argument(
+        "--max-candidates", type=int, default=None,
+        help="Limit each client to this number of cashiers.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'cashiers':>8} {'pairs':>8} {'variables':>10}" +
+          f" {'constraints':>12} {'build (s)':>10}")
+    for n_clients in args.clients:
+        cashiers, clients = generate_instance(n_clients, args.cashiers, args.seed)
+        scheduler = CashierScheduling(max_candidates=args.max_candidates)
+        scheduler.set_cashiers(cashiers)
+        scheduler.set_clients(clients)
+        start = perf_counter()
+        model, solution = scheduler.build_model()
+        elapsed = perf_counter() - start
+        proto = model.Proto()
+        print(f"{n_clients:>8} {args.cashiers:>8} {len(solution):>8}" +
+              f" {len(proto.variables):>10} {len(proto.constraints):>12} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Scaling benchmark of the phases of a solve.
+
+For each combination of clients and cashiers of the grid, it times separately
+the construction of the model (`ignite_variables`, `ignite_constraints` and
+`ignite_objectives`), the search (`CpSolver.Solve`), the extraction of the
+solution (`results`) and the KPIs and the data of the charts (both with the
+functions in `kpis` and `extra_data`, and with the `SolutionTable`).
+
+Each combination runs in a new process, so the peak memory is only its own. The
+results are written as JSON and can be compared against a saved baseline: the
+script exits with an error code if any phase got slower (or used more memory)
+than the baseline allows.
+
+    python -m benchmarks.scaling --output baseline.json
+    python -m benchmarks.scaling --baseline baseline.json
+"""
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+# OR Tools import
+from ortools.sat.python import cp_model
+# Local imports
+from supermarket_implementation import CashierScheduling
+from supermarket_implementation.models import SolverParameters
+from supermarket_implementation.utils import problem as problem_utils
+from supermarket_implementation.utils import kpis as KPI
+from supermarket_implementation.utils import extra_data
+from benchmarks.instances import generate_instance
+
+# Phases timed in each run, in the order they happen
+PHASES = (
+    "ignite_variables", "ignite_constraints", "ignite_objectives", "solve",
+    "results", "kpis", "extra_data", "table"
+)
+
+
+@contextmanager
+def timed(owner: Any, name: str, timings: dict[str, float], phase: str) -> Iterator[None]:
+    """Add the time spent in `owner.name` to the phase, while the body runs"""
+    original = getattr(owner, name)
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timings[phase] = timings.get(phase, 0.0) + perf_counter() - start
+
+    setattr(owner, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(owner, name, original)
+
+
+def measure(timings: dict[str, float], phase: str, fn: Callable[[], Any]) -> Any:
+    """Call the function, adding its time to the phase"""
+    start = perf_counter()
+    result = fn()
+    timings[phase] = timings.get(phase, 0.0) + perf_counter() - start
+    return result
+
+
+def run_case(  # pylint: disable=R0913
+    n_clients: int,
+    n_cashiers: int,
+    seed: int,
+    time_limit: float,
+    num_workers: int,
+    max_candidates: Optional[int]
+) -> dict[str, Any]:
+    """Solve one instance of the grid, timing each phase. It's executed in its own process"""
+    cashiers, clients = generate_instance(n_clients, n_cashiers, seed)
+    scheduler = CashierScheduling(
+        max_candidates=max_candidates,
+        parameters=SolverParameters(max_time_in_seconds=time_limit, num_workers=num_workers)
+    )
+    scheduler.set_cashiers(cashiers)
+    scheduler.set_clients(clients)
+    timings: dict[str, float] = {}
+    with timed(problem_utils, "ignite_variables", timings, "ignite_variables"), \
+            timed(problem_utils, "ignite_constraints", timings, "ignite_constraints"), \
+            timed(problem_utils, "ignite_objectives", timings, "ignite_objectives"), \
+            timed(cp_model.CpSolver, "Solve", timings, "solve"):
+        scheduler.solve()
+    results = measure(timings, "results", scheduler.results)
+    measure(timings, "kpis", lambda: [
+        KPI.calculate_service_time_kpi(results),
+        KPI.calculate_waiting_time_kpi(results),
+        KPI.calculate_cashier_free_time_kpi(results),
+        KPI.calculate_service_level_kpi(results),
+    ])
+    measure(timings, "extra_data", lambda: [
+        extra_data.get_clients_per_product(results),
+        extra_data.get_scatter_data(results),
+        extra_data.get_shift_efficiency(results),
+    ])
+
+    def with_table() -> list:
+        table = scheduler.table()
+        return [
+            table.service_time_kpi(), table.waiting_time_kpi(),
+            table.cashier_free_time_kpi(), table.service_level_kpi(),
+            table.clients_per_product(), table.scatter_data(), table.shift_efficiency(),
+        ]
+    measure(timings, "table", with_table)
+
+    proto = scheduler._model.Proto()  # pylint: disable=W0212
+    # * NOTE: On Linux, `ru_maxrss` is in kilobytes
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_memory //= 1024
+    return {
+        "clients": n_clients,
+        "cashiers": n_cashiers,
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "status": scheduler.stats().status,
+        "phases": {phase: round(timings.get(phase, 0.0), 4) for phase in PHASES},
+        "peak_memory_mb": round(peak_memory / 1024, 1),
+    }
+
+
+def compare(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    tolerance: float,
+    min_seconds: float
+) -> list[str]:
+    """Get the phases (and peak memory) that regressed against the baseline.
+
+    A phase regresses if it takes more than `tolerance` times longer than in the
+    baseline, and the difference is above `min_seconds` (to ignore the noise).
+    """
+    base = {(case["clients"], case["cashiers"]): case for case in baseline}
+    regressions = []
+    for case in results:
+        expected = base.get((case["clients"], case["cashiers"]))
+        if expected is None:
+            continue
+        label = f"{case['clients']} clients, {case['cashiers']} cashiers"
+        for phase, elapsed in case["phases"].items():
+            before = expected["phases"].get(phase)
+            if before is not None and elapsed > before * (1 + tolerance) and \
+                    elapsed - before > min_seconds:
+                regressions.append(f"{label}: {phase} {before:.3f}s -> {elapsed:.3f}s")
+        memory, before = case["peak_memory_mb"], expected["peak_memory_mb"]
+        if memory > before * (1 + tolerance):
+            regressions.append(f"{label}: peak memory {before} MB -> {memory} MB")
+    return regressions
+
+
+def main() -> int:
+    """Run the scaling benchmark"""
+    parser = ArgumentParser(description="Time each phase of a solve over a grid of sizes.")
+    parser.add_argument(
+        "--clients", type=int, nargs="+", default=[100, 1_000, 10_000, 50_000])
+    parser.add_argument("--cashiers", type=int, nargs="+", default=[2, 10, 100])
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--num-workers", type=int, default=0)
+    parser.add_argument(
+        "--max-candidates", type=int, default=10,
+        help="Limit each client to this number of cashiers (0 to use all of them).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", default=None, help="Compare against this JSON file.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Slowdown (or memory growth) allowed against the baseline, as a fraction.",
+    )
+    parser.add_argument(
+        "--min-seconds", type=float, default=0.05,
+        help="Ignore the slowdowns below this number of seconds.",
+    )
+    args = parser.parse_args()
+
+    # * NOTE: The processes are spawned, so they don't inherit the memory of this one
+    context = multiprocessing.get_context("spawn")
+    results = []
+    print(f"{'clients':>8} {'cashiers':>8} {'status':>8} {'memory':>8} " +
+          " ".join(PHASES))
+    for n_clients in args.clients:
+        for n_cashiers in args.cashiers:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                case = pool.submit(
+                    run_case, n_clients, n_cashiers, args.seed, args.time_limit,
+                    args.num_workers, args.max_candidates or None
+                ).result()
+            results.append(case)
+            print(f"{n_clients:>8} {n_cashiers:>8} {case['status']:>8}" +
+                  f" {case['peak_memory_mb']:>8} " +
+                  " ".join(f"{case['phases'][phase]:>{len(phase)}.3f}" for phase in PHASES))
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cases": results,
+            }, output, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as baseline:
+            regressions = compare(
+                results, json.load(baseline)["cases"], args.tolerance, args.min_seconds)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print("OK: No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
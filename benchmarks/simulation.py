@@ -0,0 +1,43 @@
+"""
+Benchmark of the Monte Carlo simulation.
+
+It simulates a staffing plan over many random days and reports the time and
+the distribution of the KPIs.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+# Local imports
+from supermarket_implementation.utils.clients import shift_rates
+from supermarket_implementation.utils.simulation import simulate_plan
+from benchmarks.instances import generate_instance
+
+
+def main() -> None:
+    """Run the simulation benchmark"""
+    parser = ArgumentParser(description="Simulate a staffing plan over many random days.")
+    parser.add_argument("--days", type=int, default=10_000)
+    parser.add_argument("--cashiers", type=int, default=8)
+    parser.add_argument("--morning-clients", type=float, default=150)
+    parser.add_argument("--afternoon-clients", type=float, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cashiers, _ = generate_instance(0, args.cashiers, args.seed)
+    start = perf_counter()
+    result = simulate_plan(
+        cashiers, shift_rates(args.morning_clients, args.afternoon_clients),
+        args.days, args.seed, max_workers=args.workers
+    )
+    print(f"Simulated {result.days} days in {perf_counter() - start:.2f} seconds")
+    print(f"{'kpi':>14} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, kpi in (
+        ("waiting time", result.waiting_time),
+        ("service time", result.service_time),
+        ("service level", result.service_level)
+    ):
+        print(f"{name:>14} {kpi.mean:>8} {kpi.p50:>8} {kpi.p95:>8} {kpi.p99:>8}")
+
+
+if __name__ == "__main__":
+    main()
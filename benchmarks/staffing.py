@@ -0,0 +1,63 @@
+"""
+Benchmark of the staffing sweep.
+
+It sweeps a range of cashiers per shift for the same clients, once per shift
+(as the sweep does) and once per combination of the shifts, and reports the time,
+the number of rosters pruned and the front.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+# Local imports
+from supermarket_implementation.models import SolverParameters
+from supermarket_implementation.staffing import (
+    shift_cashiers, sweep_rosters, sweep_shift_counts
+)
+from benchmarks.instances import generate_instance
+
+
+def main() -> None:
+    """Run the staffing sweep benchmark"""
+    parser = ArgumentParser(description="Measure the staffing sweep.")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--max-cashiers", type=int, default=12)
+    parser.add_argument("--mode", choices=["heuristic", "cp_sat", "flow"], default="heuristic")
+    parser.add_argument("--time-limit", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--target", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _, clients = generate_instance(args.clients, 1, args.seed)
+    counts = range(1, args.max_cashiers + 1)
+    parameters = SolverParameters(max_time_in_seconds=args.time_limit, num_workers=1)
+    start = perf_counter()
+    sweep = sweep_shift_counts(
+        clients, counts, counts, mode=args.mode, parameters=parameters,
+        max_workers=args.workers
+    )
+    print(
+        f"Per shift: {len(sweep.evaluations)} rosters ({sweep.pruned} pruned)" +
+        f" in {perf_counter() - start:.2f} seconds"
+    )
+    start = perf_counter()
+    rosters = [
+        shift_cashiers(morning, True) + shift_cashiers(afternoon, False)
+        for morning in counts for afternoon in counts
+    ]
+    combined = sweep_rosters(
+        clients, rosters, args.mode, parameters, max_workers=args.workers)
+    print(
+        f"Per roster: {len(combined.evaluations)} rosters ({combined.pruned} pruned)" +
+        f" in {perf_counter() - start:.2f} seconds"
+    )
+
+    print(f"{'cost':>5} {'service level':>14} {'waiting time':>13}")
+    for evaluation in sweep.front:
+        print(f"{evaluation.cost:>5} {evaluation.service_level:>14} {evaluation.waiting_time:>13}")
+    cheapest = sweep.cheapest(args.target)
+    if cheapest is not None:
+        print(f"Cheapest roster with a service level of {args.target}: {cheapest.cost} shifts")
+
+
+if __name__ == "__main__":
+    main()
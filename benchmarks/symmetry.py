@@ -0,0 +1,59 @@
+"""
+Benchmark of the symmetry breaking.
+
+It solves rosters where several cashiers share the same effectiveness and shifts,
+with and without breaking the symmetry between them, and compares the objective
+and the time of the search.
+"""
+from argparse import ArgumentParser
+from dataclasses import replace
+# Local imports
+from supermarket_implementation import CashierScheduling
+from supermarket_implementation.models import Cashier, SolverParameters
+from benchmarks.instances import generate_instance
+
+# Effectiveness of each tier of cashiers
+TIERS = (0.9, 1.0, 1.1)
+
+
+def tiered_cashiers(cashiers: list[Cashier]) -> list[Cashier]:
+    """Round the effectiveness of the cashiers to a few tiers, so several
+    of them are interchangeable.
+    """
+    return [
+        replace(cashier, effectiveness_average=TIERS[index % len(TIERS)])
+        for index, cashier in enumerate(cashiers)
+    ]
+
+
+def main() -> None:
+    """Run the symmetry breaking benchmark"""
+    parser = ArgumentParser(description="Compare the solver with and without symmetry breaking.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--cashiers", type=int, default=9)
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    parameters = SolverParameters(
+        max_time_in_seconds=args.time_limit, num_workers=args.workers)
+    print(f"{'clients':>8} {'symmetry':>9} {'status':>9} {'objective':>10}" +
+          f" {'bound':>10} {'time (s)':>9}")
+    for n_clients in args.clients:
+        cashiers, clients = generate_instance(n_clients, args.cashiers, args.seed)
+        cashiers = tiered_cashiers(cashiers)
+        for break_symmetries in (False, True):
+            scheduler = CashierScheduling(
+                break_symmetries=break_symmetries, parameters=parameters)
+            scheduler.set_cashiers(cashiers)
+            scheduler.set_clients(clients)
+            scheduler.solve()
+            stats = scheduler.stats()
+            print(f"{n_clients:>8} {'broken' if break_symmetries else 'kept':>9}" +
+                  f" {stats.status:>9} {stats.objective_value:>10.0f}" +
+                  f" {stats.best_bound:>10.0f} {stats.wall_time:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
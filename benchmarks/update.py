@@ -0,0 +1,52 @@
+"""
+Benchmark of the incremental updates.
+
+It solves days of growing size, adds a few clients in the middle of the day and
+compares the time of the update against solving the whole day again.
+"""
+from argparse import ArgumentParser
+# Local imports
+from supermarket_implementation import CashierScheduling
+from supermarket_implementation.models import Client, SolverParameters
+from benchmarks.instances import generate_instance
+
+
+def main() -> None:
+    """Run the incremental update benchmark"""
+    parser = ArgumentParser(description="Compare the incremental updates with a full solve.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[200, 400, 800])
+    parser.add_argument("--clients-per-cashier", type=int, default=75)
+    parser.add_argument("--added", type=int, default=3)
+    parser.add_argument("--now", type=int, default=300)
+    parser.add_argument("--time-limit", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    parameters = SolverParameters(
+        max_time_in_seconds=args.time_limit, num_workers=args.workers)
+    print(f"{'clients':>8} {'solve':>8} {'objective':>10} {'time (s)':>9}")
+    for n_clients in args.clients:
+        cashiers, clients = generate_instance(
+            n_clients, max(1, n_clients // args.clients_per_cashier), args.seed)
+        added = [
+            Client(id=n_clients + index, arrival_time=args.now + index, products=20)
+            for index in range(args.added)
+        ]
+        scheduler = CashierScheduling(parameters=parameters)
+        scheduler.set_cashiers(cashiers)
+        scheduler.set_clients(clients)
+        scheduler.solve()
+        scheduler.update(added=added, now=args.now)
+        update_stats = scheduler.stats()
+        # Solve the whole day again, with the new clients
+        scheduler.set_clients(clients + added)
+        scheduler.solve()
+        full_stats = scheduler.stats()
+        for name, stats in (("update", update_stats), ("full", full_stats)):
+            print(f"{n_clients:>8} {name:>8} {stats.objective_value:>10.0f}" +
+                  f" {stats.wall_time:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
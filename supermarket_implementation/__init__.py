@@ -1,8 +1,12 @@
 """
 SuperMarket optimization problem implementation.
 """
-from supermarket_implementation.scheduling import CashierScheduling
+from supermarket_implementation.scheduling import CashierScheduling, Formulation, SolverMode
+from supermarket_implementation.dispatch import Dispatcher
 
 __all__ = [
-    "CashierScheduling"
+    "CashierScheduling",
+    "Dispatcher",
+    "Formulation",
+    "SolverMode"
 ]
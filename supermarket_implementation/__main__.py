@@ -19,9 +19,34 @@ if __name__ == "__main__":
         type=int, default=3000,
         help="The port to run the server on.",
     )
+    parser.add_argument(
+        "--workers", "-W",
+        type=int, default=None,
+        help="The number of processes used to run the solver.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int, default=None,
+        help="The number of results kept in the memory cache.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=str, default=None,
+        help="Path of a SQLite database to keep the cached results on disk.",
+    )
+    parser.add_argument(
+        "--cache-disk-size",
+        type=int, default=None,
+        help="The number of results kept in the disk cache (0 to keep all of them).",
+    )
     # Parse the arguments
     args = parser.parse_args()
 
-    app = App()
+    app = App(
+        max_workers=args.workers,
+        cache_size=args.cache_size,
+        cache_path=args.cache_path,
+        cache_disk_size=args.cache_disk_size
+    )
     # Run the server!
     run_server(app.client, args.host, args.port)
@@ -1,26 +1,59 @@
 """
 Provide a Base API to use on the server handler
 """
+# pylint: disable=C0302
 import os
-from typing_extensions import TypedDict
-from fastapi import FastAPI, HTTPException
+import queue
+import asyncio
+from time import perf_counter
+from dataclasses import asdict, replace
+from typing import Any, AsyncIterator, Literal, Optional
+from typing_extensions import Annotated, TypedDict
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 # Import also the CORSMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PrivateAttr, SerializeAsAny, model_validator
 # Local imports
-from supermarket_implementation.scheduling import CashierScheduling
-from supermarket_implementation.models import Cashier, Client
-from supermarket_implementation.utils import kpis as KPI
+from supermarket_implementation.scheduling import (
+    CashierScheduling, Formulation, SolverMode, SolutionHandler
+)
+from supermarket_implementation.jobs import (
+    Job, JobManager, JobStatus, STOP_POLL_INTERVAL, watch_stop_event
+)
+from supermarket_implementation.cache import ResultCache, content_hash
+from supermarket_implementation.metrics import (
+    METRICS_MEDIA_TYPE, Counter, ServerMetrics, peak_memory, server_timing
+)
+from supermarket_implementation.dispatch import Dispatcher
+from supermarket_implementation.batch import batch_parameters
+from supermarket_implementation.staffing import (
+    RosterEvaluation, sweep_rosters, sweep_shift_counts
+)
+from supermarket_implementation.encoding import (
+    JsonResponseClass, dumps_json, encode_response
+)
+from supermarket_implementation.models import (
+    Cashier, Client, ClientColumns, DispatchKPIs, SolutionVar, SolveProfile, SolverParameters,
+    SolverStats
+)
+from supermarket_implementation.utils import clients as client_utils
+from supermarket_implementation.utils.problem import CLOSING_TIME
+from supermarket_implementation.utils.table import SolutionTable
 from supermarket_implementation.utils.extra_data import (
     # CashiersPerformance, calculate_cashier_performance,
-    ClientPerProduct, get_clients_per_product,
-    ScatterData, get_scatter_data,
-    EfficiencyData, get_shift_efficiency
+    ClientPerProduct, ScatterData, EfficiencyData
 )
 from supermarket_implementation.__info__ import (
     APP_NAME, DESCRIPTION, contact, __version__, __license__
 )
 
+# Minimum time (in seconds) between two solutions sent by the stream
+STREAM_INTERVAL = 0.25
+# Maximum expected clients of each period of the arrival rates
+MAX_ARRIVAL_RATE = 10_000
+
 # Define some types
 
 
@@ -31,18 +64,108 @@ class CashierDict(TypedDict):
     available_in_the_afternoon: bool
     effectiveness_average: float
 
+
+class ClientColumnsDict(TypedDict):
+    """Clients as parallel arrays, one position per client"""
+    ids: list[int]
+    arrivalTimes: list[int]
+    products: list[int]
+
+
+class GanttColumnsDict(TypedDict):
+    """Gantt of the solution as parallel arrays, one position per client"""
+    clientIds: list[int]
+    processors: list[str]
+    starts: list[int]
+    ends: list[int]
+    durations: list[int]
+    products: list[int]
+
+
+class SolverStatsDict(TypedDict):
+    """Summary of the search of the solver"""
+    status: str
+    objectiveValue: float
+    bestBound: float
+    gap: float
+    wallTime: float
+
+
+class DispatchKPIsDict(TypedDict):
+    """KPIs of the clients dispatched so far"""
+    serviceLevel: float
+    avgQueueWaitingTime: float
+    avgProcessingTime: float
+    avgFreeTime: float
+    dispatched: int
+    queued: int
+
 # Define the ClientRequest class
 
 class ClientRequest(BaseModel):
-    """Client Request for the POST method"""
-    morning_variance: float
-    afternoon_variance: float
+    """Client Request for the POST method.
+
+    The clients arrive uniformly during each shift, with the given variances.
+    If the `arrival_rates` are given, they're used instead: each one is the expected
+    number of clients during `rate_period` minutes (for example, 60 for a rate per hour).
+    The curve can't last longer than the day (`CLOSING_TIME` minutes).
+    Using a `seed` generates always the same clients.
+    """
+    morning_variance: float = Field(default=0, ge=0)
+    afternoon_variance: float = Field(default=0, ge=0)
+    arrival_rates: Optional[list[Annotated[float, Field(ge=0, le=MAX_ARRIVAL_RATE)]]] = Field(
+        default=None, max_length=CLOSING_TIME)
+    rate_period: int = Field(default=1, gt=0, le=CLOSING_TIME)
+    seed: Optional[int] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def check_rates_length(self) -> "ClientRequest":
+        """Check that the arrivals of the curve end before the supermarket closes"""
+        if self.arrival_rates is not None and \
+                len(self.arrival_rates) * self.rate_period > CLOSING_TIME:
+            raise ValueError(
+                f"The arrival rates should last at most {CLOSING_TIME} minutes")
+        return self
+
+
+class ParametersRequest(BaseModel):
+    """Parameters of the solver. If they're not given, the server defaults are used"""
+    maxTimeInSeconds: Optional[float] = Field(default=None, gt=0)
+    numWorkers: Optional[int] = Field(default=None, ge=0)
+    relativeGapLimit: Optional[float] = Field(default=None, ge=0)
+    logSearchProgress: bool = False
 
 
-class SolverRequest(BaseModel):
-    """Solver Request for the POST method"""
+class SolverRequest(ParametersRequest):
+    """Solver Request for the POST method.
+
+    For the big days, the clients can be sent as columns in `clientColumns` instead
+    of `clients`, and `ganttFormat="columns"` returns the gantt as columns too.
+    """
     cashiers: list[CashierDict]
-    clients: list[dict[str, int]]
+    clients: list[dict[str, int]] = []
+    clientColumns: Optional[ClientColumnsDict] = None
+    mode: SolverMode = "cp_sat"
+    formulation: Formulation = "intervals"
+    ganttFormat: Literal["rows", "columns"] = "rows"
+
+    @model_validator(mode="after")
+    def check_client_columns(self) -> "SolverRequest":
+        """Check that the clients come in only one format, and that the columns match"""
+        if self.clientColumns is None:
+            return self
+        if self.clients:
+            raise ValueError("Send the clients either in `clients` or in `clientColumns`")
+        if len({len(column) for column in self.clientColumns.values()}) > 1:
+            raise ValueError("The client columns should have the same length")
+        return self
+
+    @property
+    def n_clients(self) -> int:
+        """Number of clients of the request"""
+        if self.clientColumns is not None:
+            return len(self.clientColumns["ids"])
+        return len(self.clients)
 
 
 class SolverResult(BaseModel):
@@ -56,40 +179,273 @@ class SolverResult(BaseModel):
     avgQueueWaitingTime: float
     avgProcessingTime: float
     avgFreeTime: float
+    solverStats: SolverStatsDict
+    # Phases of the solve, measured in the worker. It's not sent in the response
+    _profile: Optional[SolveProfile] = PrivateAttr(default=None)
+
+    @property
+    def profile(self) -> Optional[SolveProfile]:
+        """Time of each phase of the solve that found this result"""
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile: Optional[SolveProfile]) -> None:
+        self._profile = profile
+
+
+class BatchInstance(SolverRequest):
+    """Instance of a batch request. Its `instanceId` (for example, the store
+    and the day) is sent back with its result.
+    """
+    instanceId: Optional[str] = None
 
-class App():  # pylint: disable=R0903
+
+class BatchRequest(BaseModel):
+    """Batch Request for the POST method. The instances are independent"""
+    instances: list[BatchInstance] = Field(min_length=1)
+
+
+class BatchItem(BaseModel):
+    """Result of one instance of the batch, sent as a line of NDJSON"""
+    index: int
+    instanceId: Optional[str] = None
+    status: Literal["completed", "failed"]
+    result: Optional[dict] = None
+    detail: Optional[str] = None
+
+
+class ColumnarSolverResult(SolverResult):
+    """Solver Result with the gantt as columns. The `ganttSolution` is empty"""
+    ganttColumns: GanttColumnsDict
+
+
+class CountRange(BaseModel):
+    """Range of the number of cashiers of a shift, both ends included"""
+    min: int = Field(ge=0)
+    max: int = Field(ge=0)
+
+    @model_validator(mode="after")
+    def check_order(self) -> "CountRange":
+        """Check that the range isn't empty"""
+        if self.min > self.max:
+            raise ValueError("The minimum should not be greater than the maximum")
+        return self
+
+
+class StaffingSweepRequest(ParametersRequest):
+    """Staffing Sweep Request for the POST method.
+
+    The rosters are either given in `rosters`, or built from a range of cashiers
+    per shift (`morningCashiers` and `afternoonCashiers`), each one working only in
+    its shift with the given `effectiveness`. They're solved with the `mode` (the
+    heuristic by default, or CP-SAT limited by `maxTimeInSeconds` per roster).
+    """
+    clients: list[dict[str, int]]
+    rosters: Optional[list[list[CashierDict]]] = None
+    morningCashiers: Optional[CountRange] = None
+    afternoonCashiers: Optional[CountRange] = None
+    effectiveness: float = Field(default=1.0, gt=0)
+    mode: SolverMode = "heuristic"
+    serviceLevelTarget: Optional[float] = Field(default=None, ge=0, le=1)
+
+    @model_validator(mode="after")
+    def check_rosters(self) -> "StaffingSweepRequest":
+        """Check that the rosters come in only one format"""
+        ranges = (self.morningCashiers, self.afternoonCashiers)
+        if self.rosters is not None:
+            if any(count_range is not None for count_range in ranges):
+                raise ValueError(
+                    "Send the rosters either in `rosters` or as ranges of cashiers per shift")
+            if not self.rosters:
+                raise ValueError("Send at least one roster")
+        elif any(count_range is None for count_range in ranges):
+            raise ValueError(
+                "Send the `rosters` or both `morningCashiers` and `afternoonCashiers`")
+        return self
+
+
+class RosterResult(BaseModel):
+    """KPIs of a roster of the sweep. The `cost` is the number of shifts worked"""
+    cashiers: list[CashierDict]
+    morningCashiers: int
+    afternoonCashiers: int
+    cost: int
+    serviceLevel: float
+    avgQueueWaitingTime: float
+    detail: Optional[str] = None
+
+
+class StaffingSweepResult(BaseModel):
+    """Staffing Sweep Result to return from the POST method.
+
+    - rosters: Every roster evaluated, sorted by cost
+    - front: Rosters of the Pareto front of cost, service level and waiting time
+    - best: Cheapest roster of the front that meets the `serviceLevelTarget`
+    - pruned: Number of rosters skipped, since a cheaper one already had no waiting
+    """
+    rosters: list[RosterResult]
+    front: list[RosterResult]
+    best: Optional[RosterResult] = None
+    pruned: int
+
+
+class DispatchRequest(BaseModel):
+    """Dispatch Request to start the online dispatch.
+
+    If `busyUntil` is given, each cashier (by its `workerId`) is busy until that minute.
+    """
+    cashiers: list[CashierDict]
+    busyUntil: dict[str, int] = {}
+
+
+class ArrivalRequest(BaseModel):
+    """Client that arrives to the supermarket"""
+    id: int
+    arrivalTime: int = Field(ge=0)
+    products: int = Field(ge=0)
+
+
+class CompletionRequest(BaseModel):
+    """Real end of a client that has left its cashier"""
+    clientId: int
+    endTime: int = Field(ge=0)
+
+
+class DispatchResponse(BaseModel):
+    """Assignment of a client (in the same format of the gantt rows) and the KPIs"""
+    assignment: Optional[dict] = None
+    kpis: DispatchKPIsDict
+
+
+class JobResponse(BaseModel):
+    """Job state to return from the jobs endpoints"""
+    jobId: str
+    status: JobStatus
+    result: Optional[SerializeAsAny[SolverResult]] = None
+    detail: Optional[str] = None
+
+
+class App():  # pylint: disable=R0902,R0903
     """Application to handle the backend server for this problem
 
     - client (property): To return the client and be used in the `run_server`
     - allow_cors_middleware: To config a pre-determinate middleware
     """
     _app: FastAPI
-    _solver: CashierScheduling
+    _jobs: JobManager
+    _cache: ResultCache
+    _default_parameters: SolverParameters
+    _parameter_caps: SolverParameters
+    _dispatcher: Optional[Dispatcher]
+    _metrics: ServerMetrics
+    _timing_headers: bool
     # Define the slots
-    __slots__ = ["_app", "_solver"]
+    __slots__ = [
+        "_app", "_jobs", "_cache", "_default_parameters", "_parameter_caps", "_dispatcher",
+        "_metrics", "_timing_headers"
+    ]
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        max_workers: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        cache_path: Optional[str] = None,
+        cache_disk_size: Optional[int] = None,
+        default_parameters: Optional[SolverParameters] = None,
+        parameter_caps: Optional[SolverParameters] = None,
+        timing_headers: Optional[bool] = None
+    ) -> None:
+        """Simply initialize the application.
+
+        The `max_workers` define the number of processes used to run
+        the solver. By default, it uses the `SOLVER_WORKERS` environment
+        variable or the number of CPUs of the machine.
+
+        The results of the solver are cached. The `cache_size` is the number of
+        results kept in memory (`CACHE_SIZE`, 128 by default) and the `cache_path`
+        is an optional SQLite database to also keep them on disk (`CACHE_PATH`).
+        The database keeps the last `cache_disk_size` results (`CACHE_DISK_SIZE`,
+        10000 by default, or 0 to keep every result).
 
-    def __init__(self) -> None:
-        """Simply initialize the application"""
+        The `default_parameters` are used by the solver when the request doesn't
+        give them (`SOLVER_TIME_LIMIT` and `SOLVER_NUM_WORKERS`), and the
+        `parameter_caps` limit the time and workers that a request can ask for
+        (`SOLVER_MAX_TIME_LIMIT` and `SOLVER_MAX_NUM_WORKERS`).
+
+        The metrics of the server are exposed on `/metrics`. With `timing_headers`
+        (`TIMING_HEADERS=1`), the time of each phase of a solve is also sent in
+        the `Server-Timing` header of its response.
+        """
         # Initialize the FastAPI object
         self._app = FastAPI(
             title=APP_NAME,
             description=DESCRIPTION,
             version=__version__,
             contact=contact,
-            license_info=__license__
+            license_info=__license__,
+            default_response_class=JsonResponseClass
+        )
+        # Initialize the pool of processes that run the solver
+        self._jobs = JobManager(max_workers)
+        # Initialize the parameters of the solver
+        self._default_parameters = default_parameters or SolverParameters(
+            max_time_in_seconds=float(os.environ.get("SOLVER_TIME_LIMIT", 15)),
+            num_workers=int(os.environ.get("SOLVER_NUM_WORKERS", 0)),
         )
-        # Initialize the scheduling problem
-        self._solver = CashierScheduling()
+        self._parameter_caps = parameter_caps or SolverParameters(
+            max_time_in_seconds=float(os.environ.get("SOLVER_MAX_TIME_LIMIT", 60)),
+            num_workers=int(os.environ.get("SOLVER_MAX_NUM_WORKERS", os.cpu_count() or 1)),
+        )
+        # Initialize the cache of results
+        self._cache = ResultCache(
+            cache_size if cache_size is not None else int(os.environ.get("CACHE_SIZE", 128)),
+            cache_path if cache_path is not None else os.environ.get("CACHE_PATH"),
+            cache_disk_size if cache_disk_size is not None else
+            int(os.environ.get("CACHE_DISK_SIZE", 10_000))
+        )
+        # The online dispatch is started with `POST /dispatch`
+        self._dispatcher = None
+        # Initialize the metrics of the server
+        self._metrics = ServerMetrics()
+        self._metrics.add(Counter(
+            "supermarket_cache_hits_total", "Hits of the results cache, by tier",
+            lambda: {"memory": self._cache.hits, "disk": self._cache.disk_hits},
+            label="tier"
+        ))
+        self._metrics.add(Counter(
+            "supermarket_cache_misses_total", "Misses of the results cache",
+            lambda: self._cache.misses
+        ))
+        self._timing_headers = timing_headers if timing_headers is not None else \
+            os.environ.get("TIMING_HEADERS", "0") == "1"
         # **************************** #
         # *        Endpoints         * #
         # **************************** #
         self._app.get("/")(self.__default)
         self._app.post("/generate_clients")(self.generate_clients)
-        self._app.post("/solve_problem")(self.execute_solver)
+        self._app.post("/solve_problem", response_model=SolverResult)(self.execute_solver)
+        self._app.post("/solve_problem/stream")(self.stream_solver)
+        self._app.post("/solve_batch")(self.solve_batch)
+        self._app.post("/staffing_sweep", response_model=StaffingSweepResult)(
+            self.staffing_sweep)
+        self._app.post("/jobs")(self.submit_job)
+        self._app.get("/jobs/{job_id}")(self.get_job)
+        self._app.delete("/jobs/{job_id}")(self.cancel_job)
+        self._app.get("/cache")(self.cache_stats)
+        self._app.delete("/cache")(self.clear_cache)
+        self._app.get("/metrics", response_class=PlainTextResponse)(self.metrics)
+        self._app.post("/dispatch")(self.start_dispatch)
+        self._app.get("/dispatch")(self.get_dispatch)
+        self._app.post("/dispatch/arrive")(self.dispatch_arrival)
+        self._app.post("/dispatch/complete")(self.dispatch_completion)
         self._app.get("/{unknown_pages}")(self.__404)
 
         # * Add the middleware
         self.allow_cors_middleware()
+        self._app.middleware("http")(self.__track_request)
+        # * Stop the pool of processes with the server
+        self._app.add_event_handler("shutdown", self._jobs.shutdown)
+        self._app.add_event_handler("shutdown", self._cache.close)
 
     def allow_cors_middleware(self) -> None:
         """Allow the cors middleware config"""
@@ -128,70 +484,235 @@ class App():  # pylint: disable=R0903
     #   OTHER ENDPOINTS    #
     # -------------------- #
 
-    async def execute_solver(self, request: SolverRequest) -> SolverResult:
-        """Execute the solver"""
+    async def execute_solver(
+        self,
+        request: SolverRequest,
+        accept: Optional[str] = Header(default=None)
+    ) -> Response:
+        """Execute the solver.
+
+        The result is sent as JSON by default. Using the `Accept` header, it could
+        be sent as MessagePack (`application/msgpack`) or as an Arrow IPC stream
+        (`application/vnd.apache.arrow.stream`), if the server supports them.
+        """
         print(
-            f"Executing the solver with {len(request.clients)}" +
+            f"Executing the solver with {request.n_clients}" +
             f" clients and {len(request.cashiers)} cashiers"
         )
-        # Instance th solver result
-        solution = []
-        # Obtain the cashiers and clients model
-        cashiers = [
-            Cashier(
-                name=cashier["workerId"],
-                available_in_the_morning=cashier["available_in_the_afternoon"],
-                available_in_the_afternoon=cashier["available_in_the_afternoon"],
-                effectiveness_average=cashier["effectiveness_average"],
-            )
-            for cashier in request.cashiers
-        ]
-        clients = [
-            Client(
-                id=client["id"],
-                arrival_time=client["arrivalTime"],
-                products=client["products"]
-            )
-            for client in request.clients
-        ]
-        # Set the cashiers
-        self._solver.set_cashiers(cashiers)
-        self._solver.set_clients(clients)
-        # Then, solve the problem
-        self._solver.solve()
-        # Get the solver
-        solver = self._solver.solver
-        # Get the results
+        # If we already solved this same request, return it
+        start = perf_counter()
+        parameters = self.__solver_parameters(request)
+        key = content_hash("solve_problem", canonical_solver_request(request, parameters))
+        cached = self._cache.get(key)
+        if cached is not None:
+            print("Returning the cached results...")
+            phases = {"cache": perf_counter() - start}
+            return self.__timed_response(cached, accept, phases)
+        cashiers, clients = parse_solver_request(request)
+        phases = {"parse": perf_counter() - start}
+        # Run the solver in the pool, so the server can keep
+        # answering other requests while we look for a solution
         try:
-            results = self._solver.results()
+            result = await self._jobs.run(
+                solve_schedule, cashiers, clients, request.mode,
+                parameters, request.ganttFormat == "columns", request.formulation
+            )
         except Exception as e:
             print(f"Solver failed with error: {e}")
             raise HTTPException(
                 status_code=500, detail="Solver failed to find a solution") from e
-        # Get the solver result
-        print("Modifyng the results...")
-        solution = [{
-            "id": f"TASK_{var.client.id}_{var.cashier.name}",
-            "processor": var.cashier.name,
-            "task": f"Client {var.client.id}",
-            "start": solver.Value(var.start),
-            "end": solver.Value(var.end),
-            "duration": var.duration,
-            "products": var.client.products
-        } for var in results]
-        # Return the SolverResult
-        print("Sending the results...")
-        return SolverResult(
-            avgProcessingTime=KPI.calculate_service_time_kpi(results),
-            avgQueueWaitingTime=KPI.calculate_waiting_time_kpi(results),
-            avgFreeTime=KPI.calculate_cashier_free_time_kpi(results),
-            serviceLevel=KPI.calculate_service_level_kpi(results),
-            # cashierPerformance=calculate_cashier_performance(results),
-            clientPerProducts=get_clients_per_product(results),
-            arrivalVsStart=get_scatter_data(results),
-            efficiencyData=get_shift_efficiency(results),
-            ganttSolution=solution
+        if result.profile is not None:
+            self._metrics.observe_solve(result.profile)
+            phases.update(result.profile.phases)
+        content = result.model_dump()
+        self._cache.set(key, content)
+        return self.__timed_response(content, accept, phases)
+
+    async def stream_solver(
+        self,
+        request: SolverRequest,
+        http_request: Request
+    ) -> StreamingResponse:
+        """Execute the solver, streaming the improving solutions as Server-Sent Events.
+
+        The stream sends a `job` event with the job ID, a `solution` event for
+        each improving solution (with the same fields as the SolverResult) and
+        a `result` event at the end. The search stops if the client closes the
+        connection or cancels the job.
+        """
+        job = self._jobs.submit(
+            solve_schedule, *parse_solver_request(request), request.mode,
+            self.__solver_parameters(request), request.ganttFormat == "columns",
+            request.formulation,
+            stream=True
         )
+        job.future.add_done_callback(self.__observe_job)
+        print(f"Streaming the solutions of job {job.id}")
+        return StreamingResponse(
+            self.__stream_job(job, http_request), media_type="text/event-stream")
+
+    async def solve_batch(
+        self,
+        request: BatchRequest,
+        http_request: Request
+    ) -> StreamingResponse:
+        """Solve many independent instances (for example, several stores or days).
+
+        The instances are solved in parallel in the pool of processes, and each
+        result is streamed as a line of NDJSON once it's ready, in the order they
+        finish. Each line has the `index` of the instance in the request.
+        """
+        print(f"Solving a batch of {len(request.instances)} instances")
+        return StreamingResponse(
+            self.__stream_batch(request, http_request), media_type="application/x-ndjson")
+
+    async def staffing_sweep(self, request: StaffingSweepRequest) -> StaffingSweepResult:
+        """Evaluate many rosters for the same clients, and get the Pareto front
+        of their cost, service level and waiting time.
+
+        The rosters are solved in parallel in the pool of processes, from the
+        cheapest one. The rosters that cost more than one that already has no
+        waiting are pruned, since they can't be better.
+        """
+        parameters = self.__solver_parameters(request)
+        if request.numWorkers is None:
+            # The cores are split between the rosters solved at the same time
+            parameters = replace(parameters, num_workers=0)
+        key = content_hash("staffing_sweep", {
+            **request.model_dump(exclude=set(ParametersRequest.model_fields)),
+            "parameters": asdict(parameters),
+        })
+        cached = self._cache.get(key)
+        if cached is not None:
+            print("Returning the cached sweep...")
+            return StaffingSweepResult(**cached)
+        clients = parse_clients(request.clients)
+        pool = {"executor": self._jobs.executor, "max_workers": self._jobs.max_workers}
+        try:
+            if request.rosters is not None:
+                print(f"Sweeping {len(request.rosters)} rosters")
+                sweep = await asyncio.to_thread(
+                    sweep_rosters, clients, [parse_cashiers(roster) for roster in request.rosters],
+                    request.mode, parameters, **pool
+                )
+            else:
+                morning, afternoon = request.morningCashiers, request.afternoonCashiers
+                print(
+                    f"Sweeping {morning.min}-{morning.max} morning cashiers" +
+                    f" and {afternoon.min}-{afternoon.max} afternoon cashiers"
+                )
+                sweep = await asyncio.to_thread(
+                    sweep_shift_counts, clients, range(morning.min, morning.max + 1),
+                    range(afternoon.min, afternoon.max + 1), request.effectiveness,
+                    request.mode, parameters, **pool
+                )
+        except Exception as e:
+            print(f"Staffing sweep failed with error: {e}")
+            raise HTTPException(
+                status_code=500, detail="Solver failed to evaluate the rosters") from e
+        best = None
+        if request.serviceLevelTarget is not None:
+            best = sweep.cheapest(request.serviceLevelTarget)
+        result = StaffingSweepResult(
+            rosters=[roster_to_result(evaluation) for evaluation in sweep.evaluations],
+            front=[roster_to_result(evaluation) for evaluation in sweep.front],
+            best=roster_to_result(best) if best is not None else None,
+            pruned=sweep.pruned
+        )
+        self._cache.set(key, result.model_dump())
+        return result
+
+    async def submit_job(self, request: SolverRequest) -> JobResponse:
+        """Submit a solver job. The job can be polled using its ID.
+
+        Once the job finishes, its result is kept for `JOB_TTL` seconds (600 by
+        default). After that, the job is removed and polling it returns a 404.
+        """
+        job = self._jobs.submit(
+            solve_schedule, *parse_solver_request(request), request.mode,
+            self.__solver_parameters(request), request.ganttFormat == "columns",
+            request.formulation
+        )
+        job.future.add_done_callback(self.__observe_job)
+        print(f"Job {job.id} submitted")
+        return JobResponse(jobId=job.id, status=job.status)
+
+    async def get_job(self, job_id: str) -> JobResponse:
+        """Get the status of a job (and the result, if it has finished).
+
+        The finished jobs expire `JOB_TTL` seconds after they finish (see `submit_job`).
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        status = job.status
+        if status == "completed":
+            return JobResponse(jobId=job.id, status=status, result=job.future.result())
+        if status == "failed":
+            print(f"Job {job.id} failed with error: {job.future.exception()}")
+            return JobResponse(
+                jobId=job.id, status=status,
+                detail="Solver failed to find a solution"
+            )
+        return JobResponse(jobId=job.id, status=status)
+
+    async def cancel_job(self, job_id: str) -> JobResponse:
+        """Cancel a job. If the solver is running, the search is stopped"""
+        job = self._jobs.cancel(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JobResponse(jobId=job.id, status=job.status)
+
+    async def cache_stats(self) -> dict[str, int]:
+        """Get the hits and misses of the results cache"""
+        return self._cache.stats()
+
+    async def clear_cache(self) -> dict[str, int]:
+        """Remove every cached result, from memory and from disk"""
+        self._cache.clear()
+        return self._cache.stats()
+
+    async def metrics(self) -> Response:
+        """Get the metrics of the server in the Prometheus text format.
+
+        They include the duration of the requests and of each phase of the solves,
+        the stats of the searches, the size of the models and the memory.
+        """
+        return Response(content=self._metrics.render(), media_type=METRICS_MEDIA_TYPE)
+
+    async def start_dispatch(self, request: DispatchRequest) -> DispatchResponse:
+        """Start the online dispatch with the given cashiers, replacing the last one.
+
+        The dispatch lives in this server process, so it's shared by all its requests.
+        """
+        self._dispatcher = Dispatcher(parse_cashiers(request.cashiers), request.busyUntil)
+        print(f"Dispatch started with {len(request.cashiers)} cashiers")
+        return DispatchResponse(kpis=kpis_to_dict(self._dispatcher.kpis()))
+
+    async def get_dispatch(self) -> DispatchResponse:
+        """Get the KPIs of the clients dispatched so far"""
+        return DispatchResponse(kpis=kpis_to_dict(self.__dispatcher().kpis()))
+
+    async def dispatch_arrival(self, request: ArrivalRequest) -> DispatchResponse:
+        """Assign the arriving client to the eligible cashier that gets free first"""
+        dispatcher = self.__dispatcher()
+        try:
+            var = dispatcher.arrive(Client(
+                id=request.id, arrival_time=request.arrivalTime, products=request.products))
+        except (ValueError, RuntimeError) as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        return DispatchResponse(assignment=var_to_dict(var), kpis=kpis_to_dict(dispatcher.kpis()))
+
+    async def dispatch_completion(self, request: CompletionRequest) -> DispatchResponse:
+        """Report the real end of a client. The rest of the queue of its cashier is moved"""
+        dispatcher = self.__dispatcher()
+        try:
+            var = dispatcher.complete(request.clientId, request.endTime)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=e.args[0]) from e
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        return DispatchResponse(assignment=var_to_dict(var), kpis=kpis_to_dict(dispatcher.kpis()))
 
     async def generate_clients(
         self,
@@ -199,14 +720,429 @@ class App():  # pylint: disable=R0903
     ) -> list[dict]:
         """Generate the clients using the solver with given variances"""
         print("Generating clients for this run...")
-        return [
-            client.to_dict()
-            for client in self._solver.generate_clients(
+        # With a seed, the clients are always the same, so we can store them
+        key = content_hash("generate_clients", request.model_dump())
+        if request.seed is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                print("Returning the cached clients...")
+                return cached
+        if request.arrival_rates is not None:
+            clients = client_utils.generate_clients(
+                client_utils.arrival_rates(request.arrival_rates, request.rate_period),
+                request.seed
+            )
+        else:
+            clients = client_utils.generate_clients_based_on_poisson(
                 request.morning_variance,
-                request.afternoon_variance
+                request.afternoon_variance,
+                request.seed
             )
+        result = [client.to_dict() for client in clients]
+        if request.seed is not None:
+            self._cache.set(key, result)
+        return result
+
+    async def __stream_job(self, job: Job, http_request: Request) -> AsyncIterator[str]:
+        """Send the updates of the job until it finishes"""
+        try:
+            yield sse_event("job", {"jobId": job.id})
+            while not job.future.done():
+                if await http_request.is_disconnected():
+                    return
+                try:
+                    update = await asyncio.to_thread(
+                        job.updates.get, True, STOP_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                yield sse_event("solution", update)
+            # Send the updates that are left on the queue
+            while True:
+                try:
+                    yield sse_event("solution", job.updates.get_nowait())
+                except queue.Empty:
+                    break
+            if job.future.exception() is not None:
+                print(f"Job {job.id} failed with error: {job.future.exception()}")
+                yield sse_event("error", {"detail": "Solver failed to find a solution"})
+            else:
+                yield sse_event("result", job.future.result().model_dump())
+        finally:
+            # If the client is gone, this also stops the search
+            self._jobs.remove(job.id)
+
+    async def __stream_batch(
+        self,
+        request: BatchRequest,
+        http_request: Request
+    ) -> AsyncIterator[bytes]:
+        """Send the result of each instance of the batch once it's solved"""
+
+        async def solve(index: int, instance: BatchInstance) -> BatchItem:
+            item = BatchItem(index=index, instanceId=instance.instanceId, status="completed")
+            parameters = self.__solver_parameters(instance)
+            if instance.numWorkers is None:
+                # Split the cores between the instances solved at the same time
+                parameters = batch_parameters(
+                    replace(parameters, num_workers=0), self._jobs.max_workers)
+            key = content_hash("solve_problem", canonical_solver_request(instance, parameters))
+            item.result = self._cache.get(key)
+            if item.result is not None:
+                return item
+            try:
+                result = await self._jobs.run(
+                    solve_schedule, *parse_solver_request(instance), instance.mode,
+                    parameters, instance.ganttFormat == "columns", instance.formulation
+                )
+            except Exception as e:  # pylint: disable=W0718
+                print(f"Solver failed with error: {e}")
+                item.status = "failed"
+                item.detail = "Solver failed to find a solution"
+                return item
+            if result.profile is not None:
+                self._metrics.observe_solve(result.profile)
+            item.result = result.model_dump()
+            self._cache.set(key, item.result)
+            return item
+
+        tasks = [
+            asyncio.ensure_future(solve(index, instance))
+            for index, instance in enumerate(request.instances)
         ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                item = await task
+                if await http_request.is_disconnected():
+                    return
+                yield dumps_json(item.model_dump()) + b"\n"
+        finally:
+            # If the client is gone, the instances that haven't started are skipped
+            for task in tasks:
+                task.cancel()
+
+    async def __track_request(self, request: Request, call_next: Any) -> Response:
+        """Count each request and its duration, by the path of its endpoint.
+
+        For the streamed responses, the duration is the time until the stream starts.
+        """
+        start = perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        self._metrics.observe_request(
+            route.path if route is not None else "unknown", request.method,
+            response.status_code, perf_counter() - start
+        )
+        return response
+
+    def __timed_response(
+        self,
+        content: Any,
+        accept: Optional[str],
+        phases: dict[str, float]
+    ) -> Response:
+        """Encode the content, adding the time of each phase to the `Server-Timing`
+        header (if it's enabled) and to the metrics
+        """
+        start = perf_counter()
+        response = encode_response(content, accept)
+        phases["serialize"] = perf_counter() - start
+        self._metrics.observe_phase("serialize", phases["serialize"])
+        if "parse" in phases:
+            self._metrics.observe_phase("parse", phases["parse"])
+        if self._timing_headers:
+            response.headers["Server-Timing"] = server_timing(phases)
+        return response
+
+    def __observe_job(self, future: Any) -> None:
+        """Add the profile of a finished job to the metrics"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        if future.result().profile is not None:
+            self._metrics.observe_solve(future.result().profile)
+
+    def __dispatcher(self) -> Dispatcher:
+        """Get the online dispatch, if it has been started"""
+        if self._dispatcher is None:
+            raise HTTPException(
+                status_code=409,
+                detail="The dispatch hasn't been started. Start it with `POST /dispatch`"
+            )
+        return self._dispatcher
+
+    def __solver_parameters(self, request: ParametersRequest) -> SolverParameters:
+        """Get the parameters of the solver for this request, using the
+        server defaults and limiting them to the server caps
+        """
+        defaults, caps = self._default_parameters, self._parameter_caps
+        max_time = request.maxTimeInSeconds or defaults.max_time_in_seconds
+        num_workers = request.numWorkers
+        if num_workers is None:
+            num_workers = defaults.num_workers
+        # * NOTE: Zero workers means all the cores, so it's also capped
+        if caps.num_workers > 0 and (num_workers == 0 or num_workers > caps.num_workers):
+            num_workers = caps.num_workers
+        return SolverParameters(
+            max_time_in_seconds=min(max_time, caps.max_time_in_seconds),
+            num_workers=num_workers,
+            relative_gap_limit=(
+                request.relativeGapLimit if request.relativeGapLimit is not None
+                else defaults.relative_gap_limit
+            ),
+            log_search_progress=request.logSearchProgress
+        )
 
     async def __404(self) -> None:
         """Return the 404"""
         raise HTTPException(status_code=404, detail="Endpoint not found")
+
+
+# ========================= #
+#      Helper methods       #
+# ========================= #
+
+
+def parse_cashiers(cashiers: list[CashierDict]) -> list[Cashier]:
+    """Obtain the cashiers models from the request"""
+    return [
+        Cashier(
+            name=cashier["workerId"],
+            available_in_the_morning=cashier["available_in_the_morning"],
+            available_in_the_afternoon=cashier["available_in_the_afternoon"],
+            effectiveness_average=cashier["effectiveness_average"],
+        )
+        for cashier in cashiers
+    ]
+
+
+def parse_clients(clients: list[dict[str, int]]) -> list[Client]:
+    """Obtain the clients models from the request"""
+    return [
+        Client(
+            id=client["id"],
+            arrival_time=client["arrivalTime"],
+            products=client["products"]
+        )
+        for client in clients
+    ]
+
+
+def parse_solver_request(request: SolverRequest) -> tuple[list[Cashier], list[Client]]:
+    """Obtain the cashiers and clients models from the request"""
+    cashiers = parse_cashiers(request.cashiers)
+    if request.clientColumns is not None:
+        columns = request.clientColumns
+        return cashiers, ClientColumns(
+            ids=np.asarray(columns["ids"], dtype=np.int64),
+            arrival_times=np.asarray(columns["arrivalTimes"], dtype=np.int64),
+            products=np.asarray(columns["products"], dtype=np.int64)
+        ).to_clients()
+    return cashiers, parse_clients(request.clients)
+
+
+def stats_to_dict(stats: SolverStats) -> SolverStatsDict:
+    """Convert the stats of the solver to the response format"""
+    return {
+        "status": stats.status,
+        "objectiveValue": stats.objective_value,
+        "bestBound": stats.best_bound,
+        "gap": round(stats.gap, 4),
+        "wallTime": round(stats.wall_time, 3),
+    }
+
+
+def kpis_to_dict(kpis: DispatchKPIs) -> DispatchKPIsDict:
+    """Convert the KPIs of the dispatch to the response format"""
+    return {
+        "serviceLevel": kpis.service_level,
+        "avgQueueWaitingTime": kpis.waiting_time,
+        "avgProcessingTime": kpis.service_time,
+        "avgFreeTime": kpis.cashier_free_time,
+        "dispatched": kpis.dispatched,
+        "queued": kpis.queued,
+    }
+
+
+def roster_to_result(evaluation: RosterEvaluation) -> RosterResult:
+    """Convert the evaluation of a roster to the response format"""
+    return RosterResult(
+        cashiers=[
+            {
+                "workerId": cashier.name,
+                "available_in_the_morning": cashier.available_in_the_morning,
+                "available_in_the_afternoon": cashier.available_in_the_afternoon,
+                "effectiveness_average": cashier.effectiveness_average,
+            }
+            for cashier in evaluation.cashiers
+        ],
+        morningCashiers=sum(
+            cashier.available_in_the_morning for cashier in evaluation.cashiers),
+        afternoonCashiers=sum(
+            cashier.available_in_the_afternoon for cashier in evaluation.cashiers),
+        cost=evaluation.cost,
+        serviceLevel=evaluation.service_level,
+        avgQueueWaitingTime=evaluation.waiting_time,
+        detail=evaluation.error
+    )
+
+
+def var_to_dict(var: SolutionVar) -> dict[str, Any]:
+    """Convert a solution var to a row of the gantt"""
+    return {
+        "id": f"TASK_{var.client.id}_{var.cashier.name}",
+        "processor": var.cashier.name,
+        "task": f"Client {var.client.id}",
+        "start": var.start,
+        "end": var.end,
+        "duration": var.duration,
+        "products": var.client.products
+    }
+
+
+def canonical_solver_request(
+    request: SolverRequest,
+    parameters: SolverParameters
+) -> dict[str, Any]:
+    """Get the content of the request, with the cashiers and clients sorted.
+
+    Two requests with the same canonical content have the same solution, even if
+    one of them sends the clients as columns. The parameters of the request are
+    replaced by the `parameters` used to solve it (with the server defaults and
+    caps), so a change of the server settings doesn't return the old results.
+    """
+    content = request.model_dump(
+        exclude={"clientColumns", "instanceId", *ParametersRequest.model_fields})
+    content["parameters"] = asdict(parameters)
+    if request.clientColumns is not None:
+        columns = request.clientColumns
+        content["clients"] = [
+            {"id": client_id, "arrivalTime": arrival_time, "products": products}
+            for client_id, arrival_time, products in zip(
+                columns["ids"], columns["arrivalTimes"], columns["products"])
+        ]
+    content["cashiers"] = sorted(content["cashiers"], key=lambda c: c["workerId"])
+    content["clients"] = sorted(content["clients"], key=lambda c: c["id"])
+    return content
+
+
+def solve_schedule(  # pylint: disable=R0913
+    cashiers: list[Cashier],
+    clients: list[Client],
+    mode: SolverMode = "cp_sat",
+    parameters: Optional[SolverParameters] = None,
+    columnar: bool = False,
+    formulation: Formulation = "intervals",
+    stop_event: Any = None,
+    updates: Any = None
+) -> SolverResult:
+    """Solve the schedule and compute the KPIs for it.
+
+    This function is executed inside the pool of processes, so it
+    uses its own scheduling problem. If the `stop_event` is set while the
+    solver is running, the search is stopped. If there's an `updates` queue,
+    the improving solutions found during the search are put on it.
+
+    If `columnar` is True, the gantt is returned as columns. The `formulation`
+    is the way to model the cashiers (see `CashierScheduling`).
+    """
+    scheduler = CashierScheduling(formulation=formulation, parameters=parameters)
+    # Set the cashiers
+    scheduler.set_cashiers(cashiers)
+    scheduler.set_clients(clients)
+    # Then, solve the problem
+    with watch_stop_event(stop_event, scheduler.stop):
+        scheduler.solve(
+            mode, stream_solutions(updates, columnar) if updates is not None else None)
+    # Get the results
+    start = perf_counter()
+    table = scheduler.table()
+    results_time = perf_counter() - start
+    # Get the solver result
+    print("Modifyng the results...")
+    stats = scheduler.stats()
+    start = perf_counter()
+    result = build_solver_result(table, stats, columnar)
+    # Keep where the time went, for the metrics of the server
+    result.profile = SolveProfile(
+        phases={
+            "build": stats.build_time,
+            "solve": stats.wall_time - stats.build_time,
+            "results": results_time,
+            "kpis": perf_counter() - start,
+        },
+        stats=stats,
+        peak_memory=peak_memory()
+    )
+    # Return the SolverResult
+    print("Sending the results...")
+    return result
+
+
+def stream_solutions(updates: Any, columnar: bool = False) -> SolutionHandler:
+    """Get a function that puts the solutions on the `updates` queue.
+
+    To not slow down the solver, the solutions found less than
+    `STREAM_INTERVAL` seconds after the last one sent are skipped.
+    """
+    last_sent = [0.0]
+
+    def on_solution(table: SolutionTable, stats: SolverStats) -> None:
+        if perf_counter() - last_sent[0] < STREAM_INTERVAL:
+            return
+        updates.put(build_solver_result(table, stats, columnar).model_dump())
+        last_sent[0] = perf_counter()
+    return on_solution
+
+
+def build_solver_result(
+    table: SolutionTable,
+    stats: SolverStats,
+    columnar: bool = False
+) -> SolverResult:
+    """Build the result to send, with the gantt of the solution and its KPIs.
+
+    If `columnar` is True, the gantt is sent as columns in a `ColumnarSolverResult`.
+    """
+    processors = [table.cashiers[cashier] for cashier in table.cashier.tolist()]
+    kpis = {
+        "avgProcessingTime": table.service_time_kpi(),
+        "avgQueueWaitingTime": table.waiting_time_kpi(),
+        "avgFreeTime": table.cashier_free_time_kpi(),
+        "serviceLevel": table.service_level_kpi(),
+        # "cashierPerformance": calculate_cashier_performance(results),
+        "clientPerProducts": table.clients_per_product(),
+        "arrivalVsStart": table.scatter_data(),
+        "efficiencyData": table.shift_efficiency(),
+        "solverStats": stats_to_dict(stats)
+    }
+    if columnar:
+        return ColumnarSolverResult(
+            ganttSolution=[],
+            ganttColumns={
+                "clientIds": table.client_id.tolist(),
+                "processors": processors,
+                "starts": table.start.tolist(),
+                "ends": table.end.tolist(),
+                "durations": table.duration.tolist(),
+                "products": table.products.tolist()
+            },
+            **kpis
+        )
+    solution = [{
+        "id": f"TASK_{client_id}_{processor}",
+        "processor": processor,
+        "task": f"Client {client_id}",
+        "start": start,
+        "end": end,
+        "duration": duration,
+        "products": products
+    } for client_id, processor, start, end, duration, products in zip(
+        table.client_id.tolist(), processors, table.start.tolist(),
+        table.end.tolist(), table.duration.tolist(), table.products.tolist()
+    )]
+    # The KPIs and the charts are computed from the columns of the solution
+    return SolverResult(ganttSolution=solution, **kpis)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format a Server-Sent Event"""
+    return f"event: {event}\ndata: {dumps_json(data).decode()}\n\n"
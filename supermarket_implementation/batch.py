@@ -0,0 +1,88 @@
+"""
+Batch solve of independent instances (for example, several stores or days).
+
+Each instance is solved in its own process, so the throughput grows with the
+number of cores. The results are returned as soon as each instance finishes.
+"""
+from typing import Iterator, Optional
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+# Local imports
+from supermarket_implementation.models import (
+    Cashier, Client, SolutionVar, SolverParameters, SolverStats
+)
+from supermarket_implementation.scheduling import CashierScheduling, Formulation, SolverMode
+
+# Instance of the problem: (cashiers, clients)
+Instance = tuple[list[Cashier], list[Client]]
+
+
+@dataclass
+class BatchResult:
+    """Batch Result.
+    Result of one instance of the batch:
+        - index: Position of the instance in the batch
+        - solution: Solution vars of the instance (empty if it failed)
+        - stats: Summary of the search (None if it failed)
+        - error: Error raised while solving the instance, if any
+    """
+    index: int
+    solution: list[SolutionVar]
+    stats: Optional[SolverStats] = None
+    error: Optional[str] = None
+
+
+def solve_batch(  # pylint: disable=R0913
+    instances: list[Instance],
+    mode: SolverMode = "cp_sat",
+    parameters: Optional[SolverParameters] = None,
+    formulation: Formulation = "intervals",
+    max_workers: Optional[int] = None
+) -> Iterator[BatchResult]:
+    """Solve the instances in parallel, yielding each result once it's ready.
+
+    The instances are solved in a pool of `max_workers` processes (by default, one
+    per core). If the `parameters` use all the cores (`num_workers=0`), the
+    cores are split between the processes, so they don't compete for them.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    parameters = batch_parameters(parameters or SolverParameters(), max_workers)
+    with ProcessPoolExecutor(max_workers=min(max_workers, max(1, len(instances)))) as pool:
+        futures = [
+            pool.submit(solve_instance, index, cashiers, clients, mode, parameters, formulation)
+            for index, (cashiers, clients) in enumerate(instances)
+        ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # If the caller stops early, don't solve the rest
+            for future in futures:
+                future.cancel()
+
+
+def batch_parameters(parameters: SolverParameters, max_workers: int) -> SolverParameters:
+    """Split the cores between the processes if the parameters use all of them"""
+    if parameters.num_workers:
+        return parameters
+    return replace(parameters, num_workers=max(1, (os.cpu_count() or 1) // max_workers))
+
+
+def solve_instance(  # pylint: disable=R0913
+    index: int,
+    cashiers: list[Cashier],
+    clients: list[Client],
+    mode: SolverMode = "cp_sat",
+    parameters: Optional[SolverParameters] = None,
+    formulation: Formulation = "intervals"
+) -> BatchResult:
+    """Solve one instance of the batch. It's executed inside the pool of processes"""
+    try:
+        scheduler = CashierScheduling(formulation=formulation, parameters=parameters)
+        scheduler.set_cashiers(cashiers)
+        scheduler.set_clients(clients)
+        scheduler.solve(mode)
+        return BatchResult(index=index, solution=scheduler.results(), stats=scheduler.stats())
+    except Exception as e:  # pylint: disable=W0718
+        return BatchResult(index=index, solution=[], error=str(e))
@@ -0,0 +1,131 @@
+"""
+Cache for the results of the server.
+
+The results are stored using a hash of the content of the request, so the same
+request (even with its cashiers or clients in a different order) returns the
+stored result instead of running the solver again.
+"""
+from typing import Any, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+
+
+class ResultCache:
+    """Cache of results with two tiers:
+
+    - memory: The most recently used results (up to `max_size` of them)
+    - disk: Optional SQLite database in `path`, that keeps the most recently
+      stored results (up to `max_disk_size` of them, or every result if it's 0)
+
+    It also counts the hits and misses of the cache.
+    """
+    _entries: OrderedDict[str, Any]
+    _max_size: int
+    _max_disk_size: int
+    _db: Optional[sqlite3.Connection]
+    hits: int
+    disk_hits: int
+    misses: int
+    # Define the slots
+    __slots__ = ["_entries", "_max_size", "_max_disk_size", "_db", "hits", "disk_hits", "misses"]
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        path: Optional[str] = None,
+        max_disk_size: int = 10_000
+    ) -> None:
+        self._entries = OrderedDict()
+        self._max_size = max_size
+        self._max_disk_size = max_disk_size
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get the result stored with this key (if any)"""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                value = json.loads(row[0])
+                self.__store_in_memory(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a result. The value should be JSON serializable"""
+        self.__store_in_memory(key, value)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
+            # * NOTE: A replaced row gets a new rowid, so the lowest ones are the oldest
+            if self._max_disk_size > 0:
+                self._db.execute(
+                    "DELETE FROM results WHERE rowid NOT IN " +
+                    "(SELECT rowid FROM results ORDER BY rowid DESC LIMIT ?)",
+                    (self._max_disk_size,)
+                )
+            self._db.commit()
+
+    def clear(self) -> None:
+        """Remove every result, from both tiers. The counters are kept"""
+        self._entries.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+
+    def stats(self) -> dict[str, int]:
+        """Get the counters of the cache"""
+        return {
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxSize": self._max_size,
+            "maxDiskSize": self._max_disk_size,
+        }
+
+    def close(self) -> None:
+        """Close the database of the disk tier"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ========================= #
+    #      Helper methods       #
+    # ========================= #
+
+    def __store_in_memory(self, key: str, value: Any) -> None:
+        """Store the value in the memory tier, removing the least recently used"""
+        if self._max_size <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+
+def content_hash(namespace: str, payload: Any) -> str:
+    """Get the hash of a JSON serializable payload.
+
+    The keys of the dictionaries are sorted, so the hash doesn't depend on their order.
+    """
+    content = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{namespace}:{content}".encode()).hexdigest()
@@ -0,0 +1,233 @@
+"""
+Online dispatch of the clients.
+
+Instead of solving the whole day, each client is assigned to a cashier as soon as
+it arrives: the eligible cashier that gets free first, as in the heuristic
+schedule. The dispatcher keeps the queue of each cashier, so the real end of the
+clients can be reported to correct the plan, and the KPIs are updated with each
+change instead of computed again from the whole day.
+"""
+import heapq
+import threading
+from collections import deque
+from dataclasses import replace
+from typing import Optional
+# Local imports
+from supermarket_implementation.models import Cashier, Client, DispatchKPIs, SolutionVar
+from supermarket_implementation.utils.problem import SHIFT_CHANGE, calculate_expected_duration
+from supermarket_implementation.utils.table import SERVICE_LEVEL_THRESHOLD, totals_kpis
+
+
+class Dispatcher:  # pylint: disable=R0902
+    """Assign the clients to the cashiers while they arrive.
+
+    - arrive: Assign a client to the eligible cashier that gets free first
+    - complete: Report the real end of a client, moving the rest of its queue
+    - kpis: Get the KPIs of the clients dispatched so far
+    - queues: Get the clients waiting (or being attended) in each cashier
+
+    Each arrival takes O(log n) time, using a heap of the cashiers by the time
+    they get free for each shift, and another one by the end of their queue for
+    the makespan. The methods are safe to call from several threads.
+    """
+    _cashiers: list[Cashier]
+    _free_at: list[int]
+    _heaps: dict[bool, list[tuple[int, int]]]
+    _queues: list[deque[SolutionVar]]
+    _pending: dict[int, int]
+    _totals: list[int]
+    _ends: list[tuple[int, int]]
+    _completed_end: int
+    _makespan: int
+    _dispatched: int
+    _lock: threading.Lock
+    # Define the slots
+    __slots__ = [
+        "_cashiers", "_free_at", "_heaps", "_queues", "_pending", "_totals", "_ends",
+        "_completed_end", "_makespan", "_dispatched", "_lock"
+    ]
+
+    def __init__(
+        self,
+        cashiers: list[Cashier],
+        busy_until: Optional[dict[str, int]] = None
+    ) -> None:
+        """Start the dispatch with the given cashiers. If `busy_until` is given,
+        each cashier (by name) is busy until that minute.
+        """
+        busy_until = busy_until or {}
+        self._cashiers = cashiers
+        self._free_at = [busy_until.get(cashier.name, 0) for cashier in cashiers]
+        # One heap of (free time, cashier index) per shift. Since a cashier can be
+        # in both heaps, the entries that don't match `_free_at` are outdated
+        self._heaps = {False: [], True: []}
+        for index in range(len(cashiers)):
+            self.__push(index)
+        # Clients of each cashier that haven't been completed, and their cashier
+        self._queues = [deque() for _ in cashiers]
+        self._pending = {}
+        # Sums for the KPIs: number of clients, service time, waiting time,
+        # working time and clients attended on time
+        self._totals = [0] * 5
+        # Max heap of (-end of the last client, cashier index) of the queues. As in
+        # the other heaps, the entries that don't match the queue are outdated
+        self._ends = []
+        self._completed_end = 0
+        self._makespan = 0
+        self._dispatched = 0
+        self._lock = threading.Lock()
+
+    def arrive(self, client: Client) -> SolutionVar:
+        """Assign the client to the eligible cashier that gets free first.
+
+        The client is attended once it arrives and the cashier is free. The
+        duration is computed as in `calculate_expected_duration`.
+        """
+        with self._lock:
+            if client.id in self._pending:
+                raise ValueError(f"The client {client.id} is already in a queue")
+            heap = self._heaps[client.arrival_time > SHIFT_CHANGE]
+            # Discard the outdated entries
+            while heap and heap[0][0] != self._free_at[heap[0][1]]:
+                heapq.heappop(heap)
+            if not heap:
+                raise RuntimeError(
+                    f"There's no cashier available to attend the client {client.id}")
+            free_time, index = heap[0]
+            cashier = self._cashiers[index]
+            start = max(free_time, client.arrival_time)
+            duration = calculate_expected_duration(client, cashier)
+            var = SolutionVar(cashier, client, start, start + duration, duration, active=1)
+            self._queues[index].append(var)
+            self._pending[client.id] = index
+            self._dispatched += 1
+            self.__count(var, 1)
+            self._free_at[index] = var.end
+            self.__push(index)
+            self.__update_makespan(index)
+            return var
+
+    def complete(self, client_id: int, end: int) -> SolutionVar:
+        """Report that the client left its cashier at the minute `end`.
+
+        The clients that were before it in the same queue are completed too, at
+        their planned end. The clients after it are moved to start when it ends.
+        """
+        with self._lock:
+            if client_id not in self._pending:
+                raise KeyError(f"The client {client_id} is not in any queue")
+            index = self._pending[client_id]
+            queue = self._queues[index]
+            var = next(queued for queued in queue if queued.client.id == client_id)
+            if end < var.start:
+                raise ValueError(
+                    f"The client {client_id} cannot end before it starts (minute {var.start})")
+            # The clients of a cashier are attended in order
+            while queue[0] is not var:
+                done = queue.popleft()
+                del self._pending[done.client.id]
+                self._completed_end = max(self._completed_end, done.end)
+            queue.popleft()
+            del self._pending[client_id]
+            completed = replace(var, end=end, duration=end - var.start)
+            self.__count(var, -1)
+            self.__count(completed, 1)
+            self._completed_end = max(self._completed_end, end)
+            # Move the rest of the queue
+            free_time = end
+            for position, queued in enumerate(queue):
+                start = max(free_time, queued.client.arrival_time)
+                if start != queued.start:
+                    moved = replace(queued, start=start, end=start + queued.duration)
+                    self.__count(queued, -1)
+                    self.__count(moved, 1)
+                    queue[position] = moved
+                free_time = queue[position].end
+            self._free_at[index] = free_time
+            self.__push(index)
+            self.__update_makespan(index)
+            return completed
+
+    def kpis(self) -> DispatchKPIs:
+        """Get the KPIs of the clients dispatched so far"""
+        with self._lock:
+            count = self._totals[0]
+            if not count or not self._makespan:
+                service_time = waiting_time = free_time = service_level = 0.0
+            else:
+                service_time, waiting_time, free_time, service_level = totals_kpis(
+                    self._totals, self._makespan)
+            return DispatchKPIs(
+                service_time=service_time,
+                waiting_time=waiting_time,
+                cashier_free_time=free_time,
+                service_level=service_level,
+                dispatched=self._dispatched,
+                queued=len(self._pending)
+            )
+
+    def queues(self) -> dict[str, list[SolutionVar]]:
+        """Get the clients that haven't been completed in each cashier (by name)"""
+        with self._lock:
+            return {
+                cashier.name: list(queue)
+                for cashier, queue in zip(self._cashiers, self._queues)
+            }
+
+    # ========================= #
+    #      Helper methods       #
+    # ========================= #
+
+    def __push(self, index: int) -> None:
+        """Add the current free time of the cashier to the heaps of its shifts"""
+        cashier = self._cashiers[index]
+        for afternoon, available in (
+            (False, cashier.available_in_the_morning),
+            (True, cashier.available_in_the_afternoon)
+        ):
+            if not available:
+                continue
+            heap = self._heaps[afternoon]
+            heapq.heappush(heap, (self._free_at[index], index))
+            # * NOTE: The outdated entries are only discarded from the top, so the heap
+            # * of the other shift keeps growing. Rebuild it once most of it is outdated
+            if len(heap) > 4 * len(self._cashiers):
+                self._heaps[afternoon] = [
+                    (free_time, position) for position, free_time in {
+                        position: free_time for free_time, position in heap
+                        if free_time == self._free_at[position]
+                    }.items()
+                ]
+                heapq.heapify(self._heaps[afternoon])
+
+    def __update_makespan(self, index: int) -> None:
+        """Update the makespan after the queue of the cashier changed: the last end
+        of the completed clients or of the queues, whichever is later
+        """
+        queue = self._queues[index]
+        if queue:
+            heapq.heappush(self._ends, (-queue[-1].end, index))
+        # * NOTE: The end of a queue goes down when a client is completed early,
+        # * so the makespan is the top of the heap instead of a running maximum
+        while self._ends and not self.__is_last_end(*self._ends[0]):
+            heapq.heappop(self._ends)
+        self._makespan = max(
+            self._completed_end, -self._ends[0][0] if self._ends else 0)
+        # Rebuild the heap once most of it is outdated
+        if len(self._ends) > 4 * len(self._cashiers):
+            self._ends = list({entry for entry in self._ends if self.__is_last_end(*entry)})
+            heapq.heapify(self._ends)
+
+    def __is_last_end(self, negative_end: int, index: int) -> bool:
+        """Check if the entry of the heap of ends matches the queue of the cashier"""
+        queue = self._queues[index]
+        return bool(queue) and queue[-1].end == -negative_end
+
+    def __count(self, var: SolutionVar, sign: int) -> None:
+        """Add (or remove, with a negative `sign`) the var from the sums of the KPIs"""
+        waiting = var.start - var.client.arrival_time
+        self._totals[0] += sign
+        self._totals[1] += sign * (var.end - var.client.arrival_time)
+        self._totals[2] += sign * waiting
+        self._totals[3] += sign * var.duration
+        self._totals[4] += sign * (waiting <= SERVICE_LEVEL_THRESHOLD)
@@ -0,0 +1,113 @@
+"""
+Encoding of the responses of the server.
+
+JSON is always available (using orjson if it's installed). Clients can ask
+for MessagePack or Arrow IPC using the `Accept` header, if their packages are
+installed in the server.
+"""
+from typing import Any, Callable, Optional
+import json
+# External imports
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+# Optional imports
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Response class of the JSON endpoints
+JsonResponseClass = ORJSONResponse if orjson is not None else JSONResponse
+# Key of the rows that are sent as the Arrow table. The rest of
+# the content goes as JSON in the metadata of the table
+ARROW_ROWS_KEY = "ganttSolution"
+ARROW_COLUMNS_KEY = "ganttColumns"
+
+
+def dumps_json(content: Any) -> bytes:
+    """Encode the content as JSON"""
+    if orjson is not None:
+        return orjson.dumps(content)  # pylint: disable=E1101
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    """Encode the content as MessagePack"""
+    return msgpack.packb(content)
+
+
+def dumps_arrow(content: dict[str, Any]) -> bytes:
+    """Encode the content as an Arrow IPC stream.
+
+    The gantt of the solution is the table of the stream, and the other
+    fields are stored as JSON in the `result` key of its metadata.
+    """
+    rest = {
+        key: value for key, value in content.items()
+        if key not in (ARROW_ROWS_KEY, ARROW_COLUMNS_KEY)
+    }
+    if content.get(ARROW_COLUMNS_KEY):
+        table = pa.table(content[ARROW_COLUMNS_KEY])
+    else:
+        table = pa.Table.from_pylist(content.get(ARROW_ROWS_KEY, []))
+    table = table.replace_schema_metadata({"result": dumps_json(rest)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def available_encoders() -> dict[str, Callable[[Any], bytes]]:
+    """Get the encoder of each media type that the server supports"""
+    encoders: dict[str, Callable[[Any], bytes]] = {JSON_MEDIA_TYPE: dumps_json}
+    if msgpack is not None:
+        encoders[MSGPACK_MEDIA_TYPE] = dumps_msgpack
+    if pa is not None:
+        encoders[ARROW_MEDIA_TYPE] = dumps_arrow
+    return encoders
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Choose the media type of the response from the `Accept` header.
+
+    The media types are tried in order of preference (their `q` value). If the
+    client accepts anything, doesn't say, or only accepts types that we can't
+    encode, we answer with JSON (as every response was before the negotiation).
+    """
+    encoders = available_encoders()
+    if not accept:
+        return JSON_MEDIA_TYPE
+    preferences: list[tuple[float, int, str]] = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            preferences.append((-quality, position, media_type.lower()))
+    for _, _, media_type in sorted(preferences):
+        if media_type in encoders:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def encode_response(content: Any, accept: Optional[str] = None) -> Response:
+    """Encode the content using the media type that the client accepts"""
+    media_type = negotiate(accept)
+    return Response(available_encoders()[media_type](content), media_type=media_type)
@@ -0,0 +1,204 @@
+"""
+Background jobs for the solver.
+
+The CP-SAT search is CPU bound, so instead of running it inside the event loop
+of the server we dispatch it to a pool of processes. Each submission is tracked
+as a job that can be polled or cancelled while the server keeps answering
+other requests.
+"""
+from typing import Any, Callable, Literal, Optional
+import asyncio
+import os
+import threading
+import time
+import multiprocessing
+from multiprocessing.managers import SyncManager
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from uuid import uuid4
+
+# Status that a job could have during its lifetime
+JobStatus = Literal["pending", "running", "completed", "failed", "cancelled"]
+# Time (in seconds) between each check of the stop event inside the workers
+STOP_POLL_INTERVAL = 0.1
+# Time (in seconds) that a finished job is kept, so its result can be polled
+JOB_TTL = 600.0
+
+
+@dataclass
+class Job:
+    """Job representation.
+
+    It keeps the future returned by the executor, the event
+    used to ask the worker to stop the search and, for the streamed
+    jobs, the queue where the worker puts its partial results.
+    Once the job is done, `finished_at` has the (monotonic) time when it finished.
+    """
+    id: str
+    future: Future
+    stop_event: Any
+    updates: Any = None
+    cancelled: bool = False
+    finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> JobStatus:
+        """Current status of the job"""
+        if self.cancelled:
+            return "cancelled"
+        if not self.future.done():
+            return "running" if self.future.running() else "pending"
+        if self.future.exception() is not None:
+            return "failed"
+        return "completed"
+
+
+class JobManager:
+    """Manage the pool of processes that run the solver.
+
+    - run: Await the result of a function executed in the pool
+    - submit: Submit a function as a job and return its ID
+    - get: Obtain a job using its ID
+    - cancel: Cancel a job, stopping the search if it's already running
+    - remove: Remove a job from the registry
+
+    The finished jobs are kept for `job_ttl` seconds (`JOB_TTL` by default, or
+    the `JOB_TTL` environment variable), and then removed from the registry.
+    The expired jobs are swept each time a job is submitted or requested.
+    """
+    _executor: ProcessPoolExecutor
+    _manager: Optional[SyncManager]
+    _jobs: dict[str, Job]
+    _max_workers: int
+    _job_ttl: float
+    # Define the slots
+    __slots__ = ["_executor", "_manager", "_jobs", "_max_workers", "_job_ttl"]
+
+    def __init__(self, max_workers: Optional[int] = None, job_ttl: Optional[float] = None) -> None:
+        if max_workers is None and os.environ.get("SOLVER_WORKERS"):
+            max_workers = int(os.environ["SOLVER_WORKERS"])
+        if job_ttl is None:
+            job_ttl = float(os.environ.get("JOB_TTL", JOB_TTL))
+        self._job_ttl = job_ttl
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        # The manager is only started when the first job is submitted,
+        # since it lives in its own process
+        self._manager = None
+        self._jobs = {}
+
+    @property
+    def max_workers(self) -> int:
+        """Number of processes of the pool"""
+        return self._max_workers
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Pool of processes, to submit work that isn't tracked as a job"""
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run the function in the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self._executor.submit(fn, *args))
+
+    def submit(self, fn: Callable[..., Any], *args: Any, stream: bool = False) -> Job:
+        """Submit the function as a job. The function should accept
+        a `stop_event` keyword to know when it should stop its work.
+
+        If `stream` is True, the function also receives an `updates` queue
+        where it can put its partial results.
+        """
+        self.__sweep()
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        stop_event = self._manager.Event()
+        kwargs = {"stop_event": stop_event}
+        if stream:
+            kwargs["updates"] = self._manager.Queue()
+        job = Job(
+            id=uuid4().hex,
+            future=self._executor.submit(fn, *args, **kwargs),
+            stop_event=stop_event,
+            updates=kwargs.get("updates")
+        )
+        job.future.add_done_callback(lambda _: setattr(job, "finished_at", time.monotonic()))
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get the job with the given ID (if it exists and hasn't expired)"""
+        self.__sweep()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel the job.
+
+        If the job is still on the queue, it won't be executed at all. If it's
+        running, we notify the worker to stop the search. A finished job
+        is just removed from the registry.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.future.done():
+            return self._jobs.pop(job_id)
+        job.cancelled = True
+        if not job.future.cancel():
+            job.stop_event.set()
+        return job
+
+    def remove(self, job_id: str) -> None:
+        """Remove the job from the registry, stopping it if it's running"""
+        job = self._jobs.pop(job_id, None)
+        if job is not None and not job.future.done():
+            job.cancelled = True
+            if not job.future.cancel():
+                job.stop_event.set()
+
+    def shutdown(self) -> None:
+        """Stop every running job and shutdown the pool"""
+        for job in self._jobs.values():
+            if not job.future.done():
+                job.stop_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def __sweep(self) -> None:
+        """Remove the jobs that finished more than `job_ttl` seconds ago"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self._job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+@contextmanager
+def watch_stop_event(stop_event: Any, on_stop: Callable[[], None]):
+    """Watch the stop event while the body is running.
+
+    Since the body (the solver) is blocking, we check the event in a background
+    thread and call `on_stop` once it has been set.
+    """
+    if stop_event is None:
+        yield
+        return
+    finished = threading.Event()
+
+    def watcher() -> None:
+        while not finished.wait(STOP_POLL_INTERVAL):
+            # * NOTE: We keep calling `on_stop` while the body is running, so it
+            # * reaches the solver even if it was set before the search started
+            if stop_event.is_set():
+                on_stop()
+
+    thread = threading.Thread(target=watcher, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        finished.set()
+        thread.join()
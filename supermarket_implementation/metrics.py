@@ -0,0 +1,339 @@
+"""
+Metrics of the server, exposed in the Prometheus text format.
+
+The solver runs in a pool of processes, so the time of each phase of a solve
+is measured inside the worker and sent back with the result (see `SolveProfile`).
+The server process keeps the metrics and renders them on each scrape.
+"""
+from typing import Callable, Iterable, Optional, Union
+from abc import ABC, abstractmethod
+import os
+import resource
+import sys
+import threading
+# Local imports
+from supermarket_implementation.models import SolveProfile
+
+# Media type of the Prometheus text format
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Buckets (in seconds) of the durations
+DURATION_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+# Buckets of the sizes of the models and the counters of the search
+SIZE_BUCKETS = tuple(10.0 ** exponent for exponent in range(1, 9))
+
+# Labels of a sample, as (name, value) pairs
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metric(ABC):
+    """Base of the metrics. Each one has a value (or more) per combination of labels"""
+    name: str
+    description: str
+    kind: str
+    _lock: threading.Lock
+    # Define the slots
+    __slots__ = ["name", "description", "kind", "_lock"]
+
+    def __init__(self, name: str, description: str, kind: str) -> None:
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self._lock = threading.Lock()
+
+    def render(self) -> str:
+        """Get the metric in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        lines += [
+            f"{name}{format_labels(labels)} {format_value(value)}"
+            for name, labels, value in self.samples()
+        ]
+        return "\n".join(lines)
+
+    @abstractmethod
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        """Get the samples of the metric: (name, labels, value)"""
+
+
+class Counter(Metric):
+    """Value that only goes up, such as the number of requests. If it has a
+    `function` (and a `label`), it's read on each scrape, as in the `Gauge`
+    """
+    _values: dict[Labels, float]
+    _function: Optional[Callable[[], Union[float, dict[str, float]]]]
+    _label: Optional[str]
+    # Define the slots
+    __slots__ = ["_values", "_function", "_label"]
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        function: Optional[Callable[[], Union[float, dict[str, float]]]] = None,
+        label: Optional[str] = None
+    ) -> None:
+        super().__init__(name, description, "counter")
+        self._values = {}
+        self._function = function
+        self._label = label
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the value of the labels"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        if self._function is not None:
+            return function_samples(self.name, self._function, self._label)
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class Gauge(Metric):
+    """Value that can go up and down. If it has a `function`, it's read on each scrape.
+
+    With a `label`, the function returns the value of each value of the label
+    (e.g. `{"memory": 3, "disk": 1}` with the label `tier`).
+    """
+    _values: dict[Labels, float]
+    _function: Optional[Callable[[], Union[float, dict[str, float]]]]
+    _label: Optional[str]
+    # Define the slots
+    __slots__ = ["_values", "_function", "_label"]
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        function: Optional[Callable[[], Union[float, dict[str, float]]]] = None,
+        label: Optional[str] = None
+    ) -> None:
+        super().__init__(name, description, "gauge")
+        self._values = {}
+        self._function = function
+        self._label = label
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value of the labels"""
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def set_max(self, value: float, **labels: str) -> None:
+        """Set the value of the labels, if it's greater than the current one"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        if self._function is not None:
+            return function_samples(self.name, self._function, self._label)
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class Histogram(Metric):
+    """Distribution of the observed values, counted in cumulative buckets"""
+    buckets: tuple[float, ...]
+    _counts: dict[Labels, list[int]]
+    _sums: dict[Labels, float]
+    # Define the slots
+    __slots__ = ["buckets", "_counts", "_sums"]
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: tuple[float, ...] = DURATION_BUCKETS
+    ) -> None:
+        super().__init__(name, description, "histogram")
+        self.buckets = tuple(sorted(buckets))
+        self._counts = {}
+        self._sums = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Add the value to the distribution of the labels"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            # The last position is the `+Inf` bucket
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        samples = []
+        with self._lock:
+            for labels, counts in self._counts.items():
+                total = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    total += count
+                    samples.append((
+                        f"{self.name}_bucket", labels + (("le", format_value(bound)),), total))
+                samples.append((f"{self.name}_sum", labels, self._sums[labels]))
+                samples.append((f"{self.name}_count", labels, total))
+        return samples
+
+
+class ServerMetrics:  # pylint: disable=R0902
+    """Metrics of the server.
+
+    - observe_request: Count a request and its duration
+    - observe_phase: Add the duration of a phase measured in the server
+    - observe_solve: Add the phases, search and model size of a solve
+    - render: Get every metric in the Prometheus text format
+    """
+    requests: Counter
+    request_duration: Histogram
+    phase_duration: Histogram
+    solves: Counter
+    branches: Histogram
+    conflicts: Histogram
+    objective: Gauge
+    bound: Gauge
+    variables: Histogram
+    constraints: Histogram
+    worker_memory: Gauge
+    memory: Gauge
+    _metrics: list[Metric]
+    # Define the slots
+    __slots__ = [
+        "requests", "request_duration", "phase_duration", "solves", "branches",
+        "conflicts", "objective", "bound", "variables", "constraints", "worker_memory",
+        "memory", "_metrics"
+    ]
+
+    def __init__(self) -> None:
+        self.requests = Counter(
+            "supermarket_requests_total", "Requests handled, by endpoint and status code")
+        self.request_duration = Histogram(
+            "supermarket_request_duration_seconds", "Duration of the requests, by endpoint")
+        self.phase_duration = Histogram(
+            "supermarket_phase_duration_seconds",
+            "Duration of each phase of the solver requests (parse, build, solve, results," +
+            " kpis and serialize)"
+        )
+        self.solves = Counter("supermarket_solves_total", "Solves, by status of the solver")
+        self.branches = Histogram(
+            "supermarket_solver_branches", "Branches explored by each search", SIZE_BUCKETS)
+        self.conflicts = Histogram(
+            "supermarket_solver_conflicts", "Conflicts found by each search", SIZE_BUCKETS)
+        self.objective = Gauge(
+            "supermarket_solver_objective_value", "Objective value of the last solve")
+        self.bound = Gauge(
+            "supermarket_solver_best_bound", "Best bound of the objective of the last solve")
+        self.variables = Histogram(
+            "supermarket_model_variables", "Variables of each model", SIZE_BUCKETS)
+        self.constraints = Histogram(
+            "supermarket_model_constraints", "Constraints of each model", SIZE_BUCKETS)
+        self.worker_memory = Gauge(
+            "supermarket_worker_peak_memory_bytes",
+            "Peak resident memory of the solver workers")
+        self.memory = Gauge(
+            "process_resident_memory_bytes", "Resident memory of the server process",
+            current_memory
+        )
+        self._metrics = [
+            self.requests, self.request_duration, self.phase_duration, self.solves,
+            self.branches, self.conflicts, self.objective, self.bound, self.variables,
+            self.constraints, self.worker_memory, self.memory
+        ]
+
+    def add(self, metric: Metric) -> Metric:
+        """Add another metric to the ones rendered"""
+        self._metrics.append(metric)
+        return metric
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float) -> None:
+        """Count a request and its duration"""
+        self.requests.inc(endpoint=endpoint, method=method, status=str(status))
+        self.request_duration.observe(seconds, endpoint=endpoint, method=method)
+
+    def observe_phase(self, phase: str, seconds: float) -> None:
+        """Add the duration of a phase"""
+        self.phase_duration.observe(seconds, phase=phase)
+
+    def observe_solve(self, profile: SolveProfile) -> None:
+        """Add the phases of a solve, its search and the size of its model"""
+        for phase, seconds in profile.phases.items():
+            self.observe_phase(phase, seconds)
+        stats = profile.stats
+        self.solves.inc(status=stats.status)
+        self.objective.set(stats.objective_value)
+        self.bound.set(stats.best_bound)
+        # * NOTE: The modes without a model have no search to observe
+        if stats.variables:
+            self.branches.observe(stats.branches)
+            self.conflicts.observe(stats.conflicts)
+            self.variables.observe(stats.variables)
+            self.constraints.observe(stats.constraints)
+        self.worker_memory.set_max(profile.peak_memory)
+
+    def render(self) -> str:
+        """Get every metric in the Prometheus text format"""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+# ========================= #
+#      Helper methods       #
+# ========================= #
+
+
+def current_memory() -> int:
+    """Get the current resident memory of the process (in bytes)"""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # On other platforms, we can only use the peak memory
+        return peak_memory()
+
+
+def peak_memory() -> int:
+    """Get the peak resident memory of the process (in bytes)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # * NOTE: It's in bytes on macOS, and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def function_samples(
+    name: str,
+    function: Callable[[], Union[float, dict[str, float]]],
+    label: Optional[str] = None
+) -> list[tuple[str, Labels, float]]:
+    """Get the samples of a metric read from a function. With a `label`, the
+    function returns the value of each value of the label
+    """
+    if label is None:
+        return [(name, (), function())]
+    return [(name, ((label, key),), value) for key, value in function().items()]
+
+
+def server_timing(phases: dict[str, float]) -> str:
+    """Format the phases (in seconds) as a `Server-Timing` header"""
+    return ", ".join(f"{phase};dur={seconds * 1000:.3f}" for phase, seconds in phases.items())
+
+
+def format_labels(labels: Labels) -> str:
+    """Format the labels of a sample, escaping their values"""
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    """Format a value as Prometheus does, with `+Inf` for the infinity"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 2 ** 53 else repr(float(value))
+    return repr(float(value))
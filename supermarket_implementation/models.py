@@ -3,11 +3,12 @@ Models for the problem generation. This models would represent
 a managable way to utilize the data around the general problem
 """
 from dataclasses import dataclass
+import numpy as np
 # Import or tools
 from ortools.sat.python import cp_model
 
 
-@dataclass
+@dataclass(slots=True)
 class Cashier:
     """Cashier representation model.
 
@@ -23,7 +24,7 @@ class Cashier:
         return f"Cashier ID: {self.name}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Client:
     """Client representation model.
     
@@ -67,7 +68,7 @@ class Client:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class SolverVar:
     """Solver Var.
     This is more like a tuple of variables that represent one state of the solution.
@@ -83,7 +84,7 @@ class SolverVar:
     cashier: Cashier
     client: Client
     start: cp_model.IntVar
-    end: cp_model.IntVar
+    end: cp_model.LinearExprT
     duration: int
     active: cp_model.BoolVarT
 
@@ -91,7 +92,7 @@ class SolverVar:
         return f"SolverVar::{self.cashier.name}|-->Active={self.active}"
 
 
-@dataclass
+@dataclass(slots=True)
 class SolutionVar:
     """Solution Var.
     This is more like a tuple of variables that represent one state of the solution.
@@ -113,3 +114,218 @@ class SolutionVar:
 
     def __repr__(self) -> str:
         return f"SolutionVar::{self.cashier.name}|-->Active={self.active}"
+
+
+@dataclass
+class SolverParameters:
+    """Solver Parameters.
+    Parameters used by the CP-SAT solver to look for a solution:
+        - max_time_in_seconds: Time limit of the search
+        - num_workers: Number of threads to use (0 means all the cores)
+        - relative_gap_limit: Stop the search once the gap between the solution and
+          the best bound is below this value (for example, 0.05 is a 5% gap)
+        - log_search_progress: Print the progress of the search
+    """
+    max_time_in_seconds: float = 15
+    num_workers: int = 0
+    relative_gap_limit: float = 0.0
+    log_search_progress: bool = False
+
+
+@dataclass
+class SolverStats:  # pylint: disable=R0902
+    """Solver Stats.
+    Summary of the last search of the solver:
+        - status: Status of the solver, or HEURISTIC if the solution comes from the heuristic
+        - objective_value: Value of the objective for the solution
+        - best_bound: Best bound found for the objective
+        - gap: Relative gap between the objective and the best bound
+        - wall_time: Time (in seconds) used to solve the problem
+        - build_time: Time (in seconds) of the wall time used to build the model
+        - branches: Number of branches explored by the search
+        - conflicts: Number of conflicts found by the search
+        - variables: Number of variables of the model
+        - constraints: Number of constraints of the model
+    The search counters and the size of the model are 0 for the modes without a model.
+    """
+    status: str
+    objective_value: float
+    best_bound: float
+    gap: float
+    wall_time: float
+    build_time: float = 0.0
+    branches: int = 0
+    conflicts: int = 0
+    variables: int = 0
+    constraints: int = 0
+
+
+@dataclass
+class SolveProfile:
+    """Solve Profile.
+    Where the time of a solve went, and the resources it used:
+        - phases: Time (in seconds) of each phase of the solve, by its name
+        - stats: Summary of the search of the solver
+        - peak_memory: Peak resident memory (in bytes) of the process that solved it
+    """
+    phases: dict[str, float]
+    stats: SolverStats
+    peak_memory: int
+
+
+@dataclass
+class DispatchKPIs:
+    """Dispatch KPIs.
+    KPIs of the clients dispatched so far, using the real end of the completed
+    ones and the planned end of the ones still in the queues:
+        - service_time: Average time since the client arrives until it leaves the cashier
+        - waiting_time: Average time since the client arrives until it gets to the cashier
+        - cashier_free_time: Total working time of the cashiers divided by the total time
+        - service_level: Portion of the clients attended in the first 3 minutes
+        - dispatched: Number of clients dispatched
+        - queued: Number of clients that haven't been completed yet
+    """
+    service_time: float
+    waiting_time: float
+    cashier_free_time: float
+    service_level: float
+    dispatched: int
+    queued: int
+
+
+@dataclass
+class KPIDistribution:
+    """KPI Distribution.
+    Distribution of a KPI over the simulated days:
+        - mean: Average of the days
+        - p50: Median of the days
+        - p95: Value that 95% of the days don't exceed
+        - p99: Value that 99% of the days don't exceed
+    """
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+
+
+@dataclass
+class SimulationResult:
+    """Simulation Result.
+    KPIs of a staffing plan over several simulated days:
+        - days: Number of days simulated
+        - waiting_time: Average waiting time of the clients of each day
+        - service_time: Average service time of the clients of each day
+        - service_level: Portion of the clients of each day attended in the first 3 minutes
+    """
+    days: int
+    waiting_time: KPIDistribution
+    service_time: KPIDistribution
+    service_level: KPIDistribution
+
+
+# ========================= #
+#   Columnar representation #
+# ========================= #
+
+
+@dataclass(slots=True)
+class ClientColumns:
+    """Client Columns.
+    The clients stored as NumPy columns, one row per client. Useful when
+    there are too many clients to handle them as objects:
+        - ids: ID of each client
+        - arrival_times: Arrival time of each client
+        - products: Quantity of products of each client
+
+    Indexing the columns returns the `Client` of that row.
+    """
+    ids: np.ndarray
+    arrival_times: np.ndarray
+    products: np.ndarray
+
+    @classmethod
+    def from_clients(cls, clients: list[Client]) -> "ClientColumns":
+        """Build the columns from a list of clients"""
+        rows = np.array(
+            [(client.id, client.arrival_time, client.products) for client in clients],
+            dtype=np.int64
+        ).reshape(-1, 3)
+        return cls(*rows.T)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> Client:
+        return Client(
+            id=int(self.ids[index]),
+            arrival_time=int(self.arrival_times[index]),
+            products=int(self.products[index])
+        )
+
+    def to_clients(self) -> list[Client]:
+        """Convert the columns to a list of clients"""
+        return [
+            Client(id=client_id, arrival_time=arrival_time, products=products)
+            for client_id, arrival_time, products in zip(
+                self.ids.tolist(), self.arrival_times.tolist(), self.products.tolist())
+        ]
+
+
+@dataclass(slots=True)
+class CashierColumns:
+    """Cashier Columns.
+    The cashiers stored as columns, one row per cashier:
+        - names: Name of each cashier
+        - morning: If the cashier is available in the morning
+        - afternoon: If the cashier is available in the afternoon
+        - effectiveness: Effectiveness average of each cashier
+
+    Indexing the columns returns the `Cashier` of that row.
+    """
+    names: list[str]
+    morning: np.ndarray
+    afternoon: np.ndarray
+    effectiveness: np.ndarray
+
+    @classmethod
+    def from_cashiers(cls, cashiers: list[Cashier]) -> "CashierColumns":
+        """Build the columns from a list of cashiers"""
+        return cls(
+            names=[cashier.name for cashier in cashiers],
+            morning=np.array(
+                [cashier.available_in_the_morning for cashier in cashiers], dtype=bool),
+            afternoon=np.array(
+                [cashier.available_in_the_afternoon for cashier in cashiers], dtype=bool),
+            effectiveness=np.array(
+                [cashier.effectiveness_average for cashier in cashiers], dtype=np.float64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> Cashier:
+        return Cashier(
+            name=self.names[index],
+            available_in_the_morning=bool(self.morning[index]),
+            available_in_the_afternoon=bool(self.afternoon[index]),
+            effectiveness_average=float(self.effectiveness[index])
+        )
+
+
+@dataclass(slots=True)
+class SolverColumns:
+    """Solver Columns.
+    The solver vars stored as columns, one row per (cashier, client) pair and
+    aligned with the list of `SolverVar`. Used to read a solution of the
+    solver at once, instead of evaluating each variable:
+        - cashier: Index of the cashier of the pair
+        - client: Index of the client of the pair
+        - duration: Duration of the pair
+        - start: Index of the start variable in the model
+        - active: Index of the active variable in the model
+    """
+    cashier: np.ndarray
+    client: np.ndarray
+    duration: np.ndarray
+    start: np.ndarray
+    active: np.ndarray
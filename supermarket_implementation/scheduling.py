@@ -1,43 +1,159 @@
 """
 Main implementation of the problem for the super market issue
 """
+import os
 from time import time
+from typing import Callable, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+import numpy as np
 # OR Tools import
 from ortools.sat.python import cp_model
 # Local imports
 from supermarket_implementation.models import (
-    Cashier, Client, SolverVar, SolutionVar
+    Cashier, Client, SolverVar, SolutionVar, SolverParameters, SolverStats,
+    ClientColumns, SolverColumns
 )
 from supermarket_implementation.utils import clients as client_utils
 from supermarket_implementation.utils import problem as problem_utils
+from supermarket_implementation.utils import heuristic as heuristic_utils
+from supermarket_implementation.utils import decomposition as decomposition_utils
+from supermarket_implementation.utils import flow as flow_utils
+from supermarket_implementation.utils.table import SolutionTable
 
+# Ways to solve the problem:
+#  - cp_sat: Optimize the schedule using the CP-SAT solver
+#  - heuristic: Assign each client to the eligible cashier that gets free first
+#  - rolling: Split the day into time windows and optimize them one after the other
+#  - flow: Assign the clients to time slots of the cashiers as a min cost flow
+SolverMode = Literal["cp_sat", "heuristic", "rolling", "flow"]
+# Ways to model the cashiers in the CP-SAT model:
+#  - intervals: One optional interval per (cashier, client) pair, without overlaps per cashier
+#  - cumulative: The interchangeable cashiers are one resource, with their number as capacity
+Formulation = Literal["intervals", "cumulative"]
+# Function called with each improving solution found by the solver
+SolutionHandler = Callable[[SolutionTable, SolverStats], None]
 
-class CashierScheduling:
+
+class CashierScheduling:  # pylint: disable=R0902
     """Implement a class that schedules
     the assignation of clients to different cashiers.
 
-    <ADD_MORE>
+    To keep the model small, each client can only start within a window after
+    its arrival. The window is given by `max_wait` (in minutes) or, if it's not
+    provided, by the longest wait of a fast heuristic schedule. Use `prune=False`
+    to let the clients start at any time of the day.
+
+    Using `max_candidates` also limits each client to that number of cashiers: the
+    ones that the heuristic schedule uses for the clients arriving around
+    the same time.
+
+    The cashiers with the same availability and effectiveness are interchangeable.
+    With `break_symmetries`, the model only keeps one of their permutations (this
+    is skipped when the cashiers are limited with `max_candidates`). With the
+    `cumulative` formulation, each group of interchangeable cashiers is modeled as a
+    single resource instead, and its clients are assigned to them after the solve.
+
+    The solver starts from an initial solution (`warm_start`): the one given in
+    `set_initial_solution` (for example, the results of a similar day) and, for the
+    clients that aren't there, the heuristic schedule. If the solver doesn't find
+    any solution in time, the heuristic schedule is returned instead.
+
+    The solver uses the given `parameters` (time limit, workers, gap...) and, after
+    each solve, the `stats` method returns a summary of the search.
+
+    With the `rolling` mode, the day is split into windows of `window` minutes (by
+    default, the morning and afternoon shifts). Each window is solved with the clients
+    arriving in the next `window_overlap` minutes as lookahead, and starting from the
+    cashiers that are still busy with the previous window. The parts of the day that
+    don't share any cashier time are solved in parallel (up to `window_workers`).
+
+    The variables of the model are only named when `debug` is True.
     """
     _cashiers: list[Cashier]
     _clients: list[Client]
     _solution: list[SolverVar]
+    _columns: Optional[SolverColumns]
+    _client_columns: Optional[ClientColumns]
+    _assignments: list[SolutionVar]
+    _assigned: bool
     _model: cp_model.CpModel
+    _max_wait: Optional[int]
+    _max_candidates: Optional[int]
+    _prune: bool
+    _warm_start: bool
+    _break_symmetries: bool
+    _formulation: Formulation
+    _classes: list[list[int]]
+    _initial_solution: list[SolutionVar]
+    _parameters: SolverParameters
+    _stats: Optional[SolverStats]
+    _busy_until: dict[str, int]
+    _window: int
+    _window_overlap: int
+    _window_workers: int
+    _windows: list["CashierScheduling"]
+    _stopped: bool
+    _debug: bool
     solver: cp_model.CpSolver
     # Define the slots for this class
     __slots__ = [
-        "_cashiers", "_clients", "_solution",
-        "_model", "solver"
+        "_cashiers", "_clients", "_solution", "_columns", "_client_columns",
+        "_assignments", "_assigned", "_model",
+        "_max_wait", "_max_candidates", "_prune", "_warm_start", "_break_symmetries",
+        "_formulation", "_classes",
+        "_initial_solution", "_parameters", "_stats", "_busy_until", "_window",
+        "_window_overlap", "_window_workers", "_windows", "_stopped", "_debug", "solver"
     ]
 
-    def __init__(self) -> None:
+    def __init__(  # pylint: disable=R0913
+        self,
+        max_wait: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+        prune: bool = True,
+        warm_start: bool = True,
+        break_symmetries: bool = False,
+        formulation: Formulation = "intervals",
+        parameters: Optional[SolverParameters] = None,
+        window: int = problem_utils.SHIFT_CHANGE,
+        window_overlap: int = 30,
+        window_workers: Optional[int] = None,
+        debug: bool = False
+    ) -> None:
         self._cashiers = []
         self._clients = []
         self._solution = []
-        # Create the model
+        # Columns of the solver vars, to read the solution at once
+        self._columns = None
+        self._client_columns = None
+        # Solution of the modes that don't use the CP-SAT model. It can be
+        # empty (a day without clients), so `_assigned` tells if it's been solved
+        self._assignments = []
+        self._assigned = False
+        self._max_wait = max_wait
+        self._max_candidates = max_candidates
+        self._prune = prune
+        self._warm_start = warm_start
+        self._break_symmetries = break_symmetries
+        self._formulation = formulation
+        # Classes of cashiers modeled as one resource (for the cumulative formulation)
+        self._classes = []
+        self._initial_solution = []
+        self._parameters = parameters if parameters is not None else SolverParameters()
+        self._stats = None
+        # Minute at which each cashier gets free (by name), if it starts busy
+        self._busy_until = {}
+        self._window = window
+        self._window_overlap = window_overlap
+        self._window_workers = window_workers or os.cpu_count() or 1
+        # Schedulings of the windows being solved, for the rolling mode
+        self._windows = []
+        self._stopped = False
+        self._debug = debug
+        # Create the model. Each call to `solve` would replace them
+        # with a new model and solver built only for that call
         self._model = cp_model.CpModel()
-        self.solver = cp_model.CpSolver()
-        # Also, set the timing to find a solution to 15 seconds
-        self.solver.parameters.max_time_in_seconds = 15
+        self.solver = self.__new_solver()
 
     def set_cashiers(self, cashiers: list[Cashier]) -> None:
         """Set the cashiers that are available to be in the work schedule for the day"""
@@ -47,24 +163,58 @@ class CashierScheduling:
         """Set the cashiers that are available to be in the work schedule for the day"""
         self._clients = clients
 
-    def generate_clients(self, morning_variance: float, afternoon_variance: float) -> list[Client]:
+    def set_initial_solution(self, solution: list[SolutionVar]) -> None:
+        """Set the solution used to warm start the solver.
+
+        It could come from any earlier solve. The clients are matched using their ID
+        and the cashiers using their name, so only the clients (and cashiers) that
+        are still in the problem are used.
+        """
+        self._initial_solution = solution
+
+    def set_busy_until(self, busy_until: dict[str, int]) -> None:
+        """Set the minute at which each cashier (by name) gets free.
+
+        Useful to continue the schedule of an earlier part of the day: the
+        clients cannot start with a cashier until it's free.
+        """
+        self._busy_until = busy_until
+
+    def generate_clients(
+        self,
+        morning_variance: float,
+        afternoon_variance: float,
+        seed: Optional[int] = None
+    ) -> list[Client]:
         """Generate the possible clients that are going to attend to the
-        supermarket in this day.
+        supermarket in this day. Using the same `seed` generates the same clients.
         """
         # * NOTE: We use this method for two things:
         # *  - 1) To append the clients to the class
         # *  - 2) We'll add extra methods such to generate the clients
         self._clients = client_utils.generate_clients_based_on_poisson(
-            morning_variance, afternoon_variance
+            morning_variance, afternoon_variance, seed
         )
         # Based on this, set the clients
         return self._clients
 
-    def solve(self) -> None:
+    def solve(
+        self,
+        mode: SolverMode = "cp_sat",
+        on_solution: Optional[SolutionHandler] = None
+    ) -> None:
         """Solve the problem.
 
         Using a different group of possible solutions (such as the queue model)
-        would help us to define a better solution of the model
+        would help us to define a better solution of the model. With the
+        `heuristic` mode, we skip the solver and use a fast greedy schedule
+        instead, for the days that are too big or when there's no time to wait.
+        The `rolling` mode solves the day by windows (see the class documentation).
+        The `flow` mode assigns the clients to time slots of the cashiers with a
+        min cost flow, which scales to tens of thousands of clients.
+
+        The `on_solution` function is called with each improving solution that
+        the solver finds (and its stats), while the search keeps running.
         """
         # Evaluate if we have clients and cashiers
         if not self._cashiers:
@@ -73,43 +223,504 @@ class CashierScheduling:
         if not self._clients:
             raise Warning("There is no clients to attend to the supermarket." +
                           " Generate some using the method `generate_clients`")
+        if mode not in ("cp_sat", "heuristic", "rolling", "flow"):
+            raise ValueError(f"Unknown mode `{mode}` to solve the problem")
+        self._solution = []
+        self._columns = None
+        self._assignments = []
+        self._assigned = False
+        self._stats = None
+        self._windows = []
+        self._stopped = False
+        start_time = time()
 
-        # Then, generate the variables for the problem
-        self._solution = problem_utils.ignite_variables(
-            self._clients, self._cashiers, self._model)
-        # Ignite the constraints and the objectives
-        problem_utils.ignite_constraints(self._solution, self._model)
-        problem_utils.ignite_objectives(self._solution, self._model)
+        if mode == "rolling":
+            self.__solve_rolling(start_time)
+            print(
+                f"The problem has been solved by windows in {time() - start_time} seconds!")
+            return
+        if mode == "heuristic":
+            self.__solve_with_heuristic(start_time)
+            print(
+                f"The problem has been solved with the heuristic in {time() - start_time} seconds!")
+            return
+        if mode == "flow":
+            self.__solve_with_flow(start_time)
+            print(
+                f"The problem has been solved as a min cost flow in {time() - start_time} seconds!")
+            return
+        # Then, build a new model for this call. Reusing the previous model
+        # would keep adding variables and constraints to it on each solve
+        self._model, self._solution = self.build_model()
+        self._columns = problem_utils.solver_columns(
+            self._solution, self._clients, self._cashiers)
+        self._client_columns = ClientColumns.from_clients(self._clients)
+        self.solver = self.__new_solver()
+        build_time = time() - start_time
         # At the end, just run the optimization!
-        start_time = time()
-        status = self.solver.Solve(self._model)
+        if on_solution is not None:
+            status = self.solver.Solve(self._model, SolutionCallback(
+                lambda values: self.__table(values, False), on_solution, start_time))
+        else:
+            status = self.solver.Solve(self._model)
 
+        if status == cp_model.UNKNOWN and self._warm_start:
+            # The solver ran out of time before finding a solution. Since the
+            # heuristic schedule is always feasible, use it instead
+            print("The solver didn't find a solution in time. Using the heuristic schedule...")
+            self._solution = []
+            self._columns = None
+            self.__solve_with_heuristic(start_time)
+            self._stats = replace(self._stats, **self.__search_stats(build_time))
+            return
         if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
             raise RuntimeError("The problem cannot be solved...")
+        objective = self.solver.ObjectiveValue()
+        bound = self.solver.BestObjectiveBound()
+        self._stats = SolverStats(
+            status=self.solver.StatusName(status),
+            objective_value=objective,
+            best_bound=bound,
+            gap=abs(objective - bound) / max(1.0, abs(objective)),
+            wall_time=time() - start_time,
+            **self.__search_stats(build_time)
+        )
         # Otherwise, print that the solution has runned succesfully
         print(
             f"The problem has been solved succesfully in {time() - start_time} seconds!")
 
+    def update(  # pylint: disable=R0913,R0914
+        self,
+        added: Optional[list[Client]] = None,
+        removed: Optional[list[int]] = None,
+        modified: Optional[list[Client]] = None,
+        now: int = 0,
+        horizon: int = 60,
+        mode: SolverMode = "cp_sat"
+    ) -> None:
+        """Change some clients and re-optimize only the part of the day that is affected.
+
+        The clients can be `added`, `removed` (by ID) or `modified` (replaced by the
+        client with the same ID, for example with a new arrival time or products).
+        The assignments that start before `now` are frozen, since those clients are
+        already served or being served, and nothing can start before it. The
+        assignments that start before the first change are kept as they are too.
+
+        The changed clients, and the clients of the previous solution that start
+        between the first change and `horizon` minutes after the last one, are solved
+        again with `mode`, using the previous solution as hints. The later clients keep
+        their cashier and order, only delayed if their cashier is still busy when they
+        start. So the time spent depends on the size of the change, not of the day.
+        """
+        previous = self.results()
+        added, removed, modified = added or [], removed or [], modified or []
+        previous_by_id = {var.client.id: var for var in previous}
+        changed_ids = set(removed) | {client.id for client in modified}
+        for client_id in changed_ids:
+            if client_id in previous_by_id and previous_by_id[client_id].start < now:
+                raise ValueError(f"The client {client_id} has already been attended")
+        clients = decomposition_utils.apply_changes(self._clients, added, removed, modified)
+        start_time = time()
+
+        # Split the previous solution at the first minute affected by the change
+        new_clients = added + modified
+        first_change = max(now, min(
+            [client.arrival_time for client in new_clients] +
+            [previous_by_id[client_id].start
+             for client_id in changed_ids if client_id in previous_by_id],
+            default=now
+        ))
+        unchanged = [var for var in previous if var.client.id not in changed_ids]
+        frozen = [var for var in unchanged if var.start < first_change]
+        future = sorted(
+            (var for var in unchanged if var.start >= first_change), key=lambda var: var.start)
+        busy_until = decomposition_utils.carry_over(frozen, self._busy_until)
+        busy_until = {
+            cashier.name: max(busy_until.get(cashier.name, 0), now) for cashier in self._cashiers
+        }
+
+        # Solve again the changed clients and the ones that start up to `horizon`
+        # minutes after the last change. The rest keep their cashier and order
+        end = max([first_change] + [client.arrival_time for client in new_clients]) + horizon
+        replanned = [var for var in future if var.start < end]
+        solution: list[SolutionVar] = []
+        if new_clients or replanned:
+            window = self.__window(
+                new_clients + [var.client for var in replanned], busy_until,
+                self._parameters.num_workers or os.cpu_count() or 1, len(clients)
+            )
+            window.set_initial_solution(previous)
+            self._windows.append(window)
+            window.solve(mode)
+            self._windows.remove(window)
+            solution = window.results()
+        rest = decomposition_utils.push_back(
+            future[len(replanned):], decomposition_utils.carry_over(solution, busy_until))
+
+        # Return the solution in the same order of the clients. The clients are
+        # only replaced now, so a failed update keeps the previous problem
+        position = {client.id: index for index, client in enumerate(clients)}
+        assignments = sorted(frozen + solution + rest, key=lambda var: position[var.client.id])
+        self._clients = clients
+        self._assignments = assignments
+        self._assigned = True
+        self._solution = []
+        self._columns = None
+        # * NOTE: Only a part of the day is optimized, so there's no bound of the whole day
+        self._stats = self.__unbounded_stats("INCREMENTAL", start_time)
+        print(
+            f"The problem has been updated in {time() - start_time} seconds!" +
+            f" ({len(solution)} of {len(self._clients)} clients solved again)")
+
+    def build_model(self) -> tuple[cp_model.CpModel, list[SolverVar]]:  # pylint: disable=R0914
+        """Build a new model using the current cashiers and clients.
+
+        The model is independent of any other model built before,
+        so it's safe to build (and solve) several of them.
+        """
+        model = cp_model.CpModel()
+        ready = self.__ready_times()
+        ready_times = np.array(ready, dtype=np.int64) if ready is not None else None
+        schedule = heuristic_utils.greedy_schedule(self._clients, self._cashiers, ready)
+        horizon, max_wait, candidates = self.__pruning_bounds(schedule)
+        cumulative = self._formulation == "cumulative"
+        # * NOTE: With candidates, the interchangeable cashiers could have different
+        # * pairs, so we can only break their symmetry without them
+        break_symmetries = self._break_symmetries and candidates is None and not cumulative
+        classes: list[list[int]] = []
+        if cumulative or break_symmetries:
+            classes = problem_utils.cashier_classes(
+                self._cashiers,
+                problem_utils.duration_matrix(self._clients, self._cashiers),
+                ready_times
+            )
+        self._classes = classes if cumulative else []
+        cashiers, capacities, rename = self._cashiers, None, None
+        if cumulative:
+            # Each class is modeled using its first cashier
+            cashiers = [self._cashiers[members[0]] for members in classes]
+            capacities = {
+                cashier.name: len(members) for cashier, members in zip(cashiers, classes)}
+            rename = {
+                self._cashiers[member].name: self._cashiers[members[0]].name
+                for members in classes for member in members
+            }
+            class_of = {
+                member: index for index, members in enumerate(classes) for member in members}
+            if candidates is not None:
+                candidates = [{class_of[index] for index in indexes} for indexes in candidates]
+            if ready_times is not None:
+                ready_times = ready_times[[members[0] for members in classes]]
+        # Generate the variables for the problem
+        solution = problem_utils.ignite_variables(
+            self._clients, cashiers, model, max_wait, horizon, candidates,
+            ready_times, self._debug
+        )
+        # Ignite the constraints and the objectives
+        problem_utils.ignite_constraints(solution, model, self._debug, capacities)
+        problem_utils.ignite_objectives(solution, model)
+        if break_symmetries:
+            problem_utils.ignite_symmetry_breaking(
+                solution, model, classes, self._clients, self._cashiers)
+        if self._warm_start:
+            hints = self.__hints(schedule, solution, rename)
+            if break_symmetries:
+                hints = problem_utils.relabel_hints(
+                    hints, classes, self._clients, self._cashiers)
+            problem_utils.ignite_hints(solution, model, hints)
+        return model, solution
+
+    def stop(self) -> None:
+        """Stop the search of the solver (if it's running).
+
+        This method is safe to call from another thread. The solver would
+        finish with the best solution that it has found so far.
+        """
+        self._stopped = True
+        self.solver.StopSearch()
+        for window in list(self._windows):
+            window.stop()
+
+    def stats(self) -> SolverStats:
+        """Once the scheduling has been made, return the summary of the search"""
+        if self._stats is None:
+            raise Warning(
+                "There's no solution available. Please run the `solve` method first.")
+        return self._stats
+
     def results(self, include_inactive: bool = False) -> list[SolutionVar]:
         """Once the scheduling has been made, return the vars that define the solution."""
-        if not self._solution:
+        if self._assigned:
+            # These modes only have the active vars
+            return list(self._assignments)
+        # Convert the solution of the solver to solution vars. If we want
+        # to include the inactive too, they're not filtered
+        return self.table(include_inactive).to_solution(self._clients, self._cashiers)
+
+    def table(self, include_inactive: bool = False) -> SolutionTable:
+        """Once the scheduling has been made, return the solution as columns.
+
+        It's the same solution that `results` returns, but it doesn't create
+        an object for each row, so it's lighter for the big problems.
+        """
+        if self._assigned:
+            return SolutionTable.from_solution(self._assignments)
+        if self._columns is None:
             raise Warning(
                 "There's no solution available. Please run the `solve` method first.")
-        # Convert the solver var to solution vars
-        solutions_vars = [
-            SolutionVar(
-                cashier=var.cashier,
-                client=var.client,
-                start=self.solver.Value(var.start),
-                end=self.solver.Value(var.end),
-                duration=var.duration,
-                active=self.solver.Value(var.active),
-            )
-            for var in self._solution
+        return self.__table(
+            np.array(self.solver.ResponseProto().solution, dtype=np.int64), include_inactive)
+
+    # ========================= #
+    #      Helper methods       #
+    # ========================= #
+
+    def __pruning_bounds(
+        self,
+        schedule: list[Optional[heuristic_utils.Assignment]]
+    ) -> tuple[int, Optional[int], Optional[list[set[int]]]]:
+        """Get the horizon, the maximum wait and the candidate cashiers of the clients.
+
+        All of them come from the heuristic schedule, so we know that the
+        model has at least one feasible solution within these bounds.
+        """
+        assigned = [
+            (client, assignment)
+            for client, assignment in zip(self._clients, schedule)
+            if assignment is not None
         ]
-        # Return the solution. If we want to include the inactive too, then
-        # return simply the reference to the solution
-        if include_inactive is True:
-            return solutions_vars
-        # Otherwise, return the filtered solution. Convert each
-        return [var for var in solutions_vars if var.active]
+        # The clients in the queue are attended even after closing time
+        horizon = max(
+            [problem_utils.CLOSING_TIME] + [end for _, (_, _, end) in assigned]
+        )
+        if self._prune is False:
+            return horizon, self._max_wait, None
+        # Get the candidates of each client
+        candidates = None
+        if self._max_candidates is not None:
+            candidates = heuristic_utils.nearby_cashiers(
+                self._clients, schedule, self._max_candidates)
+        if self._max_wait is not None:
+            return horizon, self._max_wait, candidates
+        return horizon, max(
+            (start - client.arrival_time for client, (_, start, _) in assigned),
+            default=0
+        ), candidates
+
+    def __hints(
+        self,
+        schedule: list[Optional[heuristic_utils.Assignment]],
+        solution: list[SolverVar],
+        rename: Optional[dict[str, str]] = None
+    ) -> dict[int, tuple[str, int]]:
+        """Get the initial assignment of each client, as (cashier name, start).
+
+        We use the initial solution when its (cashier, client) pair is in the
+        model, and the heuristic schedule otherwise. The cashiers are renamed
+        using `rename` (if given), for the cashiers modeled by another one.
+        """
+        rename = rename or {}
+        pairs = {(var.client.id, var.cashier.name) for var in solution}
+        hints: dict[int, tuple[str, int]] = {}
+        for client, assignment in zip(self._clients, schedule):
+            if assignment is not None:
+                name = self._cashiers[assignment[0]].name
+                hints[client.id] = (rename.get(name, name), assignment[1])
+        for var in self._initial_solution:
+            name = rename.get(var.cashier.name, var.cashier.name)
+            if (var.client.id, name) in pairs:
+                hints[var.client.id] = (name, var.start)
+        return hints
+
+    def __search_stats(self, build_time: float) -> dict[str, float]:
+        """Counters of the last search and size of its model, for the `SolverStats`"""
+        proto = self._model.Proto()
+        return {
+            "build_time": build_time,
+            "branches": self.solver.NumBranches(),
+            "conflicts": self.solver.NumConflicts(),
+            "variables": len(proto.variables),
+            "constraints": len(proto.constraints),
+        }
+
+    def __unbounded_stats(self, status: str, start_time: float) -> SolverStats:
+        """Stats of the current assignments, for the modes that don't find a bound
+        of the objective. Without a bound, the gap is the whole objective
+        """
+        objective = problem_utils.objective_value(self._assignments)
+        return SolverStats(
+            status=status,
+            objective_value=objective,
+            best_bound=0,
+            gap=1.0 if objective else 0.0,
+            wall_time=time() - start_time
+        )
+
+    def __solve_with_heuristic(self, start_time: float) -> None:
+        """Use the heuristic schedule as the solution of the problem"""
+        self._assignments = heuristic_utils.solve_heuristic(
+            self._clients, self._cashiers, self.__ready_times())
+        self._assigned = True
+        # * NOTE: The heuristic doesn't give us a bound of the objective
+        self._stats = self.__unbounded_stats("HEURISTIC", start_time)
+
+    def __solve_with_flow(self, start_time: float) -> None:
+        """Use the min cost flow assignment (repaired) as the solution of the problem"""
+        self._assignments = flow_utils.solve_min_cost_flow(
+            self._clients, self._cashiers, ready=self.__ready_times())
+        self._assigned = True
+        # * NOTE: The cost of the flow isn't a bound, since the slots are an approximation
+        self._stats = self.__unbounded_stats("FLOW", start_time)
+
+    def __table(self, values: np.ndarray, include_inactive: bool) -> SolutionTable:
+        """Build the solution table from the values of the model variables"""
+        table = SolutionTable.from_values(
+            self._columns, values, self._client_columns,
+            [cashier.name for cashier in self._cashiers], include_inactive
+        )
+        if self._classes:
+            # Assign the clients of each resource to the cashiers that it represents
+            table.cashier = problem_utils.assign_class_members(
+                table.start, table.end, table.cashier, table.active, self._classes)
+        return table
+
+    def __solve_rolling(self, start_time: float) -> None:
+        """Solve the problem by windows, merging the solutions of all of them"""
+        schedule = heuristic_utils.greedy_schedule(
+            self._clients, self._cashiers, self.__ready_times())
+        blocks = decomposition_utils.independent_blocks(self._clients, schedule)
+        # The blocks are solved at the same time, assuming that each one of them
+        # starts with the cashiers free. This holds most of the time, since
+        # the heuristic has already left every cashier free between them
+        with ThreadPoolExecutor(min(self._window_workers, len(blocks))) as pool:
+            solutions = list(pool.map(
+                lambda block: self.__solve_block(block, self._busy_until, len(blocks)), blocks))
+        assignments: list[SolutionVar] = []
+        busy_until = self._busy_until
+        for block, solution in zip(blocks, solutions):
+            if not decomposition_utils.starts_after(solution, busy_until):
+                # The previous block keeps a cashier busy, so solve it again from there
+                solution = self.__solve_block(block, busy_until, 1)
+            assignments.extend(solution)
+            busy_until = decomposition_utils.carry_over(solution, busy_until)
+        # Return the solution in the same order of the clients
+        position = {client.id: index for index, client in enumerate(self._clients)}
+        self._assignments = sorted(assignments, key=lambda var: position[var.client.id])
+        self._assigned = True
+        # * NOTE: The bounds of the windows aren't a bound of the whole day
+        self._stats = self.__unbounded_stats("ROLLING", start_time)
+
+    def __solve_block(
+        self,
+        block: list[int],
+        busy_until: dict[str, int],
+        parallel: int
+    ) -> list[SolutionVar]:
+        """Solve the windows of a block one after the other, starting with the
+        cashiers busy until `busy_until`. There are `parallel` blocks being
+        solved at the same time, so the cores are shared between them.
+        """
+        workers = self._parameters.num_workers or os.cpu_count() or 1
+        solution: list[SolutionVar] = []
+        for committed, lookahead in decomposition_utils.time_windows(
+            self._clients, block, self._window, self._window_overlap
+        ):
+            clients = [self._clients[index] for index in committed + lookahead]
+            window = self.__window(
+                clients, busy_until, max(1, workers // min(parallel, self._window_workers)))
+            self._windows.append(window)
+            window.solve("heuristic" if self._stopped else "cp_sat")
+            self._windows.remove(window)
+            # Only keep the clients of this window. The lookahead goes with the next one
+            committed_ids = {self._clients[index].id for index in committed}
+            kept = [var for var in window.results() if var.client.id in committed_ids]
+            solution.extend(kept)
+            busy_until = decomposition_utils.carry_over(kept, busy_until)
+        return solution
+
+    def __window(
+        self,
+        clients: list[Client],
+        busy_until: dict[str, int],
+        workers: int,
+        day_size: Optional[int] = None
+    ) -> "CashierScheduling":
+        """Create a scheduling with the same settings for a part of the clients.
+
+        It gets a part of the time limit, based on its clients out of the `day_size`
+        (the clients of the problem by default), and starts with the cashiers busy
+        until `busy_until`.
+        """
+        window = CashierScheduling(
+            max_wait=self._max_wait,
+            max_candidates=self._max_candidates,
+            prune=self._prune,
+            warm_start=self._warm_start,
+            break_symmetries=self._break_symmetries,
+            formulation=self._formulation,
+            parameters=replace(
+                self._parameters,
+                max_time_in_seconds=self._parameters.max_time_in_seconds
+                * len(clients) / (day_size or len(self._clients)),
+                num_workers=workers
+            ),
+            debug=self._debug
+        )
+        window.set_cashiers(self._cashiers)
+        window.set_clients(clients)
+        window.set_busy_until(busy_until)
+        window.set_initial_solution(self._initial_solution)
+        return window
+
+    def __ready_times(self) -> Optional[list[int]]:
+        """Minute at which each cashier gets free (if any of them starts busy)"""
+        if not self._busy_until:
+            return None
+        return [self._busy_until.get(cashier.name, 0) for cashier in self._cashiers]
+
+    def __new_solver(self) -> cp_model.CpSolver:
+        """Create a new solver with the parameters of this scheduling"""
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = self._parameters.max_time_in_seconds
+        solver.parameters.num_workers = self._parameters.num_workers
+        solver.parameters.relative_gap_limit = self._parameters.relative_gap_limit
+        solver.parameters.log_search_progress = self._parameters.log_search_progress
+        return solver
+
+
+class SolutionCallback(cp_model.CpSolverSolutionCallback):
+    """Solution callback that gives each improving solution found by
+    the solver to a `SolutionHandler`.
+
+    The solution is given as a `SolutionTable`, built with the `table`
+    function from the values of the model variables.
+    """
+    _table: Callable[[np.ndarray], SolutionTable]
+    _handler: SolutionHandler
+    _start_time: float
+
+    def __init__(
+        self,
+        table: Callable[[np.ndarray], SolutionTable],
+        handler: SolutionHandler,
+        start_time: float
+    ) -> None:
+        super().__init__()
+        self._table = table
+        self._handler = handler
+        self._start_time = start_time
+
+    def on_solution_callback(self) -> None:
+        """Called by the solver with each new solution"""
+        objective = self.ObjectiveValue()
+        bound = self.BestObjectiveBound()
+        self._handler(
+            self._table(np.array(self.Response().solution, dtype=np.int64)),
+            SolverStats(
+                status="FEASIBLE",
+                objective_value=objective,
+                best_bound=bound,
+                gap=abs(objective - bound) / max(1.0, abs(objective)),
+                wall_time=time() - self._start_time
+            )
+        )
@@ -0,0 +1,300 @@
+"""
+Staffing what-if sweeps. They evaluate many rosters (the cashiers of a day) for
+the same clients, to find the cheapest one that meets a service level.
+
+The rosters are solved in parallel, in waves of one roster per process, from
+the cheapest to the most expensive. Once a roster attends every client without
+waiting, the more expensive ones can't improve it, so they're pruned.
+
+When the rosters are given as a range of cashiers per shift, each shift is solved
+on its own: the morning cashiers only attend the morning clients (and the
+afternoon ones the afternoon clients), so the KPIs of a roster are the sum of
+its shifts. Instead of one solve per combination, there's one per count of each shift.
+"""
+from typing import Iterator, Optional
+import os
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+# Local imports
+from supermarket_implementation.models import Cashier, Client, SolverParameters
+from supermarket_implementation.scheduling import CashierScheduling, SolverMode
+from supermarket_implementation.batch import batch_parameters
+from supermarket_implementation.utils.problem import SHIFT_CHANGE
+from supermarket_implementation.utils.table import SERVICE_LEVEL_THRESHOLD
+
+# Sums of a solution: number of clients, waiting time and clients attended on time
+Totals = tuple[int, int, int]
+
+
+@dataclass
+class RosterEvaluation:
+    """Roster Evaluation.
+    KPIs of a roster for the clients of the sweep:
+        - cashiers: Cashiers of the roster
+        - cost: Number of shifts worked (a cashier of both shifts counts twice)
+        - service_level: Portion of the clients attended in the first 3 minutes
+        - waiting_time: Average time since the client arrives until it gets to the cashier
+        - error: Reason why the roster cannot attend the clients, if any
+    """
+    cashiers: list[Cashier]
+    cost: int
+    service_level: float = 0.0
+    waiting_time: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class StaffingSweep:
+    """Staffing Sweep.
+    Result of a sweep:
+        - evaluations: Rosters evaluated, sorted by cost
+        - front: Rosters of the Pareto front of cost, service level and waiting time
+        - pruned: Number of rosters skipped, since a cheaper one already had no waiting
+    """
+    evaluations: list[RosterEvaluation]
+    front: list[RosterEvaluation]
+    pruned: int
+
+    def cheapest(self, service_level: float) -> Optional[RosterEvaluation]:
+        """Get the cheapest roster of the front that meets the service level"""
+        return next((
+            evaluation for evaluation in self.front
+            if evaluation.service_level >= service_level
+        ), None)
+
+
+def sweep_rosters(  # pylint: disable=R0913
+    clients: list[Client],
+    rosters: list[list[Cashier]],
+    mode: SolverMode = "heuristic",
+    parameters: Optional[SolverParameters] = None,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None
+) -> StaffingSweep:
+    """Evaluate each roster with the given clients.
+
+    The rosters are solved with the `mode` (the fast heuristic or a CP-SAT search
+    limited by the `parameters`) in the `executor`, `max_workers` at a time. Without
+    an `executor`, a pool of processes is created for the sweep.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    parameters = batch_parameters(parameters or SolverParameters(), max_workers)
+    evaluations = sorted(
+        (RosterEvaluation(cashiers=roster, cost=roster_cost(roster)) for roster in rosters),
+        key=lambda evaluation: evaluation.cost
+    )
+    for evaluation in evaluations:
+        evaluation.error = roster_error(evaluation.cashiers, clients)
+    feasible = [evaluation for evaluation in evaluations if evaluation.error is None]
+    with worker_pool(executor, max_workers) as pool:
+        totals = evaluate_in_waves(
+            pool, max_workers, [evaluation.cost for evaluation in feasible],
+            [(evaluation.cashiers, clients, mode, parameters) for evaluation in feasible]
+        )
+    evaluated = []
+    for evaluation, roster_totals in zip(feasible, totals):
+        if roster_totals is not None:
+            evaluation.service_level, evaluation.waiting_time = roster_kpis(roster_totals)
+            evaluated.append(evaluation)
+    evaluated += [evaluation for evaluation in evaluations if evaluation.error is not None]
+    return StaffingSweep(
+        evaluations=evaluated,
+        front=pareto_front(evaluated),
+        pruned=len(evaluations) - len(evaluated)
+    )
+
+
+def sweep_shift_counts(  # pylint: disable=R0913,R0914
+    clients: list[Client],
+    morning_counts: range,
+    afternoon_counts: range,
+    effectiveness: float = 1.0,
+    mode: SolverMode = "heuristic",
+    parameters: Optional[SolverParameters] = None,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None
+) -> StaffingSweep:
+    """Evaluate every roster with a number of morning cashiers in `morning_counts`
+    and of afternoon cashiers in `afternoon_counts`, all of them with the same
+    `effectiveness`. Each cashier works in only one shift.
+
+    The shifts are solved on their own, as in `sweep_rosters`, and then combined.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    parameters = batch_parameters(parameters or SolverParameters(), max_workers)
+    shifts = (
+        ([client for client in clients if client.arrival_time <= SHIFT_CHANGE],
+         morning_counts, True),
+        ([client for client in clients if client.arrival_time > SHIFT_CHANGE],
+         afternoon_counts, False),
+    )
+    shift_totals: list[dict[int, Totals]] = []
+    candidates = 1
+    with worker_pool(executor, max_workers) as pool:
+        for shift_clients, counts, morning in shifts:
+            # A shift with clients needs at least one cashier
+            counts = [count for count in counts if count > 0 or not shift_clients]
+            candidates *= len(counts)
+            totals = evaluate_in_waves(pool, max_workers, counts, [
+                (shift_cashiers(count, morning, effectiveness), shift_clients, mode, parameters)
+                for count in counts
+            ])
+            shift_totals.append({
+                count: count_totals for count, count_totals in zip(counts, totals)
+                if count_totals is not None
+            })
+
+    evaluations = []
+    for morning_count, morning_totals in shift_totals[0].items():
+        for afternoon_count, afternoon_totals in shift_totals[1].items():
+            service_level, waiting_time = roster_kpis(tuple(
+                morning_value + afternoon_value
+                for morning_value, afternoon_value in zip(morning_totals, afternoon_totals)
+            ))
+            evaluations.append(RosterEvaluation(
+                cashiers=shift_cashiers(morning_count, True, effectiveness) +
+                shift_cashiers(afternoon_count, False, effectiveness),
+                cost=morning_count + afternoon_count,
+                service_level=service_level,
+                waiting_time=waiting_time
+            ))
+    evaluations.sort(key=lambda evaluation: evaluation.cost)
+    return StaffingSweep(
+        evaluations=evaluations,
+        front=pareto_front(evaluations),
+        pruned=candidates - len(evaluations)
+    )
+
+
+def pareto_front(evaluations: list[RosterEvaluation]) -> list[RosterEvaluation]:
+    """Get the rosters that no other roster dominates: none is as cheap, with as
+    much service level and as little waiting time, and better in one of them.
+
+    The rosters with an error are skipped. The front is sorted by cost.
+    """
+    candidates = sorted(
+        (evaluation for evaluation in evaluations if evaluation.error is None),
+        key=lambda evaluation: (
+            evaluation.cost, -evaluation.service_level, evaluation.waiting_time)
+    )
+    front: list[RosterEvaluation] = []
+    for evaluation in candidates:
+        # * NOTE: The candidates are sorted, so only a previous one could dominate it
+        if not any(
+            kept.service_level >= evaluation.service_level and
+            kept.waiting_time <= evaluation.waiting_time
+            for kept in front
+        ):
+            front.append(evaluation)
+    return front
+
+
+# ========================= #
+#      Helper methods       #
+# ========================= #
+
+
+def evaluate_in_waves(
+    pool: Executor,
+    max_workers: int,
+    costs: list[int],
+    tasks: list[tuple[list[Cashier], list[Client], SolverMode, SolverParameters]]
+) -> list[Optional[Totals]]:
+    """Get the totals of each task (sorted by cost), solving `max_workers` at a time.
+
+    Once a task has no waiting, the tasks that cost more are skipped (their totals
+    are None), since they can't attend the clients better.
+    """
+    results: list[Optional[Totals]] = [None] * len(tasks)
+    saturated_cost: Optional[int] = None
+    for first in range(0, len(tasks), max_workers):
+        wave = [
+            index for index in range(first, min(first + max_workers, len(tasks)))
+            if saturated_cost is None or costs[index] <= saturated_cost
+        ]
+        if not wave:
+            break
+        wave_tasks = zip(*(tasks[index] for index in wave))
+        for index, totals in zip(wave, pool.map(solve_totals, *wave_tasks)):
+            results[index] = totals
+            if totals[1] == 0 and (saturated_cost is None or costs[index] < saturated_cost):
+                saturated_cost = costs[index]
+    return results
+
+
+def solve_totals(
+    cashiers: list[Cashier],
+    clients: list[Client],
+    mode: SolverMode = "heuristic",
+    parameters: Optional[SolverParameters] = None
+) -> Totals:
+    """Solve the roster and get the totals of its solution. It's executed
+    inside the pool of processes
+    """
+    if not clients:
+        return 0, 0, 0
+    scheduler = CashierScheduling(parameters=parameters)
+    scheduler.set_cashiers(cashiers)
+    scheduler.set_clients(clients)
+    scheduler.solve(mode)
+    table = scheduler.table()
+    waiting = table.start - table.arrival
+    return len(table), int(waiting.sum()), int((waiting <= SERVICE_LEVEL_THRESHOLD).sum())
+
+
+def roster_kpis(totals: Totals) -> tuple[float, float]:
+    """Get the service level and the waiting time from the totals.
+
+    They're rounded to 3 decimals instead of the 1 of `kpis`, so the rosters
+    with close KPIs can still be told apart in the front.
+    """
+    count, waiting, on_time = totals
+    if not count:
+        return 1.0, 0.0
+    return round(on_time / count, 3), round(waiting / count, 3)
+
+
+def roster_cost(cashiers: list[Cashier]) -> int:
+    """Number of shifts worked by the cashiers"""
+    return sum(
+        cashier.available_in_the_morning + cashier.available_in_the_afternoon
+        for cashier in cashiers
+    )
+
+
+def roster_error(cashiers: list[Cashier], clients: list[Client]) -> Optional[str]:
+    """Check that there's a cashier for each shift with clients"""
+    for name, afternoon in (("morning", False), ("afternoon", True)):
+        if any((client.arrival_time > SHIFT_CHANGE) == afternoon for client in clients) and \
+                not any(
+                    cashier.available_in_the_afternoon if afternoon
+                    else cashier.available_in_the_morning
+                    for cashier in cashiers
+                ):
+            return f"There's no cashier available in the {name}"
+    return None
+
+
+def shift_cashiers(count: int, morning: bool, effectiveness: float = 1.0) -> list[Cashier]:
+    """Get `count` cashiers that only work in the morning (or the afternoon)"""
+    prefix = "Morning" if morning else "Afternoon"
+    return [
+        Cashier(
+            name=f"{prefix} {number}",
+            available_in_the_morning=morning,
+            available_in_the_afternoon=not morning,
+            effectiveness_average=effectiveness
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+@contextmanager
+def worker_pool(executor: Optional[Executor], max_workers: int) -> Iterator[Executor]:
+    """Use the given executor, or a new pool of processes that's closed at the end"""
+    if executor is not None:
+        yield executor
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield pool
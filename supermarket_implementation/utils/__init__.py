@@ -5,7 +5,14 @@ In the utilities, we add things that help the generation of different stuff such
 
 - The utilities to create the clients
 - The utilities to initialize the variables
+- A heuristic schedule, to bound the optimization model
+- A min cost flow assignment, for the biggest days
+- A simulation of the staffing plans over many random days
 - Similar things
 """
 from supermarket_implementation.utils import clients
 from supermarket_implementation.utils import problem
+from supermarket_implementation.utils import heuristic
+from supermarket_implementation.utils import decomposition
+from supermarket_implementation.utils import flow
+from supermarket_implementation.utils import simulation
@@ -2,61 +2,106 @@
 Add extra utilities for the clients, such as a client generator based on the
 poisson distribution
 """
-import typing as tp
+from typing import Union
 # External imports
 import numpy as np
+from numpy.typing import ArrayLike
 # Local imports
 from supermarket_implementation.models import Client
 
+SHIFT_MINUTES = 360  # duration (in minutes) of each shift
+MAX_PRODUCTS = 49  # maximum number of products of a client
+# Columns of the generated clients: (id, arrival time, products)
+ClientArrays = tuple[np.ndarray, np.ndarray, np.ndarray]
+# Clients of several days, one row per day: (arrival times, products, valid). Since
+# each day has a different number of clients, the rows are padded (and not valid)
+DayArrays = tuple[np.ndarray, np.ndarray, np.ndarray]
+# Seed for the random generator, or the generator itself
+Seed = Union[None, int, np.random.Generator]
+
 
 def generate_clients_based_on_poisson(
     morning_variance: float,
-    afternoon_variance: float
+    afternoon_variance: float,
+    seed: Seed = None
 ) -> list[Client]:
     """Generate the clients based on a Poisson distribution.
-    
+
     We just define a poisson parameter for the morning schedule
     and one for the afternoon schedule, and with that, we can generate
-    the clients for this run.
+    the clients for this run. The clients of each shift arrive uniformly
+    during the shift.
     """
-    id_gen = __id_generator()
-    # Start creating the clients list
-    clients = __clients_per_shift(morning_variance, id_gen)
-    # Then, add the clients for the afternoon shift
-    clients.extend(__clients_per_shift(afternoon_variance, id_gen, True))
-    # And return it at the end
-    return clients
-
-# ========================= #
-#      Helper methods       #
-# ========================= #
-
-
-def __clients_per_shift(
-    variance: float,
-    id_generator: tp.Generator[int, None, None],
-    afternoon: bool = False
-) -> list[Client]:
-    """Generate clients per shift. Using the variance to know how many
-    clients we're going to get per shift. Using the afternoon flag would change
-    the time from (0, 360) to (360, 720)
+    return generate_clients(shift_rates(morning_variance, afternoon_variance), seed)
+
+
+def generate_clients(
+    rates: ArrayLike,
+    seed: Seed = None,
+    as_arrays: bool = False
+) -> Union[list[Client], ClientArrays]:
+    """Generate the clients of a non homogeneous Poisson process.
+
+    `rates` is the expected number of clients arriving at each minute of the day
+    (see `arrival_rates` to build it from a curve per hour). The number of clients
+    of each minute and their products are drawn at once, so it can generate
+    millions of clients. The clients are sorted by their arrival time.
+
+    If `as_arrays` is True, the columns (id, arrival time, products) are returned
+    instead of the `Client` objects.
     """
-    time_range = (0, 360) if afternoon is False else (360, 720)
-    # Generate the amount of clients to arrive
+    rng = np.random.default_rng(seed)
+    rates = np.asarray(rates, dtype=np.float64)
+    if rates.ndim != 1 or np.any(rates < 0):
+        raise ValueError("The arrival rates should be a list of non negative values")
+    arrivals = np.repeat(np.arange(len(rates)), rng.poisson(rates))
+    products = rng.integers(1, MAX_PRODUCTS + 1, len(arrivals))
+    ids = np.arange(len(arrivals))
+    if as_arrays:
+        return ids, arrivals, products
     return [
-        Client(
-            id=next(id_generator),
-            arrival_time=np.random.randint(*time_range),
-            products=np.random.randint(1, 50)
-        )
-        for _ in range(np.random.poisson(variance))
+        Client(id=client_id, arrival_time=arrival, products=n_products)
+        for client_id, arrival, n_products in zip(
+            ids.tolist(), arrivals.tolist(), products.tolist())
     ]
 
 
-def __id_generator() -> tp.Generator[int, None, None]:
-    """Generate an ID for the method"""
-    current_id = 0
-    while True:
-        yield current_id
-        # Then, update the ID
-        current_id += 1
+def generate_days(rates: ArrayLike, n_days: int, seed: Seed = None) -> DayArrays:
+    """Generate the clients of `n_days` independent days at once, with the same
+    process of `generate_clients`. The clients of each day are sorted by their
+    arrival time, and the rows are padded to the day with the most clients.
+    """
+    rng = np.random.default_rng(seed)
+    rates = np.asarray(rates, dtype=np.float64)
+    if rates.ndim != 1 or np.any(rates < 0):
+        raise ValueError("The arrival rates should be a list of non negative values")
+    counts = rng.poisson(rates, size=(n_days, len(rates)))
+    per_day = counts.sum(axis=1)
+    # Position of each client inside its day
+    days = np.repeat(np.arange(n_days), per_day)
+    positions = np.arange(len(days)) - np.repeat(np.cumsum(per_day) - per_day, per_day)
+    width = int(per_day.max(initial=0))
+    arrivals = np.zeros((n_days, width), dtype=np.int64)
+    arrivals[days, positions] = np.repeat(np.tile(np.arange(len(rates)), n_days), counts.ravel())
+    valid = np.zeros((n_days, width), dtype=bool)
+    valid[days, positions] = True
+    products = rng.integers(1, MAX_PRODUCTS + 1, (n_days, width))
+    return arrivals, products, valid
+
+
+def arrival_rates(rates: ArrayLike, period: int = 1) -> np.ndarray:
+    """Get the expected clients per minute from a curve of rates.
+
+    Each value of `rates` is the expected number of clients during `period`
+    minutes (for example, use `period=60` for a curve per hour).
+    """
+    if period <= 0:
+        raise ValueError("The period of the rates should be positive")
+    return np.repeat(np.asarray(rates, dtype=np.float64) / period, period)
+
+
+def shift_rates(morning_variance: float, afternoon_variance: float) -> np.ndarray:
+    """Get the expected clients per minute when the clients of each shift
+    arrive uniformly during the shift.
+    """
+    return arrival_rates([morning_variance, afternoon_variance], SHIFT_MINUTES)
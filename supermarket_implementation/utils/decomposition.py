@@ -0,0 +1,123 @@
+"""
+Decomposition utilities. They split the day into smaller problems that can be
+solved one after the other (rolling horizon) or, when they don't share any
+cashier time, at the same time. They also keep the part of a solution that
+isn't affected by a change of the clients.
+"""
+from typing import Optional
+from dataclasses import replace
+# Local imports
+from supermarket_implementation.models import Client, SolutionVar
+from supermarket_implementation.utils.heuristic import Assignment
+
+# Clients of a window: (committed, lookahead). Both are indexes of the clients
+Window = tuple[list[int], list[int]]
+
+
+def independent_blocks(
+    clients: list[Client],
+    schedule: list[Optional[Assignment]]
+) -> list[list[int]]:
+    """Split the clients (by index, sorted by arrival) into blocks. In the
+    heuristic schedule, every client of a block ends before the first
+    arrival of the next block, so the blocks don't share any cashier time.
+    """
+    blocks: list[list[int]] = []
+    busy_until = -1
+    for index in sorted(range(len(clients)), key=lambda i: clients[i].arrival_time):
+        arrival = clients[index].arrival_time
+        if busy_until <= arrival:
+            # Every client before this one has already left
+            blocks.append([])
+        blocks[-1].append(index)
+        end = schedule[index][2] if schedule[index] is not None else arrival
+        busy_until = max(busy_until, end)
+    return blocks
+
+
+def time_windows(
+    clients: list[Client],
+    indexes: list[int],
+    window: int,
+    overlap: int = 0
+) -> list[Window]:
+    """Split the clients into windows of `window` minutes, by their arrival.
+
+    Each window goes from `k * window` (excluded) to `(k + 1) * window` (included),
+    so with a window of 360 minutes we get the morning and afternoon shifts.
+    The clients of each window are committed, and the clients arriving in the next
+    `overlap` minutes are the lookahead: they're solved with the window, but they're
+    only committed in their own window.
+    """
+    by_window: dict[int, list[int]] = {}
+    for index in sorted(indexes, key=lambda i: clients[i].arrival_time):
+        key = max(0, (clients[index].arrival_time - 1) // window)
+        by_window.setdefault(key, []).append(index)
+    keys = sorted(by_window)
+    windows: list[Window] = []
+    for position, key in enumerate(keys):
+        limit = (key + 1) * window + overlap
+        lookahead = [
+            index
+            for next_key in keys[position + 1:]
+            if next_key * window < limit
+            for index in by_window[next_key]
+            if clients[index].arrival_time <= limit
+        ]
+        windows.append((by_window[key], lookahead))
+    return windows
+
+
+def carry_over(solution: list[SolutionVar], busy_until: dict[str, int]) -> dict[str, int]:
+    """Get the minute at which each cashier gets free after the solution"""
+    busy_until = dict(busy_until)
+    for var in solution:
+        busy_until[var.cashier.name] = max(busy_until.get(var.cashier.name, 0), var.end)
+    return busy_until
+
+
+def starts_after(solution: list[SolutionVar], busy_until: dict[str, int]) -> bool:
+    """Check that no client of the solution starts with a cashier that's still busy"""
+    return all(var.start >= busy_until.get(var.cashier.name, 0) for var in solution)
+
+
+def apply_changes(
+    clients: list[Client],
+    added: list[Client],
+    removed: list[int],
+    modified: list[Client]
+) -> list[Client]:
+    """Get the clients after adding, removing (by ID) and modifying some of them.
+
+    The modified clients replace the client with the same ID, in the same position.
+    A client can't be both removed and modified.
+    """
+    ids = {client.id for client in clients}
+    for client_id in removed + [client.id for client in modified]:
+        if client_id not in ids:
+            raise ValueError(f"The client {client_id} is not in the problem")
+    for client in added:
+        if client.id in ids:
+            raise ValueError(f"The client {client.id} is already in the problem")
+    overlap = set(removed) & {client.id for client in modified}
+    if overlap:
+        raise ValueError(f"The clients {sorted(overlap)} can't be removed and modified at once")
+    changes = {client.id: client for client in modified}
+    removed_ids = set(removed)
+    kept = [changes.get(client.id, client) for client in clients if client.id not in removed_ids]
+    return kept + added
+
+
+def push_back(solution: list[SolutionVar], busy_until: dict[str, int]) -> list[SolutionVar]:
+    """Delay the clients of the solution that start while their cashier is still
+    busy (until it gets free), keeping the order of the clients of each cashier.
+    """
+    busy_until = dict(busy_until)
+    pushed: list[SolutionVar] = []
+    for var in sorted(solution, key=lambda var: var.start):
+        start = max(var.start, busy_until.get(var.cashier.name, 0))
+        if start != var.start:
+            var = replace(var, start=start, end=start + var.duration)
+        busy_until[var.cashier.name] = max(busy_until.get(var.cashier.name, 0), var.end)
+        pushed.append(var)
+    return pushed
@@ -0,0 +1,200 @@
+"""
+Min cost flow utilities. A polynomial time way to assign the clients, for the
+days that are too big for the CP-SAT model.
+
+The day is split into time slots. Each client is sent (as one unit of flow) to a
+(cashier, slot) pair, that can only attend the number of clients that fit in the
+slot. The cost of each assignment is the waiting and processing time of the
+client, as in `ignite_objectives`. Since the slots are an approximation, the
+assignment is repaired at the end to get a schedule without overlaps.
+"""
+from typing import Optional
+import numpy as np
+# OR Tools import
+from ortools.graph.python import min_cost_flow
+# Local imports
+from supermarket_implementation.models import (
+    Cashier, CashierColumns, Client, ClientColumns, SolutionVar
+)
+from supermarket_implementation.utils.problem import SHIFT_CHANGE, duration_matrix
+from supermarket_implementation.utils.heuristic import greedy_schedule, nearby_cashiers
+
+SLOT_SIZE = 10  # minutes of each time slot
+MAX_SLOTS = 12  # number of slots that a client can wait before being attended
+MAX_CANDIDATES = 4  # number of cashiers that a client can be sent to
+
+
+def solve_min_cost_flow(  # pylint: disable=R0913,R0914
+    clients: list[Client],
+    cashiers: list[Cashier],
+    slot_size: int = SLOT_SIZE,
+    max_slots: int = MAX_SLOTS,
+    max_candidates: Optional[int] = MAX_CANDIDATES,
+    ready: Optional[list[int]] = None
+) -> list[SolutionVar]:
+    """Solve the problem as a min cost flow over the (cashier, slot) pairs.
+
+    Each client can be sent to the slots of its eligible cashiers from its arrival
+    and up to `max_slots` later. The clients that don't fit in any of them go to an
+    overflow node, and they're assigned to the cashier that gets free first
+    in the repair. If the `ready` times are given, each cashier is busy until then.
+
+    To keep the network small with many cashiers, each client is only sent to
+    `max_candidates` of them: the ones that the heuristic schedule uses for the
+    clients arriving around the same time (`None` to use every eligible cashier).
+
+    The result is aligned with the clients, as in `solve_heuristic`.
+    """
+    client_columns = ClientColumns.from_clients(clients)
+    cashier_columns = CashierColumns.from_cashiers(cashiers)
+    n_clients, n_cashiers = len(clients), len(cashiers)
+    arrivals = client_columns.arrival_times
+    durations = duration_matrix(client_columns, cashier_columns)
+    ready_times = np.asarray(ready if ready is not None else [0] * n_cashiers, dtype=np.int64)
+    eligible = np.where(
+        arrivals[np.newaxis, :] <= SHIFT_CHANGE,
+        cashier_columns.morning[:, np.newaxis], cashier_columns.afternoon[:, np.newaxis]
+    )
+    if not eligible.any(axis=0).all():
+        client = clients[int(np.argmin(eligible.any(axis=0)))]
+        raise RuntimeError(f"There's no cashier available to attend the client {client.id}")
+
+    # Cashiers that each client can be sent to in the network
+    candidates = eligible
+    if max_candidates is not None and max_candidates < n_cashiers:
+        nearby = nearby_cashiers(
+            clients, greedy_schedule(clients, cashiers, ready), max_candidates)
+        candidates = np.zeros_like(eligible)
+        for client_index, client_cashiers in enumerate(nearby):
+            candidates[list(client_cashiers), client_index] = True
+
+    # Arcs from each client to the slots of its candidate cashiers
+    arrival_slots = arrivals // slot_size
+    n_slots = int(arrival_slots.max()) + max_slots
+    client_indexes, cashier_indexes = np.nonzero(candidates.T)
+    pair_clients = np.repeat(client_indexes, max_slots)
+    pair_cashiers = np.repeat(cashier_indexes, max_slots)
+    pair_slots = (arrival_slots[client_indexes][:, np.newaxis] + np.arange(max_slots)).ravel()
+    # The cashier should be free before the end of the slot
+    valid = (pair_slots + 1) * slot_size > ready_times[pair_cashiers]
+    pair_clients, pair_cashiers, pair_slots = \
+        pair_clients[valid], pair_cashiers[valid], pair_slots[valid]
+    waiting = np.maximum(
+        pair_slots * slot_size,
+        np.maximum(arrivals[pair_clients], ready_times[pair_cashiers])
+    ) - arrivals[pair_clients]
+    costs = waiting + durations[pair_cashiers, pair_clients]
+
+    # Number of clients that fit in each slot of each cashier. The average
+    # duration of the clients that can go to the cashier is spread over the slots
+    average = np.maximum(
+        (durations * candidates).sum(axis=1) / np.maximum(candidates.sum(axis=1), 1), 1)
+    ends = np.floor(
+        np.arange(1, n_slots + 1)[np.newaxis, :] * slot_size / average[:, np.newaxis])
+    capacities = np.diff(ends, axis=1, prepend=0).astype(np.int64).ravel()
+
+    # Get the (cashier, slot) node of each client. The clients in the overflow have no cashier
+    nodes = pair_cashiers * n_slots + pair_slots
+    used = assign_slots(pair_clients, nodes, costs, capacities)
+    assignment = np.full(n_clients, -1, dtype=np.int64)
+    assignment[pair_clients[used]] = nodes[used]
+    assigned_cashier = np.where(assignment >= 0, assignment // n_slots, -1)
+    assigned_slot = np.where(assignment >= 0, assignment % n_slots, arrival_slots)
+    return repair_assignment(
+        clients, cashiers, durations, eligible, assigned_cashier,
+        np.maximum(assigned_slot * slot_size, arrivals), ready_times
+    )
+
+
+def assign_slots(  # pylint: disable=R0914
+    pair_clients: np.ndarray,
+    pair_nodes: np.ndarray,
+    costs: np.ndarray,
+    capacities: np.ndarray
+) -> np.ndarray:
+    """Send each client to one of its (cashier, slot) nodes, or to the overflow,
+    with a min cost flow. Each pair is an arc from a client to a node, with its cost.
+
+    Returns a mask of the pairs used by the flow.
+    """
+    clients, client_nodes = np.unique(pair_clients, return_inverse=True)
+    slots, slot_nodes = np.unique(pair_nodes, return_inverse=True)
+    n_clients, n_slots = len(clients), len(slots)
+    # Nodes: source, clients, slots, overflow and sink
+    source, overflow, sink = 0, 1 + n_clients + n_slots, 2 + n_clients + n_slots
+    network = min_cost_flow.SimpleMinCostFlow()
+    network.add_arcs_with_capacity_and_unit_cost(
+        1 + client_nodes,
+        1 + n_clients + slot_nodes,
+        np.ones(len(pair_clients), dtype=np.int64),
+        costs.astype(np.int64)
+    )
+    # Arcs from the source to each client, and from each client to the overflow.
+    # Going to the overflow is more expensive than any slot
+    overflow_cost = 2 * int(costs.max(initial=0)) + 1
+    network.add_arcs_with_capacity_and_unit_cost(
+        np.concatenate([np.full(n_clients, source), 1 + np.arange(n_clients)]),
+        np.concatenate([1 + np.arange(n_clients), np.full(n_clients, overflow)]),
+        np.ones(2 * n_clients, dtype=np.int64),
+        np.concatenate([
+            np.zeros(n_clients, dtype=np.int64), np.full(n_clients, overflow_cost)])
+    )
+    # Arcs from each slot (and the overflow) to the sink
+    network.add_arcs_with_capacity_and_unit_cost(
+        np.concatenate([1 + n_clients + np.arange(n_slots), [overflow]]),
+        np.full(n_slots + 1, sink),
+        np.concatenate([capacities[slots], [n_clients]]),
+        np.zeros(n_slots + 1, dtype=np.int64)
+    )
+    network.set_node_supply(source, n_clients)
+    network.set_node_supply(sink, -n_clients)
+    status = network.solve()
+    if status != network.OPTIMAL:
+        raise RuntimeError(f"The min cost flow cannot be solved (status {status})")
+    # The arcs of the pairs are the first ones added to the network
+    return network.flows(np.arange(len(pair_clients))) > 0
+
+
+def repair_assignment(  # pylint: disable=R0913,R0914
+    clients: list[Client],
+    cashiers: list[Cashier],
+    durations: np.ndarray,
+    eligible: np.ndarray,
+    assigned_cashier: np.ndarray,
+    planned_start: np.ndarray,
+    ready_times: np.ndarray
+) -> list[SolutionVar]:
+    """Build a schedule without overlaps from the assignment of the flow.
+
+    The clients are attended in order of their planned start, as soon as they
+    arrive and their cashier is free. Since the capacity of the slots is
+    an average, the queue of a cashier can drift from the plan: if another eligible
+    cashier would finish the client earlier, the client is moved to it. The
+    clients without a cashier (the overflow) also go to the one that ends first.
+    """
+    free_at = ready_times.copy()
+    arrivals = np.array([client.arrival_time for client in clients], dtype=np.int64)
+    solution: list[Optional[SolutionVar]] = [None] * len(clients)
+    order = np.lexsort((np.arange(len(clients)), arrivals, planned_start))
+    for index in order.tolist():
+        # End of the client with each eligible cashier
+        arrival = int(arrivals[index])
+        options = np.flatnonzero(eligible[:, index])
+        ends = np.maximum(free_at[options], arrival) + durations[options, index]
+        best = int(options[np.argmin(ends)])
+        cashier = int(assigned_cashier[index])
+        if cashier < 0 or max(int(free_at[cashier]), arrival) + durations[cashier, index] > \
+                ends.min():
+            cashier = best
+        start = max(arrival, int(free_at[cashier]))
+        duration = int(durations[cashier, index])
+        free_at[cashier] = start + duration
+        solution[index] = SolutionVar(
+            cashier=cashiers[cashier],
+            client=clients[index],
+            start=start,
+            end=start + duration,
+            duration=duration,
+            active=1
+        )
+    return solution
@@ -0,0 +1,125 @@
+"""
+Heuristic utilities. A fast (but not optimal) way to schedule the clients,
+useful to get bounds for the optimization model or to answer when there's
+no time to run the solver.
+"""
+import heapq
+from typing import Optional
+# Local imports
+from supermarket_implementation.models import Client, Cashier, SolutionVar
+from supermarket_implementation.utils.problem import (
+    AVG_PROCESS_TIME_PER_ITEM, SHIFT_CHANGE
+)
+
+# Assignment of one client: (cashier index, start, end)
+Assignment = tuple[int, int, int]
+
+
+def greedy_schedule(  # pylint: disable=R0914
+    clients: list[Client],
+    cashiers: list[Cashier],
+    ready: Optional[list[int]] = None
+) -> list[Optional[Assignment]]:
+    """Schedule the clients in order of arrival, assigning each one of them
+    to the eligible cashier that gets free first. If the `ready` times are given,
+    each cashier is busy until that minute.
+
+    The result is aligned with the clients. If a client has no cashier
+    available for its shift, its assignment is `None`.
+    """
+    # Minutes per product of each cashier. The duration is computed
+    # as in `calculate_expected_duration`
+    rates = [AVG_PROCESS_TIME_PER_ITEM / cashier.effectiveness_average for cashier in cashiers]
+    free_at = list(ready) if ready is not None else [0] * len(cashiers)
+    # One heap of (free time, cashier index) per shift. Since a cashier can be
+    # in both heaps, the entries that don't match `free_at` are outdated
+    heaps: dict[bool, list[tuple[int, int]]] = {False: [], True: []}
+    for index, cashier in enumerate(cashiers):
+        if cashier.available_in_the_morning:
+            heaps[False].append((free_at[index], index))
+        if cashier.available_in_the_afternoon:
+            heaps[True].append((free_at[index], index))
+    for heap in heaps.values():
+        heapq.heapify(heap)
+
+    assignments: list[Optional[Assignment]] = [None] * len(clients)
+    for position in sorted(range(len(clients)), key=lambda i: clients[i].arrival_time):
+        client = clients[position]
+        afternoon = client.arrival_time > SHIFT_CHANGE
+        heap = heaps[afternoon]
+        # Discard the outdated entries
+        while heap and heap[0][0] != free_at[heap[0][1]]:
+            heapq.heappop(heap)
+        if not heap:
+            continue
+        free_time, index = heap[0]
+        start = max(free_time, client.arrival_time)
+        end = start + int(client.products * rates[index])
+        free_at[index] = end
+        heapq.heapreplace(heap, (end, index))
+        # Update the cashier in the other shift too
+        other = cashiers[index].available_in_the_morning if afternoon \
+            else cashiers[index].available_in_the_afternoon
+        if other:
+            heapq.heappush(heaps[not afternoon], (end, index))
+        assignments[position] = (index, start, end)
+    return assignments
+
+
+def solve_heuristic(
+    clients: list[Client],
+    cashiers: list[Cashier],
+    ready: Optional[list[int]] = None
+) -> list[SolutionVar]:
+    """Solve the problem using the greedy schedule.
+
+    It returns the same solution vars that the solver returns, so they can
+    be used to calculate the KPIs.
+    """
+    solution: list[SolutionVar] = []
+    for client, assignment in zip(clients, greedy_schedule(clients, cashiers, ready)):
+        if assignment is None:
+            raise RuntimeError(
+                f"There's no cashier available to attend the client {client.id}")
+        index, start, end = assignment
+        solution.append(SolutionVar(
+            cashier=cashiers[index],
+            client=client,
+            start=start,
+            end=end,
+            duration=end - start,
+            active=1
+        ))
+    return solution
+
+
+def nearby_cashiers(
+    clients: list[Client],
+    schedule: list[Optional[Assignment]],
+    size: int
+) -> list[set[int]]:
+    """Get, for each client, the cashiers that the schedule used for
+    the clients of the same shift arriving around the same time (up to `size`
+    of them, looking at most `2 * size` clients before and after it).
+
+    The cashier assigned to the client itself is always included, so the
+    schedule is still valid if we only allow these cashiers.
+    """
+    order = [
+        i for i in sorted(range(len(clients)), key=lambda i: clients[i].arrival_time)
+        if schedule[i] is not None
+    ]
+    candidates: list[set[int]] = [set() for _ in clients]
+    for position, client_index in enumerate(order):
+        afternoon = clients[client_index].arrival_time > SHIFT_CHANGE
+        cashiers = candidates[client_index]
+        cashiers.add(schedule[client_index][0])
+        # Look at the neighbours of this client, from the closest to the farthest
+        for offset in range(1, 2 * size + 1):
+            for neighbour_position in (position - offset, position + offset):
+                if len(cashiers) >= size or not 0 <= neighbour_position < len(order):
+                    continue
+                neighbour = order[neighbour_position]
+                if (clients[neighbour].arrival_time > SHIFT_CHANGE) == afternoon:
+                    cashiers.add(schedule[neighbour][0])
+    return candidates
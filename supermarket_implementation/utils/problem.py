@@ -1,86 +1,133 @@
 """
 Problem utilities
 """
-import pydash as _py
+from typing import Optional, Union
+import heapq
+import numpy as np
 # OR Tools import
 from ortools.sat.python import cp_model
 # Local imports
 from supermarket_implementation.models import (
-    Client, Cashier, SolverVar
+    Client, Cashier, SolverVar, SolutionVar,
+    ClientColumns, CashierColumns, SolverColumns
 )
 
 AVG_PROCESS_TIME_PER_ITEM = 0.25  # minutes
+SHIFT_CHANGE = 360  # minute at which the afternoon shift starts
+CLOSING_TIME = 720  # minute at which the supermarket closes
+OBJECTIVE_UPPER_BOUND = 2**40  # upper bound of each term of the objective
 
 
-def ignite_variables(
+def ignite_variables(  # pylint: disable=R0913,R0914
     clients: list[Client],
     cashiers: list[Cashier],
-    model: cp_model.CpModel
+    model: cp_model.CpModel,
+    max_wait: Optional[int] = None,
+    horizon: int = CLOSING_TIME,
+    candidates: Optional[list[set[int]]] = None,
+    ready: Optional[np.ndarray] = None,
+    debug: bool = False
 ) -> list[SolverVar]:
-    """Ignitie the variables to use to solve the optimization problem"""
+    """Ignitie the variables to use to solve the optimization problem
+
+    Each client can only start in the window `[arrival_time, arrival_time + max_wait]`
+    (if there's a `max_wait`), and should finish before the `horizon`. The pairs
+    of (cashier, client) that cannot fit in that window are not created. If the
+    `candidates` are given (the index of the cashiers allowed for each client),
+    only those pairs are considered. If the `ready` times are given (the minute
+    at which each cashier gets free), no client can start with a cashier before it.
+
+    The pairs and their domains are computed for all the cashiers and clients at once.
+    The variables are only named if `debug` is True, since the names are
+    not needed to solve the model.
+    """
+    client_columns = ClientColumns.from_clients(clients)
+    cashier_columns = CashierColumns.from_cashiers(cashiers)
+    arrivals = client_columns.arrival_times
+    morning = cashier_columns.morning
+    afternoon = cashier_columns.afternoon
+    durations = duration_matrix(client_columns, cashier_columns)
+    # Matrix of (cashier, client) with the pairs that we should consider.
+    # First, the cashier should be available on the shift of the client
+    available = np.where(
+        arrivals[np.newaxis, :] <= SHIFT_CHANGE,
+        morning[:, np.newaxis], afternoon[:, np.newaxis]
+    )
+    # Get the earliest and latest minute at which each cashier can start with each client
+    earliest_start = np.broadcast_to(arrivals[np.newaxis, :], durations.shape)
+    if ready is not None:
+        earliest_start = np.maximum(earliest_start, ready[:, np.newaxis])
+    latest_start = horizon - durations
+    if max_wait is not None:
+        latest_start = np.minimum(latest_start, arrivals[np.newaxis, :] + max_wait)
+    available &= latest_start >= earliest_start
+    if candidates is not None:
+        allowed = np.zeros_like(available)
+        for client_index, cashier_indexes in enumerate(candidates):
+            allowed[list(cashier_indexes), client_index] = True
+        available &= allowed
+
     # Create the array of solution vars
+    cashier_indexes, client_indexes = np.nonzero(available)
     solutions: list[SolverVar] = []
-    for cashier in cashiers:
-        for client in clients:
-            if client.arrival_time <= 360 and cashier.available_in_the_morning is False:
-                continue
-            if client.arrival_time > 360 and cashier.available_in_the_afternoon is False:
-                continue
-            solutions.append(SolverVar(
-                cashier=cashier,
-                client=client,
-                start=model.NewIntVar(
-                    client.arrival_time, 720,
-                    f"START_{cashier.name}_T{client.id}"
-                ),
-                end=model.NewIntVar(
-                    client.arrival_time, 720,
-                    f"END_{cashier.name}_T{client.id}"
-                ),
-                duration=__calculate_expected_duration(client, cashier),
-                active=model.NewBoolVar(f"ACTIVE_{cashier.name}_T{client.id}")
-            ))
+    for cashier_index, client_index, duration, earliest, latest in zip(
+        cashier_indexes.tolist(),
+        client_indexes.tolist(),
+        durations[cashier_indexes, client_indexes].tolist(),
+        earliest_start[cashier_indexes, client_indexes].tolist(),
+        latest_start[cashier_indexes, client_indexes].tolist()
+    ):
+        cashier = cashiers[cashier_index]
+        client = clients[client_index]
+        suffix = f"_{cashier.name}_T{client.id}" if debug else ""
+        start = model.NewIntVar(earliest, latest, f"START{suffix}" if debug else "")
+        solutions.append(SolverVar(
+            cashier=cashier,
+            client=client,
+            start=start,
+            end=start + duration,
+            duration=duration,
+            active=model.NewBoolVar(f"ACTIVE{suffix}" if debug else "")
+        ))
     return solutions
 
 
 def ignite_constraints(
     solution_vars: list[SolverVar],
-    model: cp_model.CpModel
+    model: cp_model.CpModel,
+    debug: bool = False,
+    capacities: Optional[dict[str, int]] = None
 ) -> None:
     """Ignite the constraints, such as:
-        - The end should be: end == start + duration
         - Only one client per cashier
         - Only 1 active var per client
+
+    Each pair is a fixed size interval (of the expected duration), that
+    is only present in the model if the pair is active.
+
+    If a cashier has a capacity (in `capacities`), it represents that number of
+    interchangeable cashiers, so it can attend up to that number of clients at once.
     """
-    intervals_per_cashier = {}
+    intervals_per_cashier: dict[str, list[cp_model.IntervalVar]] = {}
+    actives_per_client: dict[int, list[cp_model.IntVar]] = {}
     for var in solution_vars:
-        # Add the 1st restriction. End == start + duration.
-        # * Note: Remember to only enforce this situation if
-        # * the var is active.
-        model.Add(var.end == var.start +
-                  var.duration).OnlyEnforceIf(var.active)
-        # Create a duration var
-        duration_var = model.NewIntVar(
-            0, var.duration,
-            f"DURATION_{var.cashier.name}->T{var.client.id}"
+        name = f"INTERVAL_{var.cashier.name}->T{var.client.id}" if debug else ""
+        intervals_per_cashier.setdefault(var.cashier.name, []).append(
+            model.NewOptionalFixedSizeIntervalVar(var.start, var.duration, var.active, name)
         )
-        # Add the interval
-        if var.cashier.name not in intervals_per_cashier:
-            intervals_per_cashier[var.cashier.name] = []
-        # Then, add an interval
-        intervals_per_cashier[var.cashier.name].append(model.NewOptionalIntervalVar(
-            var.start, duration_var, var.end, var.active,
-            f"INTERVAL_{var.cashier.name}->T{var.client.id}"
-        ))
+        actives_per_client.setdefault(var.client.id, []).append(var.active)
 
-    # Then, add the second restriction. Only one client per cashier
-    for intervals in intervals_per_cashier.values():
-        model.AddNoOverlap(intervals)
+    # Then, add the first restriction. Only one client per cashier
+    for name, intervals in intervals_per_cashier.items():
+        capacity = capacities.get(name, 1) if capacities is not None else 1
+        if capacity > 1:
+            model.AddCumulative(intervals, [1] * len(intervals), capacity)
+        else:
+            model.AddNoOverlap(intervals)
 
-    # Then, add the third restriction. Only one active per client
-    vars_per_client = _py.group_by(solution_vars, lambda x: x.client.id)
-    for variables in vars_per_client.values():
-        model.AddExactlyOne((v.active for v in variables))
+    # Then, add the second restriction. Only one active per client
+    for actives in actives_per_client.values():
+        model.AddExactlyOne(actives)
 
 
 def ignite_objectives(
@@ -94,18 +141,37 @@ def ignite_objectives(
         - process_time: How much process time does it takes to attend all the clients
         - clients_waiting_time: The time that each client is waiting to start in the line
     """
-    objective_var = model.NewIntVar(0, int(1e6), "OBJECTIVE_SUM")
+    objective_var = model.NewIntVar(0, OBJECTIVE_UPPER_BOUND, "OBJECTIVE_SUM")
 
-    # First of all, ignite the makespan
-    makespan = model.NewIntVar(0, int(1e6), "makespan")
-    model.AddMaxEquality(makespan, [v.end for v in solution_vars])
+    # First of all, ignite the makespan. Each client should, at least, finish
+    # its shortest service, so that's a lower bound for the makespan
+    shortest_end: dict[int, int] = {}
+    for v in solution_vars:
+        shortest_end[v.client.id] = min(
+            shortest_end.get(v.client.id, OBJECTIVE_UPPER_BOUND),
+            v.client.arrival_time + v.duration
+        )
+    lower_bound = max(shortest_end.values(), default=0)
+    makespan = model.NewIntVar(lower_bound, OBJECTIVE_UPPER_BOUND, "makespan")
+    # * Note: The pairs that cannot end after the lower bound are skipped.
+    # * For the inactive pairs, the start is pushed to the arrival time,
+    # * which is always before the makespan
+    model.AddMaxEquality(makespan, [lower_bound] + [
+        v.start + v.duration * v.active
+        for v in solution_vars
+        if v.start.Proto().domain[-1] + v.duration > lower_bound
+    ])
     # Then, ignite the process time of each client
-    process_time = model.NewIntVar(0, int(1e6), "process_time")
-    model.Add(process_time == sum(v.end - v.start for v in solution_vars))
-    # Now, ignite the waiting time on the line for each var
-    clients_waiting_time = model.NewIntVar(0, int(1e6), "clients_waiting_time")
-    model.Add(clients_waiting_time == sum(
-        v.start - v.client.arrival_time for v in solution_vars))
+    process_time = model.NewIntVar(0, OBJECTIVE_UPPER_BOUND, "process_time")
+    model.Add(process_time == cp_model.LinearExpr.WeightedSum(
+        [v.active for v in solution_vars], [v.duration for v in solution_vars]))
+    # Now, ignite the waiting time on the line for each var.
+    # * Note: The start of the inactive pairs is pushed to the arrival time
+    clients_waiting_time = model.NewIntVar(
+        0, OBJECTIVE_UPPER_BOUND, "clients_waiting_time")
+    model.Add(clients_waiting_time == cp_model.LinearExpr.Sum(
+        [v.start for v in solution_vars]
+    ) - sum(v.client.arrival_time for v in solution_vars))
 
     # Add the values for the objective var. Sum all the variables
     model.Add(objective_var == makespan + process_time + clients_waiting_time)
@@ -113,12 +179,194 @@ def ignite_objectives(
     model.Minimize(objective_var)
 
 
-# ========================== #
-#        Helper methods      #
-# ========================== #
+def ignite_hints(
+    solution_vars: list[SolverVar],
+    model: cp_model.CpModel,
+    hints: dict[int, tuple[str, int]]
+) -> None:
+    """Ignite the hints of the model, using an initial assignment.
+
+    The `hints` have, for each client ID, the name of the cashier that attends it
+    and the minute at which it starts. The solver uses them as its first solution.
+    """
+    for var in solution_vars:
+        hint = hints.get(var.client.id)
+        if hint is None:
+            continue
+        active = hint[0] == var.cashier.name
+        model.AddHint(var.active, active)
+        # The inactive pairs start at the arrival time (see the objectives)
+        lower, upper = var.start.Proto().domain[0], var.start.Proto().domain[-1]
+        model.AddHint(var.start, min(max(hint[1], lower), upper) if active else lower)
+
+
+def cashier_classes(
+    cashiers: list[Cashier],
+    durations: np.ndarray,
+    ready: Optional[np.ndarray] = None
+) -> list[list[int]]:
+    """Group the cashiers (by index) that are interchangeable: the ones with the
+    same availability, the same duration for every client and, if there are
+    `ready` times, that get free at the same minute.
+    """
+    classes: dict[tuple, list[int]] = {}
+    for index, cashier in enumerate(cashiers):
+        key = (
+            cashier.available_in_the_morning,
+            cashier.available_in_the_afternoon,
+            int(ready[index]) if ready is not None else 0,
+            durations[index].tobytes()
+        )
+        classes.setdefault(key, []).append(index)
+    return list(classes.values())
+
+
+def ignite_symmetry_breaking(
+    solution_vars: list[SolverVar],
+    model: cp_model.CpModel,
+    classes: list[list[int]],
+    clients: list[Client],
+    cashiers: list[Cashier]
+) -> None:
+    """Ignite the constraints that break the symmetry of the interchangeable cashiers.
+
+    Swapping two cashiers of the same class gives the same schedule, so we only
+    keep the solutions where the cashiers of each class are used in order: the first
+    client (in the order of `clients`) of each cashier comes before the first
+    client of the next one. The cashiers of a class should have the same pairs.
+    """
+    position = {client.id: index for index, client in enumerate(clients)}
+    last = len(clients)
+    actives_per_cashier: dict[str, list[tuple[int, cp_model.IntVar]]] = {}
+    for var in solution_vars:
+        actives_per_cashier.setdefault(var.cashier.name, []).append(
+            (position[var.client.id], var.active))
+    for cashier_class in classes:
+        if len(cashier_class) < 2:
+            continue
+        firsts: list[cp_model.IntVar] = []
+        for index in cashier_class:
+            # Position of the first client of the cashier (or `last` if it has none)
+            first = model.NewIntVar(0, last, "")
+            model.AddMinEquality(first, [last] + [
+                last - (last - client_position) * active
+                for client_position, active in actives_per_cashier.get(cashiers[index].name, [])
+            ])
+            firsts.append(first)
+        for previous, current in zip(firsts, firsts[1:]):
+            model.Add(previous <= current)
+
+
+def relabel_hints(
+    hints: dict[int, tuple[str, int]],
+    classes: list[list[int]],
+    clients: list[Client],
+    cashiers: list[Cashier]
+) -> dict[int, tuple[str, int]]:
+    """Swap the cashiers of each class in the hints, so they follow the order
+    required by `ignite_symmetry_breaking`.
+    """
+    position = {client.id: index for index, client in enumerate(clients)}
+    first_client: dict[str, int] = {}
+    for client_id, (name, _) in hints.items():
+        first_client[name] = min(first_client.get(name, len(clients)), position[client_id])
+    renames: dict[str, str] = {}
+    for cashier_class in classes:
+        names = [cashiers[index].name for index in cashier_class]
+        # * NOTE: The sort is stable, so the unused cashiers keep their order
+        used = sorted(names, key=lambda name: first_client.get(name, len(clients)))
+        renames.update(zip(used, names))
+    return {
+        client_id: (renames.get(name, name), start)
+        for client_id, (name, start) in hints.items()
+    }
+
+
+def assign_class_members(
+    start: np.ndarray,
+    end: np.ndarray,
+    cashier: np.ndarray,
+    active: np.ndarray,
+    classes: list[list[int]]
+) -> np.ndarray:
+    """Assign the clients of each class of cashiers (modeled as its first cashier,
+    with the capacity of the class) to the cashiers of the class.
+
+    The active clients of each class are swept by their start, and each one of them
+    goes to the cashier of the class that gets free first. Since the class never
+    attends more clients at once than its cashiers, that cashier is already free
+    (only the clients without duration could share the time of another client).
+    """
+    assigned = cashier.copy()
+    for members in classes:
+        if len(members) < 2:
+            continue
+        rows = np.flatnonzero((cashier == members[0]) & (active != 0))
+        rows = rows[np.lexsort((end[rows], start[rows]))]
+        free_at = [(0, member) for member in members]
+        for row, row_end in zip(rows.tolist(), end[rows].tolist()):
+            busy_until, member = heapq.heappop(free_at)
+            assigned[row] = member
+            heapq.heappush(free_at, (max(busy_until, row_end), member))
+    return assigned
+
+
+def solver_columns(
+    solution_vars: list[SolverVar],
+    clients: list[Client],
+    cashiers: list[Cashier]
+) -> SolverColumns:
+    """Get the columns of the solver vars, to read their values from
+    the solution of the solver at once.
+    """
+    client_index = {client.id: index for index, client in enumerate(clients)}
+    cashier_index = {cashier.name: index for index, cashier in enumerate(cashiers)}
+    rows = np.array([
+        (
+            cashier_index[var.cashier.name], client_index[var.client.id],
+            var.duration, var.start.Index(), var.active.Index()
+        )
+        for var in solution_vars
+    ], dtype=np.int64).reshape(-1, 5)
+    return SolverColumns(*rows.T)
+
+
+def objective_value(solution: list[SolutionVar]) -> int:
+    """Calculate the value of the objective for a given solution.
+
+    It's the same objective used in `ignite_objectives`, so we can
+    compare the solutions that don't come from the solver.
+    """
+    if not solution:
+        return 0
+    makespan = max(var.end for var in solution)
+    process_time = sum(var.duration for var in solution)
+    clients_waiting_time = sum(var.start - var.client.arrival_time for var in solution)
+    return makespan + process_time + clients_waiting_time
+
+
+def duration_matrix(
+    clients: Union[list[Client], ClientColumns],
+    cashiers: Union[list[Cashier], CashierColumns]
+) -> np.ndarray:
+    """Calculate the expected duration of every (cashier, client) pair.
+
+    It's the same as `calculate_expected_duration`, but computed for all
+    the pairs at once. The result has a row for each cashier.
+    """
+    if not isinstance(clients, ClientColumns):
+        clients = ClientColumns.from_clients(clients)
+    if not isinstance(cashiers, CashierColumns):
+        cashiers = CashierColumns.from_cashiers(cashiers)
+    return (
+        clients.products[np.newaxis, :] * (
+            AVG_PROCESS_TIME_PER_ITEM
+            / cashiers.effectiveness[:, np.newaxis]
+        )
+    ).astype(np.int64)
 
 
-def __calculate_expected_duration(client: Client, cashier: Cashier) -> int:
+def calculate_expected_duration(client: Client, cashier: Cashier) -> int:
     """Calculate the duration of a client and a cashier"""
     return int(
         client.products * (
@@ -0,0 +1,119 @@
+"""
+Simulation utilities. They stress-test a staffing plan (the cashiers and
+their shifts) under the randomness of the arrivals.
+
+Many days are sampled from the Poisson arrival model of `clients` and attended
+with the same rule of the heuristic (and the online dispatch): each client goes
+to the eligible cashier that gets free first. The days are simulated at once,
+one client of every day per step, so the cost is in NumPy and not per day.
+"""
+from typing import Optional
+import os
+from concurrent.futures import ProcessPoolExecutor
+# External imports
+import numpy as np
+from numpy.typing import ArrayLike
+# Local imports
+from supermarket_implementation.models import Cashier, KPIDistribution, SimulationResult
+from supermarket_implementation.utils.clients import Seed, generate_days
+from supermarket_implementation.utils.problem import AVG_PROCESS_TIME_PER_ITEM, SHIFT_CHANGE
+from supermarket_implementation.utils.table import SERVICE_LEVEL_THRESHOLD
+
+BATCH_DAYS = 1000  # number of days simulated at once
+# Percentiles of the distributions
+PERCENTILES = (50, 95, 99)
+
+
+def simulate_plan(  # pylint: disable=R0913
+    cashiers: list[Cashier],
+    rates: ArrayLike,
+    n_days: int = 10_000,
+    seed: Optional[int] = None,
+    batch_days: int = BATCH_DAYS,
+    max_workers: Optional[int] = None
+) -> SimulationResult:
+    """Simulate `n_days` days with the given cashiers and arrival `rates` (the
+    expected clients per minute, see `clients.arrival_rates`).
+
+    The days are split in batches of `batch_days`, solved in a pool of `max_workers`
+    processes (by default, one per core). Using the same `seed` gives the same
+    result, no matter the number of processes.
+    """
+    batches = [min(batch_days, n_days - first) for first in range(0, n_days, batch_days)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    max_workers = min(max_workers or os.cpu_count() or 1, len(batches))
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(
+                simulate_days, [cashiers] * len(batches), [rates] * len(batches), batches, seeds))
+    else:
+        results = [
+            simulate_days(cashiers, rates, days, batch_seed)
+            for days, batch_seed in zip(batches, seeds)
+        ]
+    waiting_time, service_time, service_level = (
+        np.concatenate(columns) for columns in zip(*results))
+    return SimulationResult(
+        days=n_days,
+        waiting_time=distribution(waiting_time),
+        service_time=distribution(service_time),
+        service_level=distribution(service_level)
+    )
+
+
+def simulate_days(  # pylint: disable=R0914
+    cashiers: list[Cashier],
+    rates: ArrayLike,
+    n_days: int,
+    seed: Seed = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Simulate `n_days` days at once.
+
+    Returns the average waiting time, the average service time and the service
+    level of each day. The days without clients have the KPIs at 0.
+    """
+    arrivals, products, valid = generate_days(rates, n_days, seed)
+    morning = np.array([cashier.available_in_the_morning for cashier in cashiers])
+    afternoon = np.array([cashier.available_in_the_afternoon for cashier in cashiers])
+    # Minutes per product of each cashier, as in `calculate_expected_duration`
+    minutes = np.array([
+        AVG_PROCESS_TIME_PER_ITEM / cashier.effectiveness_average for cashier in cashiers])
+    if np.any(valid & (arrivals <= SHIFT_CHANGE)) and not morning.any() or \
+            np.any(valid & (arrivals > SHIFT_CHANGE)) and not afternoon.any():
+        raise ValueError("There's a shift with clients but without any cashier")
+
+    days = np.arange(n_days)
+    free_at = np.zeros((n_days, len(cashiers)), dtype=np.int64)
+    never = np.iinfo(np.int64).max
+    waiting = np.zeros(arrivals.shape, dtype=np.int64)
+    service = np.zeros(arrivals.shape, dtype=np.int64)
+    for step in range(arrivals.shape[1]):
+        arrival = arrivals[:, step]
+        # The cashier that gets free first, between the ones of the shift
+        eligible = np.where((arrival > SHIFT_CHANGE)[:, np.newaxis], afternoon, morning)
+        cashier = np.where(eligible, free_at, never).argmin(axis=1)
+        start = np.maximum(free_at[days, cashier], arrival)
+        end = start + (products[:, step] * minutes[cashier]).astype(np.int64)
+        active = valid[:, step]
+        free_at[days[active], cashier[active]] = end[active]
+        waiting[:, step] = start - arrival
+        service[:, step] = end - arrival
+
+    # KPIs of each day
+    count = np.maximum(valid.sum(axis=1), 1)
+    return (
+        np.where(valid, waiting, 0).sum(axis=1) / count,
+        np.where(valid, service, 0).sum(axis=1) / count,
+        (valid & (waiting <= SERVICE_LEVEL_THRESHOLD)).sum(axis=1) / count
+    )
+
+
+def distribution(values: np.ndarray) -> KPIDistribution:
+    """Get the mean and the percentiles of the values"""
+    p50, p95, p99 = np.percentile(values, PERCENTILES).tolist()
+    return KPIDistribution(
+        mean=round(float(values.mean()), 2),
+        p50=round(p50, 2),
+        p95=round(p95, 2),
+        p99=round(p99, 2)
+    )
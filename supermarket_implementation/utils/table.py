@@ -0,0 +1,285 @@
+"""
+Columnar representation of a solution.
+
+The KPIs and the data of the charts are computed from the same columns, so the
+solution is only scanned once instead of once per KPI (and again per shift).
+The results are the same that the functions in `kpis` and `extra_data` return.
+"""
+from typing import Any
+import numpy as np
+# Local imports
+from supermarket_implementation.models import (
+    Cashier, Client, ClientColumns, SolutionVar, SolverColumns
+)
+from supermarket_implementation.utils.problem import SHIFT_CHANGE
+from supermarket_implementation.utils.extra_data import (
+    ClientPerProduct, EfficiencyData, ScatterData
+)
+
+# Sections of the clients per product, and where each section ends
+PRODUCT_SECTIONS = ("<15 products", "15-30 products", ">30 products")
+PRODUCT_SECTION_LIMITS = (15, 30)
+# Shifts, in the order of their index
+SHIFTS = ("morning", "afternoon")
+# Maximum waiting time (in minutes) to consider that a client was attended on time
+SERVICE_LEVEL_THRESHOLD = 3
+
+
+class SolutionTable:  # pylint: disable=R0902
+    """Solution stored as NumPy columns, one row per client:
+
+    - arrival: Arrival time of the client
+    - start: Time at which the client is attended
+    - end: Time at which the client leaves the cashier
+    - duration: Duration of the service
+    - products: Number of products of the client
+    - cashier: Index of the cashier in `cashiers`
+    - client_id: ID of the client
+    - active: If the row is active in the solution
+
+    The shift of each row is defined by its start, as in `extra_data`.
+    """
+    arrival: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    duration: np.ndarray
+    products: np.ndarray
+    cashier: np.ndarray
+    client_id: np.ndarray
+    active: np.ndarray
+    cashiers: list[str]
+    _shift: np.ndarray
+    _totals: np.ndarray
+    # Define the slots
+    __slots__ = [
+        "arrival", "start", "end", "duration", "products", "cashier",
+        "client_id", "active", "cashiers", "_shift", "_totals"
+    ]
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        arrival: np.ndarray,
+        start: np.ndarray,
+        end: np.ndarray,
+        duration: np.ndarray,
+        products: np.ndarray,
+        cashier: np.ndarray,
+        client_id: np.ndarray,
+        active: np.ndarray,
+        cashiers: list[str]
+    ) -> None:
+        self.arrival = arrival
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.products = products
+        self.cashier = cashier
+        self.client_id = client_id
+        self.active = active
+        self.cashiers = cashiers
+        self._shift = (start > SHIFT_CHANGE).astype(np.int64)
+        self._totals = self.__shift_totals()
+
+    @classmethod
+    def from_solution(cls, data: list[SolutionVar]) -> "SolutionTable":
+        """Build the table from the solution vars"""
+        cashiers: dict[str, int] = {}
+        rows = np.array([
+            (
+                var.client.arrival_time, var.start, var.end, var.duration,
+                var.client.products, cashiers.setdefault(var.cashier.name, len(cashiers)),
+                var.client.id, var.active
+            )
+            for var in data
+        ], dtype=np.int64).reshape(-1, 8)
+        return cls(*rows.T, cashiers=list(cashiers))
+
+    @classmethod
+    def from_values(  # pylint: disable=R0913
+        cls,
+        columns: SolverColumns,
+        values: np.ndarray,
+        clients: ClientColumns,
+        cashiers: list[str],
+        include_inactive: bool = False
+    ) -> "SolutionTable":
+        """Build the table from the values of the variables of a solution
+        (indexed as in the model), without evaluating each variable.
+
+        The inactive pairs are dropped, unless `include_inactive` is True.
+        """
+        active = values[columns.active]
+        rows = np.ones(len(active), dtype=bool) if include_inactive else active.astype(bool)
+        start = values[columns.start][rows]
+        duration = columns.duration[rows]
+        client = columns.client[rows]
+        return cls(
+            arrival=clients.arrival_times[client],
+            start=start,
+            end=start + duration,
+            duration=duration,
+            products=clients.products[client],
+            cashier=columns.cashier[rows],
+            client_id=clients.ids[client],
+            active=active[rows],
+            cashiers=cashiers
+        )
+
+    def __len__(self) -> int:
+        return len(self.arrival)
+
+    def to_solution(self, clients: list[Client], cashiers: list[Cashier]) -> list[SolutionVar]:
+        """Convert the rows to solution vars, using the given clients and cashiers"""
+        client_by_id = {client.id: client for client in clients}
+        cashier_by_name = {cashier.name: cashier for cashier in cashiers}
+        return [
+            SolutionVar(
+                cashier=cashier_by_name[self.cashiers[cashier]],
+                client=client_by_id[client_id],
+                start=start,
+                end=end,
+                duration=duration,
+                active=active
+            )
+            for cashier, client_id, start, end, duration, active in zip(
+                self.cashier.tolist(), self.client_id.tolist(), self.start.tolist(),
+                self.end.tolist(), self.duration.tolist(), self.active.tolist()
+            )
+        ]
+
+    # ========================= #
+    #           KPIs            #
+    # ========================= #
+
+    def service_time_kpi(self) -> float:
+        """Average time since the client arrives until it leaves the cashier"""
+        return totals_kpis(self._totals.sum(axis=0), self.__makespan())[0]
+
+    def waiting_time_kpi(self) -> float:
+        """Average time since the client arrives until it gets to the cashier"""
+        return totals_kpis(self._totals.sum(axis=0), self.__makespan())[1]
+
+    def cashier_free_time_kpi(self) -> float:
+        """Total working time of the cashiers divided by the total time"""
+        return totals_kpis(self._totals.sum(axis=0), self.__makespan())[2]
+
+    def service_level_kpi(self) -> float:
+        """Portion of the clients attended in the first 3 minutes since they arrive"""
+        return totals_kpis(self._totals.sum(axis=0), self.__makespan())[3]
+
+    # ========================= #
+    #      Data for charts      #
+    # ========================= #
+
+    def clients_per_product(self) -> list[ClientPerProduct]:
+        """Average duration of the clients of each product section, per shift.
+
+        As in `get_clients_per_product`, the morning has a value for every section
+        (0 if it's empty), while the afternoon only for the sections with clients.
+        """
+        section = np.searchsorted(PRODUCT_SECTION_LIMITS, self.products, side="right")
+        groups = section * len(SHIFTS) + self._shift
+        size = len(PRODUCT_SECTIONS) * len(SHIFTS)
+        counts = np.bincount(groups, minlength=size).tolist()
+        durations = np.bincount(groups, weights=self.duration, minlength=size).tolist()
+        final_data: list[ClientPerProduct] = [
+            {"label": "Morning", "data": []},
+            {"label": "Afternoon", "data": []}
+        ]
+        for group, (count, duration) in enumerate(zip(counts, durations)):
+            shift = group % len(SHIFTS)
+            if count:
+                final_data[shift]["data"].append(round(int(duration) / count, 2))
+            elif shift == 0:
+                final_data[shift]["data"].append(0)
+        return final_data
+
+    def scatter_data(self) -> list[ScatterData]:
+        """Arrival vs start of each client"""
+        return [{
+            "label": "Arrival vs Start",
+            "data": [
+                {"x": x, "y": y}
+                for x, y in zip(self.arrival.tolist(), self.start.tolist())
+            ]
+        }]
+
+    def shift_efficiency(self) -> list[EfficiencyData]:
+        """Efficiency of each shift, normalized so the sum of all the shifts is 100%.
+
+        The efficiency of a shift is the average of its KPIs. The shifts are
+        sorted by their first appearance in the solution, as in `get_shift_efficiency`.
+        """
+        efficiency_data: list[EfficiencyData] = []
+        makespans = self.__shift_makespans()
+        for shift in self.__shift_order():
+            service_time, waiting_time, free_time, service_level = totals_kpis(
+                self._totals[shift], makespans[shift])
+            efficiency_data.append({
+                "id": SHIFTS[shift],
+                "label": f"{SHIFTS[shift].capitalize()} Shift",
+                "value": round((
+                    service_level + service_time + waiting_time + free_time
+                ) / 4, 2)
+            })
+        # Normalize the efficiency to make the sum 100%
+        total_efficiency = sum(item["value"] for item in efficiency_data)
+        for item in efficiency_data:
+            item["value"] = round((item["value"] / total_efficiency) * 100, 2)
+        return efficiency_data
+
+    # ========================= #
+    #      Helper methods       #
+    # ========================= #
+
+    def __shift_totals(self) -> np.ndarray:
+        """Sums needed for the KPIs, per shift. Each row has: number of clients,
+        service time, waiting time, working time and clients attended on time.
+        """
+        waiting = self.start - self.arrival
+        columns = (
+            np.ones_like(self.start),
+            self.end - self.arrival,
+            waiting,
+            self.end - self.start,
+            waiting <= SERVICE_LEVEL_THRESHOLD,
+        )
+        # * NOTE: The weights are floats for `bincount`, but every sum is an
+        # * integer far below 2**53, so they're exact
+        return np.stack([
+            np.bincount(self._shift, weights=column, minlength=len(SHIFTS))
+            for column in columns
+        ], axis=1).astype(np.int64)
+
+    def __makespan(self) -> int:
+        """Last end of the solution"""
+        return int(self.end.max())
+
+    def __shift_makespans(self) -> list[int]:
+        """Last end of each shift (0 if the shift has no clients)"""
+        makespans = np.zeros(len(SHIFTS), dtype=np.int64)
+        np.maximum.at(makespans, self._shift, self.end)
+        return makespans.tolist()
+
+    def __shift_order(self) -> list[int]:
+        """Shifts with clients, sorted by their first appearance"""
+        present = np.flatnonzero(np.bincount(self._shift, minlength=len(SHIFTS)))
+        first_row = [int(np.argmax(self._shift == shift)) for shift in present]
+        return [int(shift) for _, shift in sorted(zip(first_row, present))]
+
+
+def totals_kpis(totals: Any, makespan: int) -> tuple[float, float, float, float]:
+    """Get the service time, waiting time, free time and service level KPIs
+    from the sums of `SolutionTable` (number of clients, service time, waiting
+    time, working time and clients attended on time).
+
+    The sums are converted to Python integers, so the rounding is the same
+    that the functions in `kpis` use.
+    """
+    count, service, waiting, working, on_time = (int(value) for value in totals)
+    return (
+        round(service / count, 1),
+        round(waiting / count, 1),
+        round(working / makespan, 1),
+        round(on_time / count, 1),
+    )